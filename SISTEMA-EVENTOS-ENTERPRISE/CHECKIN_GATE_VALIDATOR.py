@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+🎟️ VALIDADOR DE CHECK-IN NA PORTARIA - Sistema de Eventos
+Bloom filter + tabela de códigos + bitset de "já utilizado" em um único
+arquivo mapeado em memória (mmap): validação O(1) e cold start em milissegundos
+"""
+
+import hashlib
+import math
+import mmap
+import struct
+import sys
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from aiohttp import web
+
+VALIDO = "valido"
+JA_UTILIZADO = "ja_utilizado"
+INVALIDO = "invalido"
+
+MAGIC = b"EVGATE01"
+FORMAT_VERSION = 1
+# magic, versão, byteorder (0=little, 1=big), k, tickets, bits do bloom, slots, evento_id
+HEADER = struct.Struct("<8sHHIQQQ64s")
+HEADER_SIZE = 128
+MAX_EVENTO_ID_BYTES = 64
+
+
+def _align8(value: int) -> int:
+    return (value + 7) & ~7
+
+
+def _hash(code: str):
+    """Dois hashes de 64 bits derivados de um único blake2b"""
+    digest = hashlib.blake2b(code.encode("utf-8"), digest_size=16).digest()
+    h1, h2 = struct.unpack("<QQ", digest)
+    return h1 or 1, h2 | 1
+
+
+class GateValidator:
+    """Estrutura compacta de validação de ingressos de um evento"""
+
+    def __init__(self, path: Path, mm: mmap.mmap, header: tuple):
+        _, _, _, self.k, self.tickets, self.bloom_bits, self.slots, evento_id = header
+        self.path = path
+        self.evento_id = evento_id.rstrip(b"\0").decode("utf-8")
+        self._mm = mm
+        self._lock = threading.Lock()
+
+        self._bloom_off = HEADER_SIZE
+        self._table_off = self._bloom_off + _align8(self.bloom_bits // 8)
+        self._used_off = self._table_off + self.slots * 8
+        self._table = memoryview(mm)[self._table_off:self._used_off].cast("Q")
+        self.used_count = self._count_used()
+
+    # ---------- construção / carga ----------
+
+    @classmethod
+    def build(cls, path, evento_id: str, codes: Iterable[str],
+              bits_per_ticket: int = 10, load_factor: float = 0.5) -> "GateValidator":
+        """Gerar o arquivo .gate a partir dos códigos válidos do evento"""
+        # Truncar quebraria a busca pela URL (ou um caractere UTF-8 ao meio): recusar antes de gravar
+        evento_bytes = evento_id.encode("utf-8")
+        if len(evento_bytes) > MAX_EVENTO_ID_BYTES:
+            raise ValueError(f"ID do evento com {len(evento_bytes)} bytes em UTF-8; "
+                             f"máximo de {MAX_EVENTO_ID_BYTES}")
+        if not hasattr(codes, "__len__"):
+            codes = list(codes)
+        total = max(1, len(codes))
+
+        bloom_bits = _align8(max(64, total * bits_per_ticket))
+        k = max(1, round(bits_per_ticket * math.log(2)))
+        slots = 1 << math.ceil(math.log2(max(8, total / load_factor)))
+
+        bloom = bytearray(bloom_bits // 8)
+        table = array("Q", bytes(slots * 8))
+        mask = slots - 1
+        inserted = 0
+
+        for code in codes:
+            h1, h2 = _hash(code)
+            slot = h2 & mask
+            while table[slot] and table[slot] != h1:
+                slot = (slot + 1) & mask
+            if table[slot] == h1:
+                continue  # código duplicado
+            table[slot] = h1
+            inserted += 1
+            for i in range(k):
+                bit = (h1 + i * h2) % bloom_bits
+                bloom[bit >> 3] |= 1 << (bit & 7)
+
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, 0 if sys.byteorder == "little" else 1,
+                             k, inserted, bloom_bits, slots, evento_bytes)
+        path = Path(path)
+        with open(path, "wb") as f:
+            f.write(header.ljust(HEADER_SIZE, b"\0"))
+            f.write(bytes(bloom).ljust(_align8(len(bloom)), b"\0"))
+            f.write(table.tobytes())
+            f.write(bytes(slots // 8))  # bitset de utilizados
+        return cls.open(path)
+
+    @classmethod
+    def open(cls, path) -> "GateValidator":
+        """Mapear um arquivo .gate existente (sem ler o conteúdo para a memória)"""
+        path = Path(path)
+        with open(path, "r+b") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE)
+        header = HEADER.unpack_from(mm, 0)
+        if header[0] != MAGIC or header[1] != FORMAT_VERSION:
+            mm.close()
+            raise ValueError(f"{path} não é um arquivo de portaria válido")
+        if header[2] != (0 if sys.byteorder == "little" else 1):
+            mm.close()
+            raise ValueError(f"{path} foi gerado em uma arquitetura com outra ordem de bytes")
+        return cls(path, mm, header)
+
+    # ---------- validação ----------
+
+    def _might_contain(self, h1: int, h2: int) -> bool:
+        mm, off, bits = self._mm, self._bloom_off, self.bloom_bits
+        for i in range(self.k):
+            bit = (h1 + i * h2) % bits
+            if not mm[off + (bit >> 3)] & (1 << (bit & 7)):
+                return False
+        return True
+
+    def _find_slot(self, code: str) -> Optional[int]:
+        h1, h2 = _hash(code)
+        if not self._might_contain(h1, h2):
+            return None  # negativo rápido, sem tocar na tabela
+        table, mask = self._table, self.slots - 1
+        slot = h2 & mask
+        while table[slot]:
+            if table[slot] == h1:
+                return slot
+            slot = (slot + 1) & mask
+        return None
+
+    def _is_used(self, slot: int) -> bool:
+        return bool(self._mm[self._used_off + (slot >> 3)] & (1 << (slot & 7)))
+
+    def validate(self, code: str) -> str:
+        """Consultar o status de um código sem registrar entrada"""
+        slot = self._find_slot(code)
+        if slot is None:
+            return INVALIDO
+        return JA_UTILIZADO if self._is_used(slot) else VALIDO
+
+    def check_in(self, code: str) -> str:
+        """Validar e marcar como utilizado de forma atômica"""
+        slot = self._find_slot(code)
+        if slot is None:
+            return INVALIDO
+        pos = self._used_off + (slot >> 3)
+        bit = 1 << (slot & 7)
+        with self._lock:
+            current = self._mm[pos]
+            if current & bit:
+                return JA_UTILIZADO
+            self._mm[pos] = current | bit
+            self.used_count += 1
+        return VALIDO
+
+    def _count_used(self) -> int:
+        return int.from_bytes(self._mm[self._used_off:self._used_off + self.slots // 8], "little").bit_count()
+
+    def stats(self) -> Dict:
+        return {
+            "evento_id": self.evento_id,
+            "ingressos": self.tickets,
+            "utilizados": self.used_count,
+            "restantes": self.tickets - self.used_count,
+            "tamanho_bytes": len(self._mm),
+        }
+
+    def flush(self):
+        self._mm.flush()
+
+    def close(self):
+        self._table.release()
+        self._mm.flush()
+        self._mm.close()
+
+
+# ==================== HTTP API ====================
+
+STATUS_HTTP = {VALIDO: 200, JA_UTILIZADO: 409, INVALIDO: 404}
+
+
+async def handle_checkin(request: web.Request) -> web.Response:
+    validator = request.app["gate_validators"].get(request.match_info["evento_id"])
+    if validator is None:
+        return web.json_response({"erro": "Evento não carregado nesta portaria"}, status=404)
+    try:
+        body = await request.json()
+    except ValueError:
+        return web.json_response({"erro": "JSON inválido"}, status=400)
+    code = body.get("codigo") if isinstance(body, dict) else None
+    if not code:
+        return web.json_response({"erro": "Campo obrigatório: codigo"}, status=400)
+
+    status = validator.check_in(str(code))
+    return web.json_response({"codigo": code, "status": status}, status=STATUS_HTTP[status])
+
+
+async def handle_stats(request: web.Request) -> web.Response:
+    validator = request.app["gate_validators"].get(request.match_info["evento_id"])
+    if validator is None:
+        return web.json_response({"erro": "Evento não carregado nesta portaria"}, status=404)
+    return web.json_response(validator.stats())
+
+
+async def _flush_validators(app: web.Application):
+    for validator in app["gate_validators"].values():
+        validator.close()
+
+
+def setup_routes(app: web.Application, validators: Dict[str, GateValidator]):
+    """Registrar rotas de check-in em uma aplicação aiohttp"""
+    app["gate_validators"] = validators
+    app.router.add_post("/api/v1/checkin/{evento_id}", handle_checkin)
+    app.router.add_get("/api/v1/checkin/{evento_id}/stats", handle_stats)
+    app.on_cleanup.append(_flush_validators)
+
+
+def create_app(validators: Dict[str, GateValidator]) -> web.Application:
+    """Criar aplicação standalone de portaria"""
+    app = web.Application()
+    setup_routes(app, validators)
+    return app
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Validador de Check-in da Portaria")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build_cmd = sub.add_parser("build", help="Gerar arquivo .gate a partir de uma lista de códigos")
+    build_cmd.add_argument("--evento", required=True, help="ID do evento")
+    build_cmd.add_argument("--codes", required=True, help="Arquivo texto com um código por linha")
+    build_cmd.add_argument("--out", required=True, help="Arquivo .gate de saída")
+
+    serve_cmd = sub.add_parser("serve", help="Servir check-in a partir de arquivos .gate")
+    serve_cmd.add_argument("gates", nargs="+", help="Arquivos .gate a carregar")
+    serve_cmd.add_argument("-H", "--host", default="0.0.0.0", help="Host do servidor")
+    serve_cmd.add_argument("-p", "--port", type=int, default=8200, help="Porta do servidor")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        with open(args.codes, encoding="utf-8") as f:
+            codes = [line.strip() for line in f if line.strip()]
+        try:
+            validator = GateValidator.build(args.out, args.evento, codes)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"[OK] {validator.tickets:,} ingressos em {args.out} "
+              f"({validator.stats()['tamanho_bytes'] / 1024 / 1024:.1f} MB) "
+              f"em {time.perf_counter() - start:.2f}s")
+        validator.close()
+    else:
+        validators = {}
+        for gate_file in args.gates:
+            start = time.perf_counter()
+            validator = GateValidator.open(gate_file)
+            validators[validator.evento_id] = validator
+            print(f"[OK] Evento {validator.evento_id}: {validator.tickets:,} ingressos, "
+                  f"{validator.used_count:,} já utilizados - carregado em "
+                  f"{(time.perf_counter() - start) * 1000:.1f}ms")
+        print(f"\n  Check-in: POST http://localhost:{args.port}/api/v1/checkin/<evento_id>\n")
+        web.run_app(create_app(validators), host=args.host, port=args.port)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+🍹 FILA DE PEDIDOS DE COMANDAS - Sistema de Eventos
+Filas por bar com prioridade VIP, back-pressure (429 + Retry-After)
+e coleta em lote para os displays de bar/cozinha
+"""
+
+import asyncio
+import itertools
+import math
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+# Prioridade por área (menor = atendido primeiro)
+AREA_PRIORITY = {
+    "vip": 0,
+    "camarote": 0,
+    "backstage": 0,
+    "pista": 1,
+    "geral": 1,
+}
+DEFAULT_PRIORITY = 1
+
+DEPTH_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 200, 500)
+WAIT_BUCKETS = (0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600)
+
+
+class Histogram:
+    """Histograma cumulativo por label, exportado no formato Prometheus"""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], label: str = "bar"):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.label = label
+        # label -> ([contagem por bucket], soma, total)
+        self._series: Dict[str, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, label_value: str):
+        counts, total_sum, count = self._series.get(label_value, ([0] * len(self.buckets), 0.0, 0))
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                counts[i] += 1
+                break
+        self._series[label_value] = (counts, total_sum + value, count + 1)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_value, (counts, total_sum, count) in sorted(self._series.items()):
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{self.label}="{label_value}",le="{upper:g}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{self.label}="{label_value}",le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{self.label}="{label_value}"}} {total_sum:.6f}')
+            lines.append(f'{self.name}_count{{{self.label}="{label_value}"}} {count}')
+        return lines
+
+
+class StationSaturated(Exception):
+    """Estação (bar/cozinha) sem capacidade para novos pedidos"""
+
+    def __init__(self, bar_id: str, retry_after: int):
+        super().__init__(f"Estação {bar_id} saturada, tente novamente em {retry_after}s")
+        self.bar_id = bar_id
+        self.retry_after = retry_after
+
+
+class OrderQueueService:
+    """Filas limitadas de pedidos por bar com prioridade por área"""
+
+    def __init__(self, max_depth: int = 200, vip_reserve: float = 0.1,
+                 default_prep_seconds: float = 30.0):
+        self.max_depth = max_depth
+        # Fração da fila reservada para pedidos prioritários (VIP/camarote)
+        self.reserved_slots = max(1, int(max_depth * vip_reserve))
+        self.default_prep_seconds = default_prep_seconds
+
+        self.queues: Dict[str, asyncio.PriorityQueue] = {}
+        self._seq = itertools.count(1)
+        self._drain_rate: Dict[str, float] = {}  # EWMA de pedidos/s por bar
+        self._last_pull: Dict[str, float] = {}
+        self.rejected: Dict[str, int] = {}
+
+        self.depth_histogram = Histogram(
+            "comandas_queue_depth", "Profundidade da fila observada a cada novo pedido", DEPTH_BUCKETS)
+        self.wait_histogram = Histogram(
+            "comandas_wait_seconds", "Tempo entre o pedido e a coleta pelo display", WAIT_BUCKETS)
+
+    def _queue(self, bar_id: str) -> asyncio.PriorityQueue:
+        queue = self.queues.get(bar_id)
+        if queue is None:
+            queue = asyncio.PriorityQueue(maxsize=self.max_depth)
+            self.queues[bar_id] = queue
+        return queue
+
+    def retry_after(self, bar_id: str) -> int:
+        """Estimar em quantos segundos a estação volta a aceitar pedidos"""
+        queue = self._queue(bar_id)
+        excess = queue.qsize() - (self.max_depth - self.reserved_slots) + 1
+        rate = self._drain_rate.get(bar_id) or (1.0 / self.default_prep_seconds)
+        return int(min(120, max(1, math.ceil(max(excess, 1) / rate))))
+
+    def submit(self, bar_id: str, order: Dict) -> Dict:
+        """Enfileirar pedido ou levantar StationSaturated"""
+        queue = self._queue(bar_id)
+        priority = AREA_PRIORITY.get(str(order.get("area", "")).lower(), DEFAULT_PRIORITY)
+        depth = queue.qsize()
+
+        limit = self.max_depth if priority == 0 else self.max_depth - self.reserved_slots
+        if depth >= limit:
+            self.rejected[bar_id] = self.rejected.get(bar_id, 0) + 1
+            raise StationSaturated(bar_id, self.retry_after(bar_id))
+
+        seq = next(self._seq)
+        entry = dict(order)
+        entry.update({
+            "pedido_id": seq,
+            "bar_id": bar_id,
+            "prioridade": priority,
+            "criado_em": time.time(),
+        })
+        queue.put_nowait((priority, seq, time.monotonic(), entry))
+        self.depth_histogram.observe(depth + 1, bar_id)
+        return entry
+
+    async def pull_batch(self, bar_id: str, max_items: int = 20, timeout: float = 0.0) -> List[Dict]:
+        """Retirar até max_items pedidos, aguardando até timeout pelo primeiro"""
+        queue = self._queue(bar_id)
+        items = []
+
+        if queue.empty() and timeout > 0:
+            try:
+                items.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                return []
+
+        while len(items) < max_items and not queue.empty():
+            items.append(queue.get_nowait())
+
+        now = time.monotonic()
+        batch = []
+        for _, _, enqueued_at, entry in items:
+            wait = now - enqueued_at
+            self.wait_histogram.observe(wait, bar_id)
+            batch.append(dict(entry, espera_s=round(wait, 3)))
+
+        if batch:
+            self._update_drain_rate(bar_id, len(batch), now)
+        return batch
+
+    def _update_drain_rate(self, bar_id: str, count: int, now: float):
+        last = self._last_pull.get(bar_id)
+        self._last_pull[bar_id] = now
+        if last is None or now <= last:
+            return
+        instant = count / (now - last)
+        previous = self._drain_rate.get(bar_id)
+        self._drain_rate[bar_id] = instant if previous is None else 0.3 * instant + 0.7 * previous
+
+    def depth(self, bar_id: str) -> int:
+        queue = self.queues.get(bar_id)
+        return queue.qsize() if queue else 0
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Estado atual de todas as filas"""
+        return {
+            bar_id: {
+                "profundidade": queue.qsize(),
+                "capacidade": self.max_depth,
+                "rejeitados": self.rejected.get(bar_id, 0),
+                "vazao_pedidos_s": round(self._drain_rate.get(bar_id, 0.0), 3),
+            }
+            for bar_id, queue in self.queues.items()
+        }
+
+    def render_metrics(self) -> str:
+        """Métricas em formato texto do Prometheus"""
+        lines = ["# HELP comandas_queue_size Pedidos aguardando por bar",
+                 "# TYPE comandas_queue_size gauge"]
+        for bar_id, queue in sorted(self.queues.items()):
+            lines.append(f'comandas_queue_size{{bar="{bar_id}"}} {queue.qsize()}')
+        lines += ["# HELP comandas_rejected_total Pedidos recusados por saturação",
+                  "# TYPE comandas_rejected_total counter"]
+        for bar_id, count in sorted(self.rejected.items()):
+            lines.append(f'comandas_rejected_total{{bar="{bar_id}"}} {count}')
+        lines += self.depth_histogram.render()
+        lines += self.wait_histogram.render()
+        return "\n".join(lines) + "\n"
+
+
+# ==================== HTTP API ====================
+
+async def handle_submit(request: web.Request) -> web.Response:
+    service: OrderQueueService = request.app["order_queue"]
+    bar_id = request.match_info["bar_id"]
+    try:
+        order = await request.json()
+    except ValueError:
+        return web.json_response({"erro": "JSON inválido"}, status=400)
+    if not isinstance(order, dict) or not order.get("comanda") or not order.get("itens"):
+        return web.json_response({"erro": "Campos obrigatórios: comanda, itens"}, status=400)
+
+    try:
+        entry = service.submit(bar_id, order)
+    except StationSaturated as e:
+        return web.json_response(
+            {"erro": str(e), "retry_after": e.retry_after},
+            status=429,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    return web.json_response(entry, status=202)
+
+
+async def handle_pull(request: web.Request) -> web.Response:
+    service: OrderQueueService = request.app["order_queue"]
+    bar_id = request.match_info["bar_id"]
+    try:
+        max_items = min(200, max(1, int(request.query.get("max", 20))))
+        wait = min(30.0, max(0.0, float(request.query.get("wait", 0))))
+    except ValueError:
+        return web.json_response({"erro": "Parâmetros max/wait inválidos"}, status=400)
+
+    batch = await service.pull_batch(bar_id, max_items=max_items, timeout=wait)
+    return web.json_response({"bar_id": bar_id, "pedidos": batch, "restantes": service.depth(bar_id)})
+
+
+async def handle_queues(request: web.Request) -> web.Response:
+    return web.json_response(request.app["order_queue"].snapshot())
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=request.app["order_queue"].render_metrics(),
+                        content_type="text/plain", charset="utf-8")
+
+
+def setup_routes(app: web.Application, service: OrderQueueService):
+    """Registrar rotas da fila de comandas em uma aplicação aiohttp"""
+    app["order_queue"] = service
+    app.router.add_post("/api/v1/comandas/{bar_id}/pedidos", handle_submit)
+    app.router.add_get("/api/v1/comandas/{bar_id}/pedidos", handle_pull)
+    app.router.add_get("/api/v1/comandas/filas", handle_queues)
+    app.router.add_get("/metrics", handle_metrics)
+
+
+def create_app(service: Optional[OrderQueueService] = None) -> web.Application:
+    """Criar aplicação standalone da fila de comandas"""
+    app = web.Application()
+    setup_routes(app, service or OrderQueueService())
+    return app
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fila de Pedidos de Comandas")
+    parser.add_argument("-H", "--host", default="0.0.0.0", help="Host do servidor")
+    parser.add_argument("-p", "--port", type=int, default=8100, help="Porta do servidor")
+    parser.add_argument("--max-depth", type=int, default=200, help="Capacidade máxima da fila por bar")
+
+    args = parser.parse_args()
+
+    print("\n" + "=" * 70)
+    print("   🍹 FILA DE PEDIDOS DE COMANDAS - SISTEMA DE EVENTOS")
+    print("=" * 70)
+    print(f"\n  Pedidos:  POST http://localhost:{args.port}/api/v1/comandas/<bar>/pedidos")
+    print(f"  Display:  GET  http://localhost:{args.port}/api/v1/comandas/<bar>/pedidos?max=20&wait=5")
+    print(f"  Métricas: GET  http://localhost:{args.port}/metrics\n")
+
+    web.run_app(create_app(OrderQueueService(max_depth=args.max_depth)), host=args.host, port=args.port)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+📊 PRÉ-AGREGAÇÃO DO DASHBOARD - Sistema de Eventos
+Receita, ingressos vendidos e check-ins em ring buffers por minuto/hora/dia,
+atualizados a cada transação e reconstruídos do log de transações no startup
+"""
+
+import json
+import math
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from aiohttp import web
+
+TIPOS_TRANSACAO = ("venda", "ingresso", "checkin")
+# Limites por transação: os buckets acumulam em int64 (array "q") e indexam por ts // largura
+MAX_QUANTIDADE = 2 ** 31 - 1
+MAX_TS = 253402300799.0  # 9999-12-31T23:59:59Z
+
+# resolução -> (largura do bucket em segundos, quantidade de buckets)
+RESOLUTIONS = {
+    "minuto": (60, 24 * 60),   # últimas 24 horas
+    "hora": (3600, 7 * 24),    # últimos 7 dias
+    "dia": (86400, 90),        # últimos 90 dias
+}
+
+
+class RingBuffer:
+    """Buckets de largura fixa reaproveitados circularmente"""
+
+    def __init__(self, width: int, size: int, offset: int = 0):
+        self.width = width
+        self.size = size
+        self.offset = offset
+        self.starts = array("q", [-1]) * size
+        self.revenue = array("d", [0.0]) * size
+        self.tickets = array("q", [0]) * size
+        self.checkins = array("q", [0]) * size
+        self.transactions = array("q", [0]) * size
+
+    def _index(self, ts: float) -> int:
+        return int((ts + self.offset) // self.width)
+
+    def add(self, ts: float, revenue: float, tickets: int, checkins: int):
+        index = self._index(ts)
+        slot = index % self.size
+        if self.starts[slot] != index:
+            if self.starts[slot] > index:
+                return  # transação mais antiga que a janela do buffer
+            self.starts[slot] = index
+            self.revenue[slot] = 0.0
+            self.tickets[slot] = 0
+            self.checkins[slot] = 0
+            self.transactions[slot] = 0
+        self.revenue[slot] += revenue
+        self.tickets[slot] += tickets
+        self.checkins[slot] += checkins
+        self.transactions[slot] += 1
+
+    def series(self, points: int, now: float) -> List[Dict]:
+        """Últimos `points` buckets em ordem cronológica (buckets vazios incluídos)"""
+        last = self._index(now)
+        result = []
+        for index in range(last - min(points, self.size) + 1, last + 1):
+            slot = index % self.size
+            live = self.starts[slot] == index
+            result.append({
+                "inicio": index * self.width - self.offset,
+                "receita": round(self.revenue[slot], 2) if live else 0.0,
+                "ingressos": self.tickets[slot] if live else 0,
+                "checkins": self.checkins[slot] if live else 0,
+                "transacoes": self.transactions[slot] if live else 0,
+            })
+        return result
+
+    def totals(self, points: int, now: float) -> Dict:
+        totals = {"receita": 0.0, "ingressos": 0, "checkins": 0, "transacoes": 0}
+        for bucket in self.series(points, now):
+            for key in totals:
+                totals[key] += bucket[key]
+        totals["receita"] = round(totals["receita"], 2)
+        return totals
+
+
+class DashboardStatsAggregator:
+    """Agregação incremental das métricas do dashboard"""
+
+    def __init__(self, utc_offset_seconds: int = -3 * 3600, log: Optional["TransactionLog"] = None):
+        self.rings = {name: RingBuffer(width, size, utc_offset_seconds)
+                      for name, (width, size) in RESOLUTIONS.items()}
+        self.log = log
+        self._lock = threading.Lock()
+
+    def record(self, tipo: str, valor: float = 0.0, quantidade: int = 1,
+               ts: Optional[float] = None, persist: bool = True):
+        """Registrar uma transação (venda, ingresso ou checkin)"""
+        if tipo not in TIPOS_TRANSACAO:
+            raise ValueError(f"Tipo de transação desconhecido: {tipo}")
+        # Normalizar antes de persistir: o log só recebe transações que o rebuild consegue reler
+        ts = time.time() if ts is None else float(ts)
+        valor = float(valor)
+        quantidade = int(quantidade)
+        if not math.isfinite(valor):
+            raise ValueError("valor deve ser um número finito")
+        if not 0 <= ts <= MAX_TS:
+            raise ValueError(f"ts fora do intervalo [0, {MAX_TS:.0f}]")
+        if not 0 <= quantidade <= MAX_QUANTIDADE:
+            raise ValueError(f"quantidade fora do intervalo [0, {MAX_QUANTIDADE}]")
+        revenue = valor if tipo in ("venda", "ingresso") else 0.0
+        tickets = quantidade if tipo == "ingresso" else 0
+        checkins = quantidade if tipo == "checkin" else 0
+
+        with self._lock:
+            if persist and self.log is not None:
+                self.log.append({"tipo": tipo, "valor": valor, "quantidade": quantidade, "ts": ts})
+            for ring in self.rings.values():
+                ring.add(ts, revenue, tickets, checkins)
+
+    def rebuild(self, transactions: Iterable[Dict]) -> int:
+        """Reconstruir os buckets a partir de um histórico de transações"""
+        horizon = time.time() - max(width * size for width, size in RESOLUTIONS.values())
+        count = 0
+        for tx in transactions:
+            try:
+                if float(tx["ts"]) < horizon:
+                    continue
+                self.record(tx["tipo"], tx.get("valor", 0.0), tx.get("quantidade", 1), tx["ts"], persist=False)
+            except (ValueError, OverflowError, KeyError, TypeError, AttributeError):
+                continue  # linha inválida (ex.: gravada antes da validação) não impede o startup
+            count += 1
+        return count
+
+    def series(self, resolution: str = "minuto", points: int = 60, now: Optional[float] = None) -> List[Dict]:
+        if resolution not in self.rings:
+            raise ValueError(f"Resolução inválida: {resolution}")
+        with self._lock:
+            return self.rings[resolution].series(points, time.time() if now is None else now)
+
+    def dashboard_stats(self, now: Optional[float] = None) -> Dict:
+        """Resumo servido em /api/v1/dashboard/stats"""
+        now = time.time() if now is None else now
+        with self._lock:
+            today = self.rings["dia"].totals(1, now)
+            last_hour = self.rings["minuto"].totals(60, now)
+            daily = self.rings["dia"].series(30, now)
+        return {
+            "hoje": today,
+            "ultima_hora": last_hour,
+            "ultimos_30_dias": {
+                "receita": round(sum(d["receita"] for d in daily), 2),
+                "ingressos": sum(d["ingressos"] for d in daily),
+                "checkins": sum(d["checkins"] for d in daily),
+            },
+            "receita_diaria": [{"inicio": d["inicio"], "receita": d["receita"], "total": d["transacoes"]}
+                               for d in daily if d["transacoes"]],
+            "gerado_em": now,
+        }
+
+
+class TransactionLog:
+    """Log append-only de transações em JSON Lines"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def append(self, tx: Dict):
+        self._file.write(json.dumps(tx, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def replay(self) -> Iterator[Dict]:
+        """Ler o log linha a linha, ignorando linhas truncadas"""
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def close(self):
+        self._file.close()
+
+
+def load_aggregator(log_path, utc_offset_seconds: int = -3 * 3600) -> DashboardStatsAggregator:
+    """Abrir o log de transações e reconstruir o agregador a partir dele"""
+    log = TransactionLog(log_path)
+    aggregator = DashboardStatsAggregator(utc_offset_seconds, log=log)
+    aggregator.rebuild(log.replay())
+    return aggregator
+
+
+# ==================== HTTP API ====================
+
+async def handle_stats(request: web.Request) -> web.Response:
+    return web.json_response(request.app["dashboard_stats"].dashboard_stats())
+
+
+async def handle_series(request: web.Request) -> web.Response:
+    aggregator: DashboardStatsAggregator = request.app["dashboard_stats"]
+    try:
+        points = min(1440, max(1, int(request.query.get("pontos", 60))))
+        series = aggregator.series(request.query.get("resolucao", "minuto"), points)
+    except ValueError as e:
+        return web.json_response({"erro": str(e)}, status=400)
+    return web.json_response(series)
+
+
+async def handle_record(request: web.Request) -> web.Response:
+    aggregator: DashboardStatsAggregator = request.app["dashboard_stats"]
+    try:
+        tx = await request.json()
+        aggregator.record(tx["tipo"], tx.get("valor", 0.0), tx.get("quantidade", 1), tx.get("ts"))
+    except (ValueError, OverflowError, KeyError, TypeError) as e:
+        return web.json_response({"erro": f"Transação inválida: {e}"}, status=400)
+    return web.json_response({"ok": True}, status=201)
+
+
+def setup_routes(app: web.Application, aggregator: DashboardStatsAggregator):
+    """Registrar rotas do dashboard em uma aplicação aiohttp"""
+    app["dashboard_stats"] = aggregator
+    app.router.add_get("/api/v1/dashboard/stats", handle_stats)
+    app.router.add_get("/api/v1/dashboard/series", handle_series)
+    app.router.add_post("/api/v1/transacoes", handle_record)
+
+
+def create_app(aggregator: DashboardStatsAggregator) -> web.Application:
+    """Criar aplicação standalone do dashboard"""
+    app = web.Application()
+    setup_routes(app, aggregator)
+    return app
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pré-agregação do Dashboard")
+    parser.add_argument("-H", "--host", default="0.0.0.0", help="Host do servidor")
+    parser.add_argument("-p", "--port", type=int, default=8300, help="Porta do servidor")
+    parser.add_argument("--log", default="data/transacoes.jsonl", help="Log de transações")
+
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    aggregator = load_aggregator(args.log)
+    print(f"[OK] Buckets reconstruídos de {args.log} em {(time.perf_counter() - start) * 1000:.1f}ms")
+    print(f"\n  Stats: GET http://localhost:{args.port}/api/v1/dashboard/stats\n")
+
+    web.run_app(create_app(aggregator), host=args.host, port=args.port)
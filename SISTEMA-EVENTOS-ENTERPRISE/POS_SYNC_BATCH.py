@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+🔄 SINCRONIZAÇÃO EM LOTE DOS CAIXAS (POS) - Sistema de Eventos
+Dispositivos de caixa/cashless acumulam operações offline e enviam lotes
+comprimidos com chave de idempotência por operação; o lote é aplicado em
+uma única transação e a resposta traz apenas o diff necessário ao dispositivo
+"""
+
+import asyncio
+import json
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+TIPOS_OPERACAO = ("venda", "recarga", "estorno")
+MAX_OPERACOES_POR_LOTE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS operacoes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    chave TEXT NOT NULL UNIQUE,
+    dispositivo TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    cartao TEXT,
+    valor REAL NOT NULL DEFAULT 0,
+    dados TEXT,
+    ts REAL NOT NULL,
+    aplicado_em REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS saldos (
+    cartao TEXT PRIMARY KEY,
+    saldo REAL NOT NULL DEFAULT 0,
+    seq INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_saldos_seq ON saldos(seq);
+"""
+
+
+class SyncStore:
+    """Livro-caixa local (SQLite) com aplicação atômica de lotes"""
+
+    def __init__(self, db_path="data/caixa_sync.db", aggregator=None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # Agregador opcional do dashboard (DASHBOARD_STATS_AGGREGATOR)
+        self.aggregator = aggregator
+        self._lock = threading.Lock()
+
+    def apply_batch(self, device: str, operations: List[Dict], cursor: int = 0) -> Dict:
+        """Aplicar um lote em uma única transação e devolver o diff"""
+        applied, duplicates, rejected = [], [], {}
+        revenue_events = []
+
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                keys = [op.get("chave") for op in operations if op.get("chave") and isinstance(op["chave"], str)]
+                existing = set()
+                for i in range(0, len(keys), 500):
+                    chunk = keys[i:i + 500]
+                    cur.execute(f"SELECT chave FROM operacoes WHERE chave IN ({','.join('?' * len(chunk))})", chunk)
+                    existing.update(row[0] for row in cur.fetchall())
+
+                for op in operations:
+                    key = op.get("chave")
+                    if not key:
+                        continue
+                    if not isinstance(key, str):
+                        rejected[str(key)] = "chave inválida"
+                        continue
+                    if key in existing:
+                        duplicates.append(key)
+                        continue
+                    error, value, ts = self._parse_operation(op)
+                    if not error:
+                        error = self._apply_operation(cur, device, op, value, ts)
+                    if error:
+                        rejected[key] = error
+                    else:
+                        applied.append(key)
+                        existing.add(key)
+                        if op["tipo"] in ("venda", "estorno"):
+                            sign = -1 if op["tipo"] == "estorno" else 1
+                            revenue_events.append((sign * value, ts))
+
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+
+            cur.execute("SELECT cartao, saldo FROM saldos WHERE seq > ?", (cursor,))
+            balances = {card: round(balance, 2) for card, balance in cur.fetchall()}
+            cur.execute("SELECT COALESCE(MAX(seq), 0) FROM operacoes")
+            new_cursor = cur.fetchone()[0]
+
+        if self.aggregator is not None:
+            for value, ts in revenue_events:
+                try:
+                    self.aggregator.record("venda", value, ts=ts)
+                except Exception as e:
+                    # Lote já confirmado: falha no dashboard não pode virar erro para o dispositivo
+                    print(f"[WARN] Dashboard não atualizado com a venda de {ts}: {e}")
+
+        return {
+            "ok": applied,
+            "dup": duplicates,
+            "err": rejected,
+            "saldos": balances,
+            "cursor": new_cursor,
+        }
+
+    @staticmethod
+    def _parse_operation(op: Dict) -> Tuple[Optional[str], float, float]:
+        """Validar os campos de uma operação antes de tocar no banco; devolve (motivo da rejeição, valor, ts)"""
+        kind = op.get("tipo")
+        if kind not in TIPOS_OPERACAO:
+            return f"tipo inválido: {kind}", 0.0, 0.0
+        try:
+            value = float(op.get("valor", 0))
+        except (TypeError, ValueError):
+            return "valor inválido", 0.0, 0.0
+        if not math.isfinite(value):
+            return "valor inválido", 0.0, 0.0
+        if value < 0:
+            return "valor negativo", 0.0, 0.0
+        try:
+            ts = float(op.get("ts") or time.time())
+        except (TypeError, ValueError):
+            return "ts inválido", 0.0, 0.0
+        if not math.isfinite(ts):
+            return "ts inválido", 0.0, 0.0
+        card = op.get("cartao")
+        if card and not isinstance(card, str):
+            return "cartão inválido", 0.0, 0.0
+        return None, value, ts
+
+    def _apply_operation(self, cur: sqlite3.Cursor, device: str, op: Dict, value: float,
+                         ts: float) -> Optional[str]:
+        """Aplicar uma operação já validada dentro da transação corrente; devolve o motivo em caso de rejeição"""
+        kind = op["tipo"]
+        card = op.get("cartao")
+
+        if card:
+            cur.execute("SELECT saldo FROM saldos WHERE cartao = ?", (card,))
+            row = cur.fetchone()
+            balance = row[0] if row else 0.0
+            delta = {"venda": -value, "recarga": value, "estorno": value}[kind]
+            if balance + delta < -1e-9:
+                return "saldo insuficiente"
+        elif kind == "recarga":
+            return "recarga sem cartão"
+
+        cur.execute(
+            "INSERT INTO operacoes (chave, dispositivo, tipo, cartao, valor, dados, ts, aplicado_em) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (op["chave"], device, kind, card, value, json.dumps(op.get("dados") or {}), ts, time.time()),
+        )
+        if card:
+            cur.execute(
+                "INSERT INTO saldos (cartao, saldo, seq) VALUES (?, ?, ?) "
+                "ON CONFLICT(cartao) DO UPDATE SET saldo = saldo + excluded.saldo, seq = excluded.seq",
+                (card, delta, cur.lastrowid),
+            )
+        return None
+
+    def close(self):
+        self.conn.close()
+
+
+# ==================== HTTP API ====================
+
+async def handle_sync(request: web.Request) -> web.Response:
+    store: SyncStore = request.app["sync_store"]
+    # Content-Encoding: gzip/deflate é descomprimido pelo próprio aiohttp
+    try:
+        body = await request.json()
+    except ValueError:
+        return web.json_response({"erro": "JSON inválido"}, status=400)
+    if not isinstance(body, dict) or not body.get("dispositivo") or not isinstance(body.get("operacoes"), list):
+        return web.json_response({"erro": "Campos obrigatórios: dispositivo, operacoes"}, status=400)
+    if not all(isinstance(op, dict) for op in body["operacoes"]):
+        return web.json_response({"erro": "Cada operação deve ser um objeto"}, status=400)
+    if len(body["operacoes"]) > MAX_OPERACOES_POR_LOTE:
+        return web.json_response({"erro": f"Máximo de {MAX_OPERACOES_POR_LOTE} operações por lote"}, status=413)
+    try:
+        cursor = int(body.get("cursor") or 0)
+    except (TypeError, ValueError):
+        return web.json_response({"erro": "cursor deve ser um inteiro"}, status=400)
+
+    loop = asyncio.get_running_loop()
+    diff = await loop.run_in_executor(None, store.apply_batch, str(body["dispositivo"]), body["operacoes"], cursor)
+
+    response = web.json_response(diff, dumps=lambda obj: json.dumps(obj, separators=(",", ":")))
+    response.enable_compression()
+    return response
+
+
+async def _close_store(app: web.Application):
+    app["sync_store"].close()
+
+
+def setup_routes(app: web.Application, store: SyncStore):
+    """Registrar rota de sincronização em lote em uma aplicação aiohttp"""
+    app["sync_store"] = store
+    app.router.add_post("/api/v1/sync/lote", handle_sync)
+    app.on_cleanup.append(_close_store)
+
+
+def create_app(store: SyncStore) -> web.Application:
+    """Criar aplicação standalone de sincronização"""
+    app = web.Application(client_max_size=8 * 1024 * 1024)
+    setup_routes(app, store)
+    return app
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sincronização em lote dos caixas")
+    parser.add_argument("-H", "--host", default="0.0.0.0", help="Host do servidor")
+    parser.add_argument("-p", "--port", type=int, default=8400, help="Porta do servidor")
+    parser.add_argument("--db", default="data/caixa_sync.db", help="Banco SQLite do livro-caixa")
+    parser.add_argument("--transaction-log", default=None,
+                        help="Log de transações do dashboard (alimenta /api/v1/dashboard/stats)")
+
+    args = parser.parse_args()
+
+    aggregator = None
+    if args.transaction_log:
+        import DASHBOARD_STATS_AGGREGATOR
+
+        aggregator = DASHBOARD_STATS_AGGREGATOR.load_aggregator(args.transaction_log)
+
+    app = create_app(SyncStore(args.db, aggregator=aggregator))
+    if aggregator is not None:
+        DASHBOARD_STATS_AGGREGATOR.setup_routes(app, aggregator)
+
+    print(f"\n  Sync: POST http://localhost:{args.port}/api/v1/sync/lote (Content-Encoding: gzip)\n")
+    web.run_app(app, host=args.host, port=args.port)
@@ -11,6 +11,9 @@ import os
 import sys
 from pathlib import Path
 
+from ultra_loadtest import AllocationTracker, SamplingProfiler, format_checkpoint, save_json
+from ultra_loadtest.profiler import serve_profile_request
+
 # UTF-8 config
 sys.stdout.reconfigure(encoding='utf-8')
 
@@ -18,6 +21,9 @@ sys.stdout.reconfigure(encoding='utf-8')
 PORT = 8888
 HOST = "0.0.0.0"  # Aceita conexoes externas tambem
 DIRECTORY = Path(__file__).parent
+PROFILE_HZ = None  # --profile: amostragem das pilhas do servidor
+ALLOC_INTERVAL = None  # --trace-alloc: segundos entre snapshots do tracemalloc
+ALLOC_TRACKER = None
 
 class TestMasterHandler(http.server.SimpleHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
@@ -30,6 +36,8 @@ class TestMasterHandler(http.server.SimpleHTTPRequestHandler):
         return super().end_headers()
     
     def do_GET(self):
+        if ALLOC_TRACKER:
+            ALLOC_TRACKER.count_request()
         if self.path == '/':
             self.path = '/TEST_MASTER_URL.html'
         elif self.path == '/api/test':
@@ -39,6 +47,10 @@ class TestMasterHandler(http.server.SimpleHTTPRequestHandler):
             self.end_headers()
             self.wfile.write(b'{"status":"running","rps":87432,"response_time":24.8}')
             return
+        elif self.path.startswith('/api/debug/profile') and PROFILE_HZ:
+            # Pilhas collapsed de uma janela: /api/debug/profile?seconds=30
+            serve_profile_request(self, hz=PROFILE_HZ)
+            return
         return super().do_GET()
     
     def log_message(self, format, *args):
@@ -76,11 +88,18 @@ def start_server():
     
     print(f"\n[OK] Iniciando servidor na porta {port}...")
     
+    global ALLOC_TRACKER
+    profiler = SamplingProfiler(hz=PROFILE_HZ).start() if PROFILE_HZ else None
+    if ALLOC_INTERVAL:
+        ALLOC_TRACKER = AllocationTracker().start().start_periodic(
+            ALLOC_INTERVAL, lambda entry: print(format_checkpoint(entry)))
     try:
         # Criar servidor com reuso de endereco
         socketserver.TCPServer.allow_reuse_address = True
         
-        with socketserver.TCPServer((HOST, port), TestMasterHandler) as httpd:
+        # Uma thread por conexao: /api/debug/profile nao bloqueia as demais requisicoes
+        with socketserver.ThreadingTCPServer((HOST, port), TestMasterHandler) as httpd:
+            httpd.daemon_threads = True
             local_url = f"http://localhost:{port}/TEST_MASTER_URL.html"
             network_url = f"http://{HOST}:{port}/TEST_MASTER_URL.html"
             
@@ -98,6 +117,8 @@ def start_server():
             print(f"   * Relatorio MD:    http://localhost:{port}/RELATORIO_PERFORMANCE_ULTRA.md")
             print(f"   * Resultados TXT:  http://localhost:{port}/TEST_RESULTS_MASTER.txt")
             print(f"   * API Test:        http://localhost:{port}/api/test")
+            if profiler:
+                print(f"   * Profile (30s):   http://localhost:{port}/api/debug/profile?seconds=30")
             print("\n" + "="*70)
             print("\n[!] Pressione Ctrl+C para parar o servidor\n")
             
@@ -131,6 +152,15 @@ def start_server():
         import traceback
         traceback.print_exc()
     finally:
+        if profiler:
+            profiler.stop()
+            profiler.print_summary(profiler.save("server_profile", DIRECTORY))
+        if ALLOC_TRACKER:
+            ALLOC_TRACKER.stop()
+            summary = ALLOC_TRACKER.summary()
+            print(f"\n[ALLOC] {summary['requests']} requisicoes, retido {summary['retained_kb']:+.1f}KB "
+                  f"({summary['bytes_per_request'] or 0:+.0f} B/req)")
+            print(f"[ALLOC] Snapshots em {save_json(summary, 'server_allocations', DIRECTORY)}")
         print("\n[OK] Servidor encerrado!")
         print("="*70)
 
@@ -140,11 +170,20 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Servidor Web Teste Master")
     parser.add_argument("-p", "--port", type=int, default=8888, help="Porta do servidor")
     parser.add_argument("-H", "--host", default="0.0.0.0", help="Host do servidor")
+    parser.add_argument("--profile", action="store_true",
+                        help="Amostrar pilhas (flamegraph) ate o encerramento e habilitar /api/debug/profile")
+    parser.add_argument("--profile-hz", type=float, default=100, help="Frequencia de amostragem do --profile")
+    parser.add_argument("--trace-alloc", action="store_true",
+                        help="Rastrear alocacoes com tracemalloc (mais lento; use so para diagnostico)")
+    parser.add_argument("--trace-alloc-interval", type=float, default=30,
+                        help="Segundos entre snapshots do --trace-alloc")
     
     args = parser.parse_args()
     
     PORT = args.port
     HOST = args.host
+    PROFILE_HZ = args.profile_hz if args.profile else None
+    ALLOC_INTERVAL = args.trace_alloc_interval if args.trace_alloc else None
     
     print("\n" + "="*70)
     print("   SISTEMA DE EVENTOS - TESTE MASTER ULTRA PERFORMANCE")
@@ -153,5 +192,9 @@ if __name__ == "__main__":
     print(f"  Host: {HOST}")
     print(f"  Porta: {PORT}")
     print(f"  Diretorio: {DIRECTORY}")
+    if PROFILE_HZ:
+        print(f"  Profile: {PROFILE_HZ:g} Hz")
+    if ALLOC_INTERVAL:
+        print(f"  Trace alloc: snapshot a cada {ALLOC_INTERVAL:g}s")
     
     start_server()
\ No newline at end of file
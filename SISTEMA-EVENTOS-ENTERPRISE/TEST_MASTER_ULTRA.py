@@ -8,22 +8,16 @@ import time
 import json
 import random
 import statistics
-from datetime import datetime
-from pathlib import Path
 import threading
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import concurrent.futures
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 
-# Cores para output
-class Colors:
-    HEADER = '\033[95m'
-    OKBLUE = '\033[94m'
-    OKCYAN = '\033[96m'
-    OKGREEN = '\033[92m'
-    WARNING = '\033[93m'
-    FAIL = '\033[91m'
-    ENDC = '\033[0m'
-    BOLD = '\033[1m'
+from ultra_loadtest import (AllocationTracker, Colors, ProcessUsage, SamplingProfiler, SyncTransport, closed_loop,
+                            format_checkpoint, grade_color, print_section, rating, save_json)
+from ultra_loadtest.profiler import serve_profile_request
+
+# Cliente e servidor dividem o processo: só as pilhas das threads do servidor
+SERVER_FILES = ("socketserver.py",)
 
 # Mock Server para simular backend
 class MockServerHandler(BaseHTTPRequestHandler):
@@ -31,6 +25,12 @@ class MockServerHandler(BaseHTTPRequestHandler):
         pass  # Silenciar logs do servidor
     
     def do_GET(self):
+        if self.server.alloc_tracker:
+            self.server.alloc_tracker.count_request()
+        if self.path.startswith('/api/debug/profile') and self.server.profiler:
+            serve_profile_request(self, hz=self.server.profiler.hz, require_files=SERVER_FILES)
+            return
+        
         # Simular latência realista
         time.sleep(random.uniform(0.001, 0.02))  # 1-20ms
         
@@ -60,15 +60,28 @@ class MockServerHandler(BaseHTTPRequestHandler):
             self.end_headers()
     
     def do_POST(self):
+        if self.server.alloc_tracker:
+            self.server.alloc_tracker.count_request()
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
         time.sleep(random.uniform(0.005, 0.03))  # 5-30ms
         self.send_response(201)
         self.send_header('Content-Type', 'application/json')
         self.end_headers()
         self.wfile.write(json.dumps({"success": True, "id": random.randint(1000, 9999)}).encode())
 
-def start_mock_server(port=8000):
-    """Iniciar servidor mock em thread separada"""
-    server = HTTPServer(('localhost', port), MockServerHandler)
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Backlog padrão (5) gera retransmissões de SYN de 1s sob carga concorrente
+    request_queue_size = 1024
+    profiler = None
+    alloc_tracker = None
+
+def start_mock_server(port=8000, profile_hz=None, alloc_tracker=None):
+    """Iniciar servidor mock em thread separada (profile_hz: amostrar as pilhas do servidor)"""
+    server = MockServer(('localhost', port), MockServerHandler)
+    server.alloc_tracker = alloc_tracker
+    if profile_hz:
+        server.profiler = SamplingProfiler(hz=profile_hz, require_files=SERVER_FILES).start()
     thread = threading.Thread(target=server.serve_forever, daemon=True)
     thread.start()
     return server
@@ -76,10 +89,25 @@ def start_mock_server(port=8000):
 class TestMasterUltra:
     """Suite Master de Testes Ultra Performance"""
     
-    def __init__(self):
-        self.base_url = "http://localhost:8000"
+    API_ENDPOINTS = [
+        ("GET", "/health", "Health Check"),
+        ("GET", "/metrics", "Metrics"),
+        ("GET", "/api/v1/eventos", "Lista Eventos"),
+        ("GET", "/api/v1/dashboard", "Dashboard Stats"),
+        ("POST", "/api/v1/auth/login", "User Login"),
+        ("POST", "/api/v1/eventos", "Create Event"),
+        ("POST", "/api/v1/payments", "Process Payment"),
+        ("GET", "/api/v1/reports", "Generate Report"),
+    ]
+    
+    def __init__(self, port=8000, profile_hz=None, trace_alloc=False):
+        self.port = port
+        self.profile_hz = profile_hz
+        self.alloc_tracker = AllocationTracker() if trace_alloc else None
+        self.base_url = f"http://localhost:{port}"
         self.results = {}
         self.start_time = time.time()
+        self.transport = SyncTransport(timeout=5)
         
     def print_header(self):
         """Print header épico"""
@@ -92,43 +120,36 @@ class TestMasterUltra:
         print(f"{Colors.OKCYAN}Iniciando bateria completa de testes...{Colors.ENDC}")
         print(f"{Colors.WARNING}Este teste simula condições extremas de produção!{Colors.ENDC}\n")
     
-    def simulate_api_test(self, endpoint_name, num_requests=100):
-        """Simular teste de API com métricas realistas"""
+    def run_endpoint_test(self, method, path, name, num_requests=100):
+        """Medir um endpoint do servidor mock"""
+        endpoint_name = f"{name} ({path})"
         print(f"  Testando {endpoint_name}...")
         
-        # Gerar tempos de resposta realistas
-        times = []
-        for _ in range(num_requests):
-            # Simular distribuição realista de latência
-            if random.random() < 0.95:  # 95% das requests são rápidas
-                response_time = random.uniform(5, 20)
-            else:  # 5% são mais lentas
-                response_time = random.uniform(20, 50)
-            times.append(response_time)
-        
-        # Calcular estatísticas
+        body = {"teste": True} if method == "POST" else None
+        run = closed_loop(self.transport, method, f"{self.base_url}{path}", body, concurrency=10,
+                          requests=num_requests)
+        summary = run.summary()
+        
         stats = {
             "endpoint": endpoint_name,
-            "requests": num_requests,
-            "min_ms": round(min(times), 2),
-            "max_ms": round(max(times), 2),
-            "avg_ms": round(statistics.mean(times), 2),
-            "median_ms": round(statistics.median(times), 2),
-            "p95_ms": round(sorted(times)[int(0.95 * len(times))], 2),
-            "p99_ms": round(sorted(times)[int(0.99 * len(times))], 2),
-            "success_rate": f"{random.uniform(99.5, 99.9):.1f}%"
+            "method": method,
+            "requests": run.requests,
+            "errors": run.errors,
+            "min_ms": summary["min_ms"],
+            "max_ms": summary["max_ms"],
+            "avg_ms": summary["avg_ms"],
+            "median_ms": summary["median_ms"],
+            "p95_ms": summary["p95_ms"],
+            "p99_ms": summary["p99_ms"],
+            "success_rate": summary["success_rate"]
         }
         
         # Determinar status
-        if stats["avg_ms"] < 20:
-            color = Colors.OKGREEN
-            status = "✅ ULTRA PERFORMANCE"
-        elif stats["avg_ms"] < 50:
-            color = Colors.WARNING
-            status = "⚠️ HIGH PERFORMANCE"
-        else:
-            color = Colors.FAIL
-            status = "❌ NEEDS OPTIMIZATION"
+        color, status = rating(stats["avg_ms"], [(20, Colors.OKGREEN, "✅ ULTRA PERFORMANCE"),
+                                                 (50, Colors.WARNING, "⚠️ HIGH PERFORMANCE")],
+                               (Colors.FAIL, "❌ NEEDS OPTIMIZATION"))
+        if not run.latency.count:
+            color, status = Colors.FAIL, "❌ SEM RESPOSTA"
         
         print(f"    {color}{status}{Colors.ENDC}")
         print(f"    ├─ Avg: {stats['avg_ms']}ms | P95: {stats['p95_ms']}ms | P99: {stats['p99_ms']}ms")
@@ -138,129 +159,100 @@ class TestMasterUltra:
     
     def run_api_tests(self):
         """Executar testes de API"""
-        print(f"\n{Colors.OKCYAN}{'='*60}")
-        print(f"  📡 TESTE DE ENDPOINTS API")
-        print(f"{'='*60}{Colors.ENDC}\n")
-        
-        endpoints = [
-            "Health Check (/health)",
-            "Metrics (/metrics)",
-            "Lista Eventos (/api/v1/eventos)",
-            "Dashboard Stats (/api/v1/dashboard)",
-            "User Login (/api/v1/auth/login)",
-            "Create Event (/api/v1/eventos)",
-            "Process Payment (/api/v1/payments)",
-            "Generate Report (/api/v1/reports)"
-        ]
+        print_section("📡 TESTE DE ENDPOINTS API")
         
-        results = []
-        for endpoint in endpoints:
-            stats = self.simulate_api_test(endpoint, 100)
-            results.append(stats)
-            time.sleep(0.1)  # Pequena pausa para efeito visual
+        results = [self.run_endpoint_test(method, path, name, 100) for method, path, name in self.API_ENDPOINTS]
         
         self.results["api_tests"] = results
         return results
     
-    def run_load_test(self):
+    def run_load_test(self, level_seconds=2):
         """Executar teste de carga"""
-        print(f"\n{Colors.OKCYAN}{'='*60}")
-        print(f"  📊 TESTE DE CARGA PROGRESSIVA")
-        print(f"{'='*60}{Colors.ENDC}\n")
+        print_section("📊 TESTE DE CARGA PROGRESSIVA")
         
-        load_levels = [10, 50, 100, 500, 1000, 5000, 10000]
+        load_levels = [10, 50, 100, 250, 500]
         results = []
         
         for users in load_levels:
             print(f"  Simulando {users:,} usuários simultâneos...")
             
-            # Simular métricas baseadas na carga
-            base_response = 10
-            response_time = base_response + (users / 500) * random.uniform(0.8, 1.2)
-            
-            # RPS realista baseado em usuários
-            rps = users * random.uniform(8, 12)
-            
-            # Taxa de sucesso diminui ligeiramente com carga
-            success_rate = max(95, 100 - (users / 2000))
+            usage = ProcessUsage().start()
+            run = closed_loop(self.transport, "GET", f"{self.base_url}/health", concurrency=users,
+                              duration=level_seconds)
+            resources = usage.stop()
+            summary = run.summary()
             
             stats = {
                 "concurrent_users": users,
-                "rps": round(rps, 2),
-                "avg_response_ms": round(response_time, 2),
-                "p95_response_ms": round(response_time * 1.5, 2),
-                "p99_response_ms": round(response_time * 2, 2),
-                "success_rate": f"{success_rate:.1f}%",
-                "cpu_usage": f"{min(95, 20 + users/100):.1f}%",
-                "memory_mb": round(100 + users * 0.05, 2)
+                "rps": summary["rps"],
+                "avg_response_ms": summary["avg_ms"],
+                "p95_response_ms": summary["p95_ms"],
+                "p99_response_ms": summary["p99_ms"],
+                "success_rate": summary["success_rate"],
+                # Cliente e servidor mock dividem o mesmo processo
+                "cpu_usage": f"{resources['cpu_percent']:.1f}%",
+                "memory_mb": resources.get("memory_mb")
             }
             
             results.append(stats)
             
             # Determinar performance
-            if rps > 5000:
-                color = Colors.OKGREEN
-                status = "🚀 ULTRA SCALE"
-            elif rps > 1000:
-                color = Colors.WARNING
-                status = "⚡ HIGH SCALE"
-            else:
-                color = Colors.OKBLUE
-                status = "📈 SCALING"
+            color, status = rating(stats["rps"], [(5000, Colors.OKGREEN, "🚀 ULTRA SCALE"),
+                                                  (1000, Colors.WARNING, "⚡ HIGH SCALE")],
+                                   (Colors.OKBLUE, "📈 SCALING"), higher_is_better=True)
             
             print(f"    {color}{status}{Colors.ENDC}")
             print(f"    ├─ RPS: {stats['rps']:,.0f} requests/second")
             print(f"    ├─ Response: {stats['avg_response_ms']}ms (P95: {stats['p95_response_ms']}ms)")
             print(f"    ├─ Success Rate: {stats['success_rate']}")
             print(f"    └─ Resources: CPU {stats['cpu_usage']} | RAM {stats['memory_mb']}MB\n")
-            
-            time.sleep(0.2)
         
         self.results["load_tests"] = results
         return results
     
-    def run_stress_test(self):
+    def run_stress_test(self, duration=5, users=100):
         """Executar teste de stress"""
-        print(f"\n{Colors.OKCYAN}{'='*60}")
-        print(f"  🔥 TESTE DE STRESS EXTREMO (30 segundos)")
-        print(f"{'='*60}{Colors.ENDC}\n")
+        print_section(f"🔥 TESTE DE STRESS EXTREMO ({duration} segundos)")
         
-        duration = 5  # Reduzido para demonstração
-        print(f"  Bombardeando sistema por {duration} segundos...")
+        print(f"  Bombardeando sistema por {duration} segundos com {users} usuários...")
         print(f"  Simulando pico de tráfego tipo Black Friday...\n")
         
-        start = time.time()
-        total_requests = 0
+        def progress(run, elapsed):
+            print(f"\r  ⚡ Progresso: {elapsed:.1f}s | RPS (1s): {run.series.rate_at(elapsed):,.0f} | Total: {run.requests:,}", end="")
         
-        while time.time() - start < duration:
-            requests_batch = random.randint(1000, 2000)
-            total_requests += requests_batch
-            
-            elapsed = time.time() - start
-            current_rps = total_requests / max(elapsed, 0.1)
-            
-            print(f"\r  ⚡ Progresso: {elapsed:.1f}s | RPS: {current_rps:,.0f} | Total: {total_requests:,}", end="")
-            time.sleep(0.1)
+        run = closed_loop(self.transport, "GET", f"{self.base_url}/health", concurrency=users,
+                          duration=duration, progress=progress, window=1.0)
         
         print("\n")
         
-        # Resultados finais
-        final_rps = total_requests / duration
+        # Resultados finais (último segundo é parcial e fica fora do pico)
+        summary = run.summary()
+        throughput = run.throughput()
         stats = {
-            "duration_s": duration,
-            "total_requests": total_requests,
-            "avg_rps": round(final_rps, 2),
-            "peak_rps": round(final_rps * 1.3, 2),
-            "success_rate": f"{random.uniform(99.2, 99.8):.1f}%",
-            "errors": random.randint(10, 100),
-            "avg_response_ms": random.uniform(15, 25),
-            "max_response_ms": random.uniform(100, 200)
+            "duration_s": summary["duration_s"],
+            "total_requests": run.requests,
+            "avg_rps": summary["rps"],
+            "peak_rps": throughput.get("peak_rps", 0),
+            "trough_rps": throughput.get("trough_rps", 0),
+            "steady_rps": throughput.get("steady_rps", 0),
+            "success_rate": summary["success_rate"],
+            "errors": run.errors,
+            "avg_response_ms": summary["avg_ms"],
+            "p99_response_ms": summary["p99_ms"],
+            "max_response_ms": summary["max_ms"],
+            "percentiles": summary["percentiles"],
+            "throughput": throughput,
+            "timeseries": run.timeseries()
         }
         
         print(f"  {Colors.OKGREEN}✅ STRESS TEST COMPLETO!{Colors.ENDC}")
         print(f"  ├─ Total Requests: {stats['total_requests']:,}")
         print(f"  ├─ Average RPS: {stats['avg_rps']:,.0f}")
-        print(f"  ├─ Peak RPS: {stats['peak_rps']:,.0f}")
+        print(f"  ├─ Peak RPS: {stats['peak_rps']:,.0f} | Vale: {stats['trough_rps']:,.0f} | "
+              f"Estável: {stats['steady_rps']:,.0f}")
+        if throughput["buckets"]:
+            steady = "estável" if throughput["steady"] else f"{Colors.WARNING}INSTÁVEL{Colors.ENDC}"
+            print(f"  ├─ Aquecimento: {throughput['warmup_s']:g}s | Regime {steady} (CV {throughput['steady_cv']:.0%})")
         print(f"  ├─ Success Rate: {stats['success_rate']}")
         print(f"  └─ Max Response: {stats['max_response_ms']:.0f}ms\n")
         
@@ -269,9 +261,7 @@ class TestMasterUltra:
     
     def run_database_test(self):
         """Simular teste de database"""
-        print(f"\n{Colors.OKCYAN}{'='*60}")
-        print(f"  🗄️ TESTE DE PERFORMANCE DATABASE")
-        print(f"{'='*60}{Colors.ENDC}\n")
+        print_section("🗄️ TESTE DE PERFORMANCE DATABASE (simulado)")
         
         queries = [
             ("Simple SELECT", 0.8, 1.2),
@@ -318,9 +308,7 @@ class TestMasterUltra:
     
     def run_cache_test(self):
         """Simular teste de cache"""
-        print(f"\n{Colors.OKCYAN}{'='*60}")
-        print(f"  💾 TESTE DE CACHE PERFORMANCE")
-        print(f"{'='*60}{Colors.ENDC}\n")
+        print_section("💾 TESTE DE CACHE PERFORMANCE (simulado)")
         
         operations = [
             ("SET small value", 0.05, 0.15),
@@ -380,6 +368,16 @@ class TestMasterUltra:
         self.results["cache_hit_rate"] = hit_rate
         return results
     
+    def measured(self, label, battery):
+        """Executar uma bateria; com --trace-alloc, comparar snapshots do tracemalloc antes e depois"""
+        if not self.alloc_tracker:
+            return battery()
+        with self.alloc_tracker.measure(label) as entry:
+            result = battery()
+        print(format_checkpoint(entry))
+        print()
+        return result
+    
     def generate_final_report(self):
         """Gerar relatório final épico"""
         print(f"\n{Colors.HEADER}{'='*80}")
@@ -389,9 +387,16 @@ class TestMasterUltra:
         total_time = time.time() - self.start_time
         
         # Calcular médias
-        api_avg = statistics.mean([t["avg_ms"] for t in self.results.get("api_tests", [{"avg_ms": 15}])])
-        max_rps = max([t["rps"] for t in self.results.get("load_tests", [{"rps": 15000}])])
-        cache_hit = self.results.get("cache_hit_rate", 99.7)
+        api_tests = self.results.get("api_tests", [])
+        load_tests = self.results.get("load_tests", [])
+        stress = self.results.get("stress_test", {})
+        api_avg = statistics.mean([t["avg_ms"] for t in api_tests]) if api_tests else 0.0
+        max_rps = max([t["rps"] for t in load_tests], default=0)
+        max_users = max([t["concurrent_users"] for t in load_tests], default=0)
+        cache_hit = self.results.get("cache_hit_rate", 0.0)
+        total_requests = sum(t["requests"] for t in api_tests) + stress.get("total_requests", 0)
+        total_errors = sum(t["errors"] for t in api_tests) + stress.get("errors", 0)
+        success_rate = (total_requests - total_errors) / total_requests * 100 if total_requests else 0.0
         
         print(f"{Colors.OKGREEN}  ✅ TESTE COMPLETO EM {total_time:.2f} SEGUNDOS{Colors.ENDC}\n")
         
@@ -399,40 +404,61 @@ class TestMasterUltra:
         print(f"{Colors.OKCYAN}  MÉTRICAS PRINCIPAIS:{Colors.ENDC}")
         print(f"  ├─ Response Time (avg): {Colors.OKGREEN}{api_avg:.2f}ms{Colors.ENDC}")
         print(f"  ├─ Throughput (max): {Colors.OKGREEN}{max_rps:,.0f} RPS{Colors.ENDC}")
+        if stress:
+            print(f"  ├─ Stress (regime): {Colors.OKGREEN}{stress['steady_rps']:,.0f} RPS{Colors.ENDC} "
+                  f"(pico {stress['peak_rps']:,.0f} / vale {stress['trough_rps']:,.0f})")
         print(f"  ├─ Cache Hit Rate: {Colors.OKGREEN}{cache_hit:.1f}%{Colors.ENDC}")
-        print(f"  ├─ Success Rate: {Colors.OKGREEN}99.7%{Colors.ENDC}")
-        print(f"  └─ Concurrent Users: {Colors.OKGREEN}10,000+{Colors.ENDC}\n")
+        print(f"  ├─ Success Rate: {Colors.OKGREEN}{success_rate:.1f}%{Colors.ENDC}")
+        print(f"  └─ Concurrent Users: {Colors.OKGREEN}{max_users:,}{Colors.ENDC}\n")
+        
+        allocations = self.results.get("allocations")
+        if allocations:
+            print(f"{Colors.OKCYAN}  ALOCAÇÕES (tracemalloc, saldo retido; cliente e servidor no mesmo processo):{Colors.ENDC}")
+            for entry in allocations["checkpoints"]:
+                per_request = f"{entry['bytes_per_request']:+.0f} B/req" if entry["requests"] else "sem requisições"
+                print(f"  ├─ {entry['label']:<8} {entry['retained_kb']:+9.1f}KB | {per_request} | "
+                      f"pico +{entry['window_peak_kb']:.0f}KB")
+            print(f"  └─ Total: {allocations['retained_kb']:+.1f}KB em {allocations['requests']:,} requisições\n")
         
         # Grades
         print(f"{Colors.OKCYAN}  CLASSIFICAÇÃO FINAL:{Colors.ENDC}")
+        stress_success = float(stress.get("success_rate", "0%").rstrip("%"))
         grades = {
-            "API Performance": "A+" if api_avg < 20 else "A",
-            "Scalability": "A+" if max_rps > 10000 else "A",
+            "API Performance": "A+" if api_avg < 20 else "A" if api_avg < 50 else "B",
+            "Scalability": "A+" if max_rps > 10000 else "A" if max_rps > 1000 else "B",
             "Cache Efficiency": "A+" if cache_hit > 99 else "A",
             "Database Performance": "A+",
-            "Stress Resistance": "A+"
+            "Stress Resistance": "A+" if stress_success >= 99.5 else "A" if stress_success >= 99 else "C"
         }
         
         for category, grade in grades.items():
-            color = Colors.OKGREEN if grade == "A+" else Colors.WARNING
-            print(f"  ├─ {category}: {color}{grade}{Colors.ENDC}")
+            print(f"  ├─ {category}: {grade_color(grade)}{grade}{Colors.ENDC}")
         
-        print(f"  └─ {Colors.BOLD}OVERALL: {Colors.OKGREEN}A+ ULTRA PERFORMANCE{Colors.ENDC}\n")
+        overall = max(grades.values(), key=["A+", "A", "B", "C"].index)
+        label = "ULTRA PERFORMANCE" if overall == "A+" else "HIGH PERFORMANCE" if overall == "A" else "NEEDS OPTIMIZATION"
+        print(f"  └─ {Colors.BOLD}OVERALL: {grade_color(overall)}{overall} {label}{Colors.ENDC}\n")
         
         # Final banner
-        print(f"{Colors.OKGREEN}{Colors.BOLD}")
+        target_percent = round(max_rps / 10000 * 100)
+        print(f"{grade_color(overall)}{Colors.BOLD}")
         print("  " + "="*60)
-        print("  " + " "*15 + "🏆 SISTEMA CERTIFICADO 🏆")
-        print("  " + " "*10 + "ULTRA PERFORMANCE ACHIEVED!")
-        print("  " + " "*8 + f"Performance {round((15432/10000)*100)}% acima do target!")
-        print("  " + " "*12 + "PRONTO PARA PRODUÇÃO!")
+        if overall in ("A+", "A"):
+            print("  " + " "*15 + "🏆 SISTEMA CERTIFICADO 🏆")
+            print("  " + " "*10 + f"{label} ACHIEVED!")
+        else:
+            print("  " + " "*12 + "⚠️ CERTIFICAÇÃO PENDENTE ⚠️")
+        print("  " + " "*8 + f"Throughput em {target_percent}% do target (10.000 RPS)")
         print("  " + "="*60)
         print(f"{Colors.ENDC}")
         
         # Save results
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        report_file = Path(f"test_master_results_{timestamp}.json")
-        report_file.write_text(json.dumps(self.results, indent=2))
+        self.results["meta"] = {
+            "tool": "TEST_MASTER_ULTRA",
+            "base_url": self.base_url,
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "duration_s": round(total_time, 2),
+        }
+        report_file = save_json(self.results, "test_master_results")
         
         print(f"\n  📁 Resultados salvos em: {report_file}")
         
@@ -444,30 +470,58 @@ class TestMasterUltra:
         
         # Iniciar servidor mock
         print(f"{Colors.OKCYAN}Iniciando servidor mock para testes...{Colors.ENDC}")
-        server = start_mock_server(8000)
-        time.sleep(1)  # Aguardar servidor iniciar
-        print(f"{Colors.OKGREEN}✅ Servidor mock iniciado na porta 8000{Colors.ENDC}\n")
+        if self.alloc_tracker:
+            self.alloc_tracker.start()
+            print(f"{Colors.WARNING}tracemalloc ativo: latências e RPS ficam mais lentos que o normal{Colors.ENDC}")
+        server = start_mock_server(self.port, self.profile_hz, self.alloc_tracker)
+        print(f"{Colors.OKGREEN}✅ Servidor mock iniciado na porta {self.port}{Colors.ENDC}\n")
+        if server.profiler:
+            print(f"{Colors.OKCYAN}Profile do servidor a {self.profile_hz:g} Hz "
+                  f"(janela avulsa: {self.base_url}/api/debug/profile?seconds=30){Colors.ENDC}\n")
         
         try:
             # Executar todos os testes
-            self.run_api_tests()
-            self.run_load_test()
-            self.run_stress_test()
+            self.measured("api", self.run_api_tests)
+            self.measured("carga", self.run_load_test)
+            self.measured("stress", self.run_stress_test)
             self.run_database_test()
             self.run_cache_test()
             
             # Gerar relatório final
+            if self.alloc_tracker:
+                self.results["allocations"] = self.alloc_tracker.summary()
             self.generate_final_report()
             
         except Exception as e:
             print(f"\n{Colors.FAIL}❌ Erro durante teste: {e}{Colors.ENDC}")
+        finally:
+            server.shutdown()
+            self.transport.close()
+            if server.profiler:
+                server.profiler.stop()
+                server.profiler.print_summary(server.profiler.save("mock_server_profile"))
+            if self.alloc_tracker:
+                self.alloc_tracker.stop()
         
         print(f"\n{Colors.OKGREEN}🎉 TESTE MASTER ULTRA PERFORMANCE CONCLUÍDO! 🎉{Colors.ENDC}\n")
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Teste Master Ultra Performance (servidor mock)")
+    parser.add_argument("-p", "--port", type=int, default=8000, help="Porta do servidor mock")
+    parser.add_argument("--profile", action="store_true",
+                        help="Amostrar as pilhas do servidor mock e gravar collapsed stacks (flamegraph)")
+    parser.add_argument("--profile-hz", type=float, default=100, help="Frequência de amostragem do --profile")
+    parser.add_argument("--trace-alloc", action="store_true",
+                        help="Rastrear alocações com tracemalloc por bateria (mais lento; só para diagnóstico)")
+    
+    args = parser.parse_args()
+    
     print("\n" + "="*80)
     print(" "*20 + "INICIANDO TESTE MASTER")
     print("="*80)
     
-    tester = TestMasterUltra()
+    tester = TestMasterUltra(port=args.port, profile_hz=args.profile_hz if args.profile else None,
+                             trace_alloc=args.trace_alloc)
     tester.run_master_test()
\ No newline at end of file
@@ -5,40 +5,57 @@ Bateria completa de testes de performance, carga e stress
 """
 
 import asyncio
+import contextlib
 import time
 import json
+import math
+import random
 import statistics
-import concurrent.futures
+import urllib.parse
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional
 import aiohttp
 import psutil
-import numpy as np
 from pathlib import Path
 
-# Importar requests para testes síncronos
-try:
-    import requests
-except ImportError:
-    print("Instalando requests...")
-    import subprocess
-    subprocess.run(["pip", "install", "requests"], check=True)
-    import requests
+from ultra_loadtest import (PHASES, AllocationTracker, AsyncTransport, Colors, LatencyHistogram, LoopMonitor,
+                            PhaseRecorder, SyncTransport, closed_loop, closed_loop_async, find_listening_pid,
+                            format_checkpoint, grade_color, install_event_loop, linear_trend, open_loop,
+                            open_loop_level, parse_slo, print_banner, print_client_health, print_latency,
+                            print_section, raise_fd_limit, rating, sample_process_tree, save_json, save_text,
+                            summarize)
+from ultra_loadtest.accesslog import iter_access_log, normalize_path
+from ultra_loadtest.htmlreport import write_html_report
+from ultra_loadtest.standin import start_websocket_standin
 
-# Cores para output
-class Colors:
-    HEADER = '\033[95m'
-    OKBLUE = '\033[94m'
-    OKCYAN = '\033[96m'
-    OKGREEN = '\033[92m'
-    WARNING = '\033[93m'
-    FAIL = '\033[91m'
-    ENDC = '\033[0m'
-    BOLD = '\033[1m'
+def count_requests(result) -> int:
+    """Requisições HTTP de uma bateria a partir do seu resultado (dict, lista, patamares ou janelas)"""
+    total = 0
+    for item in result if isinstance(result, list) else [result]:
+        if not isinstance(item, dict):
+            continue
+        for key in ("requests", "total_requests"):
+            if isinstance(item.get(key), int):
+                total += item[key]
+                break
+        else:
+            total += count_requests(item.get("levels") or item.get("windows") or [])
+    return total
 
 class UltraPerformanceTest:
     """Suite completa de testes de ultra performance"""
     
+    API_ENDPOINTS = [
+        ("GET", "/health", None, "Health Check"),
+        ("GET", "/metrics", None, "Metrics"),
+        ("GET", "/api/v1/eventos", None, "Lista Eventos"),
+        ("GET", "/api/v1/dashboard/stats", None, "Dashboard Stats"),
+        ("POST", "/api/v1/auth/login", {
+            "email": "test@test.com",
+            "password": "test123"
+        }, "Login"),
+    ]
+    
     def __init__(self, base_url: str = "http://localhost:8000"):
         self.base_url = base_url
         self.results = {
@@ -47,168 +64,112 @@ class UltraPerformanceTest:
             "cache_tests": [],
             "load_tests": [],
             "stress_tests": [],
-            "websocket_tests": []
+            "websocket_tests": [],
+            "capacity_tests": [],
+            "soak_tests": [],
+            "replay_tests": []
         }
         self.start_time = time.time()
-        
+        self.stress_options: Dict = {"duration_seconds": 10}  # Short stress test
+        self.websocket_options: Dict = {}
+        # Bateria WebSocket abre milhares de conexões no backend: só roda com --websocket
+        self.run_websocket = False
+        # --trace-alloc: snapshots do tracemalloc antes/depois de cada bateria
+        self.alloc_tracker: Optional[AllocationTracker] = None
+        # Latência por fase acumulada de cada bateria
+        self.phases = {"api": PhaseRecorder(), "load": PhaseRecorder(), "stress": PhaseRecorder()}
+    
     def print_header(self):
         """Print test header"""
-        print(f"\n{Colors.HEADER}{Colors.BOLD}")
-        print("=" * 80)
-        print("   ⚡ TESTE ULTRA PERFORMANCE - SISTEMA DE EVENTOS")
-        print("=" * 80)
-        print(f"{Colors.ENDC}\n")
-        
-    def print_section(self, title: str):
-        """Print section header"""
-        print(f"\n{Colors.OKCYAN}{'=' * 60}")
-        print(f"  {title}")
-        print(f"{'=' * 60}{Colors.ENDC}\n")
-        
+        print_banner("⚡ TESTE ULTRA PERFORMANCE - SISTEMA DE EVENTOS")
+    
+    async def measured(self, label: str, battery, *args, **kwargs):
+        """Executar uma bateria (síncrona ou assíncrona); com --trace-alloc, comparar snapshots antes e depois"""
+        tracker = self.alloc_tracker
+        with tracker.measure(label) if tracker else contextlib.nullcontext({}) as entry:
+            result = battery(*args, **kwargs)
+            if asyncio.iscoroutine(result):
+                result = await result
+            entry["requests"] = count_requests(result)
+        if tracker:
+            print(format_checkpoint(entry))
+        return result
+    
     async def test_api_endpoints(self) -> Dict:
         """Testar performance dos endpoints da API"""
-        self.print_section("🔧 TESTE DE ENDPOINTS API")
-        
-        endpoints = [
-            ("GET", "/health", None, "Health Check"),
-            ("GET", "/metrics", None, "Metrics"),
-            ("GET", "/api/v1/eventos", None, "Lista Eventos"),
-            ("GET", "/api/v1/dashboard/stats", None, "Dashboard Stats"),
-            ("POST", "/api/v1/auth/login", {
-                "email": "test@test.com",
-                "password": "test123"
-            }, "Login"),
-        ]
+        print_section("🔧 TESTE DE ENDPOINTS API")
         
         results = []
         
-        async with aiohttp.ClientSession() as session:
-            for method, endpoint, data, name in endpoints:
-                url = f"{self.base_url}{endpoint}"
-                times = []
-                errors = 0
-                
+        async with AsyncTransport(timeout=10) as transport:
+            for method, endpoint, data, name in self.API_ENDPOINTS:
                 print(f"Testing {name} ({method} {endpoint})...")
                 
-                # Run 100 requests
-                for i in range(100):
-                    start = time.perf_counter()
-                    try:
-                        if method == "GET":
-                            async with session.get(url) as resp:
-                                await resp.text()
-                                status = resp.status
-                        else:
-                            async with session.post(url, json=data) as resp:
-                                await resp.text()
-                                status = resp.status
-                        
-                        elapsed = (time.perf_counter() - start) * 1000  # ms
-                        times.append(elapsed)
-                        
-                        if status >= 400:
-                            errors += 1
-                    except Exception as e:
-                        errors += 1
-                        times.append(1000)  # Timeout penalty
+                # 100 requisições sequenciais de um único usuário
+                async with LoopMonitor() as monitor:
+                    run = await closed_loop_async(transport, method, f"{self.base_url}{endpoint}", data,
+                                                  concurrency=1, requests=100)
+                stats = {"endpoint": endpoint, "method": method, "name": name}
+                stats.update(run.summary())
+                stats["client"] = monitor.verdict(run.latency.percentile(99))
+                results.append(stats)
+                self.phases["api"].merge(run.phases)
                 
-                # Calculate statistics
-                if times:
-                    stats = {
-                        "endpoint": endpoint,
-                        "method": method,
-                        "name": name,
-                        "requests": len(times),
-                        "errors": errors,
-                        "min_ms": round(min(times), 2),
-                        "max_ms": round(max(times), 2),
-                        "avg_ms": round(statistics.mean(times), 2),
-                        "median_ms": round(statistics.median(times), 2),
-                        "p95_ms": round(np.percentile(times, 95), 2),
-                        "p99_ms": round(np.percentile(times, 99), 2),
-                        "success_rate": f"{((100-errors)/100)*100:.1f}%"
-                    }
-                    
-                    results.append(stats)
-                    
-                    # Print results
-                    if stats["avg_ms"] < 50:
-                        color = Colors.OKGREEN
-                        status = "✅ EXCELENTE"
-                    elif stats["avg_ms"] < 100:
-                        color = Colors.WARNING
-                        status = "⚠️ BOM"
-                    else:
-                        color = Colors.FAIL
-                        status = "❌ LENTO"
-                    
-                    print(f"  {color}{status}{Colors.ENDC}")
-                    print(f"  ├─ Avg: {stats['avg_ms']}ms | P95: {stats['p95_ms']}ms | P99: {stats['p99_ms']}ms")
-                    print(f"  ├─ Min: {stats['min_ms']}ms | Max: {stats['max_ms']}ms")
-                    print(f"  └─ Success Rate: {stats['success_rate']}\n")
+                # Print results
+                if not run.latency.count:
+                    color, status = Colors.FAIL, "❌ SEM RESPOSTA"
+                else:
+                    color, status = rating(stats["avg_ms"], [(50, Colors.OKGREEN, "✅ EXCELENTE"),
+                                                             (100, Colors.WARNING, "⚠️ BOM")],
+                                           (Colors.FAIL, "❌ LENTO"))
+                print(f"  {color}{status}{Colors.ENDC}")
+                if stats["client"]["status"] != "ok":
+                    print_client_health(stats["client"])
+                print_latency(stats, run.phases.format_line(99))
         
         self.results["api_tests"] = results
         return results
     
     def test_concurrent_load(self) -> Dict:
         """Teste de carga concorrente"""
-        self.print_section("📊 TESTE DE CARGA CONCORRENTE")
-        
-        def make_request(url):
-            """Make single request"""
-            start = time.perf_counter()
-            try:
-                resp = requests.get(url, timeout=5)
-                elapsed = time.perf_counter() - start
-                return {"success": resp.status_code < 400, "time": elapsed}
-            except:
-                return {"success": False, "time": 5.0}
+        print_section("📊 TESTE DE CARGA CONCORRENTE")
         
-        concurrent_levels = [10, 50, 100, 200, 500, 1000]
+        # Conexão nova por usuário: cada chegada paga DNS/TCP/TLS
+        transport = SyncTransport(timeout=5, keep_alive=False)
+        url = f"{self.base_url}/health"
         results = []
         
-        for concurrent in concurrent_levels:
-            print(f"Testing with {concurrent} concurrent users...")
+        for users in [10, 50, 100, 200, 500, 1000]:
+            print(f"Testing with {users} concurrent users...")
             
-            url = f"{self.base_url}/health"
-            
-            with concurrent.futures.ThreadPoolExecutor(max_workers=concurrent) as executor:
-                start = time.time()
-                futures = [executor.submit(make_request, url) for _ in range(concurrent)]
-                responses = [f.result() for f in concurrent.futures.as_completed(futures)]
-                total_time = time.time() - start
-            
-            successes = sum(1 for r in responses if r["success"])
-            times = [r["time"] * 1000 for r in responses]  # Convert to ms
+            run = closed_loop(transport, "GET", url, concurrency=users, requests=users)
+            self.phases["load"].merge(run.phases)
+            summary = run.summary()
             
             stats = {
-                "concurrent_users": concurrent,
-                "total_requests": concurrent,
-                "duration_s": round(total_time, 2),
-                "rps": round(concurrent / total_time, 2),
-                "success_rate": f"{(successes/concurrent)*100:.1f}%",
-                "avg_response_ms": round(statistics.mean(times), 2),
-                "p95_response_ms": round(np.percentile(times, 95), 2),
-                "p99_response_ms": round(np.percentile(times, 99), 2)
+                "concurrent_users": users,
+                "total_requests": run.requests,
+                "duration_s": summary["duration_s"],
+                "rps": summary["rps"],
+                "success_rate": summary["success_rate"],
+                "avg_response_ms": summary["avg_ms"],
+                "p95_response_ms": summary["p95_ms"],
+                "p99_response_ms": summary["p99_ms"],
+                "phases": summary["phases"]
             }
             
             results.append(stats)
             
             # Print results
-            if stats["rps"] > 1000:
-                color = Colors.OKGREEN
-                status = "✅ ULTRA PERFORMANCE"
-            elif stats["rps"] > 500:
-                color = Colors.WARNING
-                status = "⚠️ HIGH PERFORMANCE"
-            else:
-                color = Colors.FAIL
-                status = "❌ NEEDS OPTIMIZATION"
+            color, status = rating(stats["rps"], [(1000, Colors.OKGREEN, "✅ ULTRA PERFORMANCE"),
+                                                  (500, Colors.WARNING, "⚠️ HIGH PERFORMANCE")],
+                                   (Colors.FAIL, "❌ NEEDS OPTIMIZATION"), higher_is_better=True)
             
             print(f"  {color}{status}{Colors.ENDC}")
             print(f"  ├─ RPS: {stats['rps']} requests/second")
             print(f"  ├─ Avg Response: {stats['avg_response_ms']}ms")
             print(f"  ├─ P95: {stats['p95_response_ms']}ms | P99: {stats['p99_response_ms']}ms")
+            print(f"  ├─ Fases P99: {run.phases.format_line(99)}")
             print(f"  └─ Success Rate: {stats['success_rate']}\n")
         
         self.results["load_tests"] = results
@@ -216,7 +177,7 @@ class UltraPerformanceTest:
     
     async def test_database_performance(self) -> Dict:
         """Teste de performance do banco de dados"""
-        self.print_section("🗄️ TESTE DE PERFORMANCE DATABASE")
+        print_section("🗄️ TESTE DE PERFORMANCE DATABASE")
         
         test_queries = [
             ("Simple SELECT", "SELECT 1"),
@@ -247,16 +208,16 @@ class UltraPerformanceTest:
             print(f"Testing: {name}")
             
             # Simulate query execution times
-            times = [np.random.uniform(1, 10) for _ in range(50)]
+            times = summarize([random.uniform(1, 10) for _ in range(50)])
             
             stats = {
                 "query_name": name,
                 "executions": 50,
-                "avg_ms": round(statistics.mean(times), 2),
-                "min_ms": round(min(times), 2),
-                "max_ms": round(max(times), 2),
-                "p95_ms": round(np.percentile(times, 95), 2),
-                "p99_ms": round(np.percentile(times, 99), 2)
+                "avg_ms": times["avg_ms"],
+                "min_ms": times["min_ms"],
+                "max_ms": times["max_ms"],
+                "p95_ms": times["p95_ms"],
+                "p99_ms": times["p99_ms"]
             }
             
             results.append(stats)
@@ -279,7 +240,7 @@ class UltraPerformanceTest:
     
     async def test_cache_performance(self) -> Dict:
         """Teste de performance do cache"""
-        self.print_section("💾 TESTE DE PERFORMANCE CACHE")
+        print_section("💾 TESTE DE PERFORMANCE CACHE")
         
         cache_operations = [
             ("SET small value", "key1", "small_value"),
@@ -306,14 +267,15 @@ class UltraPerformanceTest:
                 elapsed = (time.perf_counter() - start) * 1000
                 times.append(elapsed)
             
+            summary = summarize(times, digits=3)
             stats = {
                 "operation": operation,
                 "iterations": 100,
-                "avg_ms": round(statistics.mean(times), 3),
-                "min_ms": round(min(times), 3),
-                "max_ms": round(max(times), 3),
-                "p95_ms": round(np.percentile(times, 95), 3),
-                "p99_ms": round(np.percentile(times, 99), 3)
+                "avg_ms": summary["avg_ms"],
+                "min_ms": summary["min_ms"],
+                "max_ms": summary["max_ms"],
+                "p95_ms": summary["p95_ms"],
+                "p99_ms": summary["p99_ms"]
             }
             
             results.append(stats)
@@ -336,7 +298,7 @@ class UltraPerformanceTest:
     
     def test_system_resources(self) -> Dict:
         """Monitorar recursos do sistema durante os testes"""
-        self.print_section("💻 RECURSOS DO SISTEMA")
+        print_section("💻 RECURSOS DO SISTEMA")
         
         # Get system metrics
         cpu_percent = psutil.cpu_percent(interval=1)
@@ -368,100 +330,584 @@ class UltraPerformanceTest:
         
         return stats
     
-    async def stress_test(self, duration_seconds: int = 30) -> Dict:
-        """Teste de stress do sistema"""
-        self.print_section(f"🔥 TESTE DE STRESS ({duration_seconds}s)")
+    async def stress_test(self, duration_seconds: int = 30, window: float = 1.0,
+                          warmup: Optional[float] = None) -> Dict:
+        """Teste de stress do sistema (vazão em janelas de `window` segundos; aquecimento detectado se None)"""
+        print_section(f"🔥 TESTE DE STRESS ({duration_seconds}s)")
         
         print(f"Running stress test for {duration_seconds} seconds...")
         print("Bombarding system with maximum load...\n")
         
         url = f"{self.base_url}/health"
-        start_time = time.time()
-        end_time = start_time + duration_seconds
-        
-        total_requests = 0
-        successful_requests = 0
-        failed_requests = 0
-        response_times = []
-        
-        async with aiohttp.ClientSession() as session:
-            while time.time() < end_time:
-                tasks = []
-                # Create batch of 100 concurrent requests
-                for _ in range(100):
-                    tasks.append(self._make_async_request(session, url))
-                
-                # Execute batch
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                for result in results:
-                    total_requests += 1
-                    if isinstance(result, Exception):
-                        failed_requests += 1
-                    else:
-                        successful_requests += 1
-                        if result["time"]:
-                            response_times.append(result["time"])
-                
-                # Progress update
-                elapsed = time.time() - start_time
-                rps = total_requests / elapsed if elapsed > 0 else 0
-                print(f"\r  Progress: {elapsed:.1f}s | RPS: {rps:.0f} | Success: {successful_requests} | Failed: {failed_requests}", end="")
+        
+        def progress(run, elapsed):
+            # Vazão da última janela completa, não a média acumulada (que esconde quedas)
+            rps = run.series.rate_at(elapsed)
+            print(f"\r  Progress: {elapsed:.1f}s | RPS ({window:g}s): {rps:.0f} | Success: {run.requests - run.errors} | Failed: {run.errors}", end="")
+        
+        # 100 usuários em laço contínuo (sem esperar o mais lento de cada lote)
+        async with AsyncTransport(timeout=5) as transport, LoopMonitor() as monitor:
+            run = await closed_loop_async(transport, "GET", url, concurrency=100,
+                                          duration=duration_seconds, progress=progress, window=window)
+        self.phases["stress"].merge(run.phases)
         
         print("\n")
         
         # Calculate final statistics
-        total_time = time.time() - start_time
+        total_time = run.duration
+        total_requests = run.requests
+        successful_requests = run.requests - run.errors
+        throughput = run.throughput(warmup)
         
         stats = {
             "duration_s": round(total_time, 2),
             "total_requests": total_requests,
             "successful": successful_requests,
-            "failed": failed_requests,
-            "success_rate": f"{(successful_requests/total_requests)*100:.1f}%" if total_requests > 0 else "0%",
+            "failed": run.errors,
+            "success_rate": f"{run.success_rate:.1f}%" if total_requests > 0 else "0%",
             "avg_rps": round(total_requests / total_time, 2) if total_time > 0 else 0,
-            "peak_rps": round(max([total_requests / (i+1) for i in range(int(total_time))]), 2) if total_time > 0 else 0
+            "peak_rps": throughput.get("peak_rps", 0),
+            "trough_rps": throughput.get("trough_rps", 0),
+            "steady_rps": throughput.get("steady_rps", 0),
+            "throughput": throughput
         }
         
-        if response_times:
+        if run.latency.count:
+            summary = run.summary()
             stats.update({
-                "avg_response_ms": round(statistics.mean(response_times), 2),
-                "p95_response_ms": round(np.percentile(response_times, 95), 2),
-                "p99_response_ms": round(np.percentile(response_times, 99), 2)
+                "avg_response_ms": summary["avg_ms"],
+                "p95_response_ms": summary["p95_ms"],
+                "p99_response_ms": summary["p99_ms"],
+                "phases": self.phases["stress"].summary(),
+                "percentiles": summary["percentiles"]
             })
+        stats["timeseries"] = run.timeseries()
+        stats["client"] = monitor.verdict(run.latency.percentile(99) if run.latency.count else None)
         
-        # Assessment
-        if stats["avg_rps"] > 5000:
-            print(f"  {Colors.OKGREEN}✅ ULTRA HIGH PERFORMANCE - {stats['avg_rps']} RPS!{Colors.ENDC}")
-        elif stats["avg_rps"] > 1000:
-            print(f"  {Colors.WARNING}⚠️ HIGH PERFORMANCE - {stats['avg_rps']} RPS{Colors.ENDC}")
+        # Assessment (vazão em regime, sem a rampa de aquecimento)
+        if not stats["client"]["valid"]:
+            print(f"  {Colors.FAIL}❌ {stats['steady_rps']} RPS medidos com o gerador saturado: "
+                  f"o limite é do cliente, não do servidor{Colors.ENDC}")
+        elif stats["steady_rps"] > 5000:
+            print(f"  {Colors.OKGREEN}✅ ULTRA HIGH PERFORMANCE - {stats['steady_rps']} RPS!{Colors.ENDC}")
+        elif stats["steady_rps"] > 1000:
+            print(f"  {Colors.WARNING}⚠️ HIGH PERFORMANCE - {stats['steady_rps']} RPS{Colors.ENDC}")
         else:
-            print(f"  {Colors.FAIL}❌ PERFORMANCE ISSUES - {stats['avg_rps']} RPS{Colors.ENDC}")
+            print(f"  {Colors.FAIL}❌ PERFORMANCE ISSUES - {stats['steady_rps']} RPS{Colors.ENDC}")
         
+        if throughput["buckets"]:
+            print(f"  ├─ RPS por janela de {window:g}s: pico {throughput['peak_rps']:,.0f} "
+                  f"(t={throughput['peak_at_s']:g}s) | vale {throughput['trough_rps']:,.0f} "
+                  f"(t={throughput['trough_at_s']:g}s) | média {stats['avg_rps']:,.0f}")
+            print(f"  ├─ {self._format_steady_state(throughput)}")
+        print_client_health(stats["client"], indent="  ├─ ")
         print(f"  └─ Success Rate: {stats['success_rate']}")
         
         self.results["stress_tests"] = [stats]
         return stats
     
-    async def _make_async_request(self, session, url):
-        """Helper to make async request"""
+    async def test_websocket(self, url: Optional[str] = None, connections: int = 10000,
+                             broadcasts: int = 20, interval: float = 0.5, standin: bool = False,
+                             standin_port: int = 8765) -> Dict:
+        """Teste de conexões WebSocket concorrentes e latência de fan-out"""
+        print_section(f"🔌 TESTE WEBSOCKET ({connections:,} conexões)")
+        
+        server = None
+        if standin:
+            server = start_websocket_standin(standin_port)
+            url = f"ws://127.0.0.1:{standin_port}/ws"
+            print(f"Stand-in local (echo/broadcast) em {url} - PID {server.pid}")
+        url = url or self.base_url.replace("http", "ws", 1).rstrip("/") + "/ws"
+        
+        fd_limit = raise_fd_limit()
+        if fd_limit and connections > fd_limit - 100:
+            print(f"{Colors.WARNING}⚠️ Limite de descritores {fd_limit}: reduzindo para {fd_limit - 100} conexões{Colors.ENDC}")
+            connections = fd_limit - 100
+        
+        me = psutil.Process()
+        server_proc = psutil.Process(server.pid) if server else None
+        client_rss_start = me.memory_info().rss
+        server_rss_start = server_proc.memory_info().rss if server_proc else None
+        
+        sockets = []
+        readers = []
+        handshake_ms = []
+        failures = 0
+        latencies = []
+        delivered = [0] * broadcasts
+        last_receive = [0.0] * broadcasts
+        handshake_slots = asyncio.Semaphore(500)
+        
+        async def receive(ws):
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                now = time.time()
+                try:
+                    data = json.loads(msg.data)
+                except ValueError:
+                    continue  # texto que não é JSON não pode derrubar o leitor da conexão
+                seq = data.get("seq") if isinstance(data, dict) else None
+                if isinstance(seq, int) and 0 <= seq < broadcasts:
+                    # Timestamp embutido pelo servidor na publicação (ou pelo publicador)
+                    sent = data.get("server_ts", data.get("ts"))
+                    if not isinstance(sent, (int, float)):
+                        continue
+                    latencies.append((now - sent) * 1000)
+                    delivered[seq] += 1
+                    last_receive[seq] = max(last_receive[seq], now)
+        
+        async def open_connection(session):
+            nonlocal failures
+            async with handshake_slots:
+                start = time.perf_counter()
+                try:
+                    ws = await session.ws_connect(url, autoclose=True, compress=0)
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+                    failures += 1
+                    return
+                handshake_ms.append((time.perf_counter() - start) * 1000)
+                sockets.append(ws)
+                readers.append(asyncio.ensure_future(receive(ws)))
+        
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=None, connect=10)) as session:
+            print(f"Abrindo {connections:,} conexões em {url}...")
+            connect_start = time.perf_counter()
+            await asyncio.gather(*(open_connection(session) for _ in range(connections)))
+            connect_duration = time.perf_counter() - connect_start
+            print(f"  {len(sockets):,} abertas em {connect_duration:.2f}s ({failures} falhas)")
+            
+            await asyncio.sleep(1)  # estabilizar buffers antes de medir memória
+            client_rss = me.memory_info().rss
+            server_rss = server_proc.memory_info().rss if server_proc else None
+            
+            publish_ts = []
+            if sockets:
+                print(f"Publicando {broadcasts} broadcasts (intervalo {interval}s)...")
+                for seq in range(broadcasts):
+                    publish_ts.append(time.time())
+                    await sockets[0].send_str(json.dumps({"tipo": "broadcast", "seq": seq, "ts": publish_ts[-1]}))
+                    await asyncio.sleep(interval)
+                deadline = time.time() + 10
+                while sum(delivered) < broadcasts * len(sockets) and time.time() < deadline:
+                    await asyncio.sleep(0.1)
+            
+            close_slots = asyncio.Semaphore(1000)
+            
+            async def close(ws):
+                async with close_slots:
+                    await ws.close()
+            
+            await asyncio.gather(*(close(ws) for ws in sockets), return_exceptions=True)
+            await asyncio.gather(*readers, return_exceptions=True)
+        
+        if server:
+            server.terminate()
+            server.join(5)
+        
+        open_count = len(sockets)
+        expected = broadcasts * open_count
+        stats = {
+            "url": url,
+            "standin": standin,
+            "connections_requested": connections,
+            "connections_open": open_count,
+            "connect_failures": failures,
+            "connect_duration_s": round(connect_duration, 2),
+            "connect_rate_per_s": round(open_count / connect_duration, 1) if connect_duration > 0 else 0,
+            "handshake_p50_ms": summarize(handshake_ms).get("median_ms"),
+            "handshake_p99_ms": summarize(handshake_ms).get("p99_ms"),
+            "broadcasts": broadcasts,
+            "delivery_ratio": round(sum(delivered) / expected, 4) if expected else 0,
+            "client_kb_per_connection": round((client_rss - client_rss_start) / 1024 / open_count, 2) if open_count else None,
+            "server_kb_per_connection": (round((server_rss - server_rss_start) / 1024 / open_count, 2)
+                                         if server_rss is not None and open_count else None),
+        }
+        if latencies:
+            completion = [(last - published) * 1000 for last, published in zip(last_receive, publish_ts) if last]
+            fanout = summarize(latencies)
+            stats.update({
+                "fanout_p50_ms": fanout["median_ms"],
+                "fanout_p95_ms": fanout["p95_ms"],
+                "fanout_p99_ms": fanout["p99_ms"],
+                "fanout_max_ms": fanout["max_ms"],
+                # Tempo até o último cliente receber cada publicação
+                "fanout_complete_avg_ms": round(statistics.mean(completion), 2) if completion else None,
+            })
+        
+        if stats["delivery_ratio"] >= 0.999 and stats.get("fanout_p99_ms", float("inf")) < 100:
+            print(f"  {Colors.OKGREEN}✅ REAL-TIME READY{Colors.ENDC}")
+        elif stats["delivery_ratio"] > 0:
+            print(f"  {Colors.WARNING}⚠️ FAN-OUT DEGRADADO{Colors.ENDC}")
+        else:
+            print(f"  {Colors.FAIL}❌ NENHUM BROADCAST RECEBIDO (servidor não republica {{\"tipo\": \"broadcast\"}}?){Colors.ENDC}")
+        print(f"  ├─ Conexões: {open_count:,}/{connections:,} | {stats['connect_rate_per_s']} conexões/s | "
+              f"Handshake P99: {stats['handshake_p99_ms']}ms")
+        if latencies:
+            print(f"  ├─ Fan-out: P50 {stats['fanout_p50_ms']}ms | P99 {stats['fanout_p99_ms']}ms | "
+                  f"último cliente {stats['fanout_complete_avg_ms']}ms")
+        print(f"  ├─ Entrega: {stats['delivery_ratio'] * 100:.2f}%")
+        server_memory = f" | servidor {stats['server_kb_per_connection']}KB" if stats["server_kb_per_connection"] is not None else ""
+        print(f"  └─ Memória/conexão: cliente {stats['client_kb_per_connection']}KB{server_memory}\n")
+        
+        self.results["websocket_tests"] = [stats]
+        return stats
+    
+    async def find_capacity(self, slo: str = "p99<50ms", max_error_rate: float = 0.01,
+                            start_rps: float = 50, max_rps: float = 20000, level_seconds: float = 10,
+                            tolerance: float = 0.05, endpoints: Optional[List[str]] = None) -> List[Dict]:
+        """Buscar a maior taxa sustentável (joelho) que cumpre o SLO, por endpoint"""
+        percentile, threshold = parse_slo(slo)
+        print_section(f"🎯 BUSCA DE CAPACIDADE (SLO {slo}, erros ≤ {max_error_rate:.1%})")
+        # Amostras suficientes para o percentil: ~10 eventos na cauda
+        min_samples = math.ceil(10 / max(1e-6, 1 - percentile / 100))
+        
+        results = []
+        async with AsyncTransport(timeout=10, trace_phases=False) as transport:
+            for method, endpoint, data, name in self.API_ENDPOINTS:
+                if endpoints and endpoint not in endpoints:
+                    continue
+                url = f"{self.base_url}{endpoint}"
+                print(f"{name} ({method} {endpoint})")
+                levels = []
+                
+                async def probe(rate: float) -> bool:
+                    duration = min(60.0, max(level_seconds, min_samples / rate))
+                    level = await open_loop_level(transport, method, url, data, rate, duration)
+                    # Estável: as duas metades do patamar precisam cumprir o SLO
+                    half_values = [h.percentile(percentile) if h.count else math.inf for h in level.pop("halves")]
+                    level[f"p{percentile:g}_ms"] = round(max(half_values), 2)
+                    reasons = []
+                    if level["error_rate"] > max_error_rate:
+                        reasons.append(f"erros {level['error_rate']:.1%}")
+                    if max(half_values) > threshold:
+                        reasons.append(f"p{percentile:g} {max(half_values):.1f}ms")
+                    if level["schedule_lag_p99_ms"] > threshold / 2 or not level["client"]["valid"]:
+                        reasons.append("gerador saturado")
+                    level["ok"] = not reasons
+                    level["motivo"] = ", ".join(reasons)
+                    levels.append(level)
+                    
+                    mark = f"{Colors.OKGREEN}✓{Colors.ENDC}" if level["ok"] else f"{Colors.FAIL}✗ {level['motivo']}{Colors.ENDC}"
+                    print(f"  {rate:>9.0f} RPS → p{percentile:g} {max(half_values):.1f}ms | "
+                          f"erros {level['error_rate']:.1%} | vazão {level['achieved_rps']:.0f}/s {mark}")
+                    return level["ok"]
+                
+                # Fase 1: dobrar a taxa até falhar (ou reduzir pela metade até passar)
+                lo, hi, rate = 0.0, None, float(start_rps)
+                while True:
+                    if await probe(rate):
+                        lo = rate
+                        if hi is not None or rate >= max_rps:
+                            break
+                        rate = min(rate * 2, max_rps)
+                    else:
+                        hi = rate
+                        if lo or rate <= 1:
+                            break
+                        rate /= 2
+                # Fase 2: busca binária entre o último patamar aprovado e o primeiro reprovado
+                while lo and hi and (hi - lo) / lo > tolerance:
+                    middle = (lo + hi) / 2
+                    if await probe(middle):
+                        lo = middle
+                    else:
+                        hi = middle
+                
+                knee = next((level for level in levels if level["ok"] and level["rate_rps"] == round(lo, 1)), None)
+                stats = {
+                    "endpoint": endpoint,
+                    "method": method,
+                    "name": name,
+                    "slo": slo,
+                    "max_error_rate": max_error_rate,
+                    "knee_rps": round(lo, 1),
+                    "knee_latency": knee["latency"] if knee else None,
+                    "limited_by_max_rps": hi is None,
+                    "levels": levels,
+                }
+                results.append(stats)
+                
+                if lo:
+                    suffix = " (limite --capacity-max-rps)" if hi is None else ""
+                    print(f"  {Colors.OKGREEN}➜ Joelho: {lo:.0f} RPS dentro do SLO{suffix}{Colors.ENDC}\n")
+                else:
+                    print(f"  {Colors.FAIL}➜ Nenhuma taxa cumpriu o SLO{Colors.ENDC}\n")
+        
+        self.results["capacity_tests"] = results
+        return results
+    
+    async def soak_test(self, duration_minutes: float = 60, rate: float = 100, target_pid: Optional[int] = None,
+                        endpoints: Optional[List[str]] = None, window_seconds: float = 60) -> Dict:
+        """Teste de longa duração: vazamento de memória/descritores e deriva de latência"""
+        print_section(f"🕐 SOAK TEST ({duration_minutes:g} min a {rate:g} RPS)")
+        
+        endpoints = endpoints or ["/health"]
+        port = urllib.parse.urlsplit(self.base_url).port or 80
+        target_pid = target_pid or find_listening_pid(port)
+        target = None
+        if target_pid:
+            try:
+                target = psutil.Process(target_pid)
+                print(f"Processo alvo: PID {target_pid} ({target.name()}) + filhos")
+            except psutil.Error as e:
+                print(f"{Colors.WARNING}⚠️ PID {target_pid} inacessível: {e}{Colors.ENDC}")
+        else:
+            print(f"{Colors.WARNING}⚠️ Processo alvo não encontrado (use --soak-pid); medindo só latência{Colors.ENDC}")
+        
+        # Memória limitada: um histograma por janela, resumido e descartado ao fechar
+        window = {"latency": LatencyHistogram(), "errors": 0}
+        windows: List[Dict] = []
         start = time.perf_counter()
-        try:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                await resp.text()
-                elapsed = (time.perf_counter() - start) * 1000
-                return {"success": resp.status < 400, "time": elapsed}
-        except Exception as e:
-            return {"success": False, "time": None, "error": str(e)}
+        
+        def on_result(offset: float, latency_ms: Optional[float]):
+            if latency_ms is None:
+                window["errors"] += 1
+            else:
+                window["latency"].record(latency_ms)
+        
+        def close_window():
+            latency, errors = window["latency"], window["errors"]
+            window["latency"], window["errors"] = LatencyHistogram(), 0
+            sample = {
+                "minute": round((time.perf_counter() - start) / 60, 2),
+                "requests": latency.count + errors,
+                "errors": errors,
+                "p50_ms": round(latency.percentile(50), 2),
+                "p95_ms": round(latency.percentile(95), 2),
+                "p99_ms": round(latency.percentile(99), 2),
+            }
+            if target is not None:
+                try:
+                    sample.update(sample_process_tree(target))
+                except psutil.NoSuchProcess:
+                    print(f"\n{Colors.FAIL}❌ Processo alvo encerrou durante o soak{Colors.ENDC}")
+            windows.append(sample)
+            resources = f" | RSS {sample['rss_mb']:.1f}MB | fds {sample['fds']}" if "rss_mb" in sample else ""
+            print(f"  [{sample['minute']:6.1f}/{duration_minutes:g} min] p50 {sample['p50_ms']}ms | "
+                  f"p99 {sample['p99_ms']}ms | erros {errors}{resources}")
+        
+        async def sampler():
+            while True:
+                await asyncio.sleep(window_seconds)
+                close_window()
+        
+        duration = duration_minutes * 60
+        async with AsyncTransport(timeout=10, trace_phases=False) as transport, LoopMonitor() as monitor:
+            sampler_task = asyncio.ensure_future(sampler())
+            try:
+                await asyncio.gather(*(
+                    open_loop(transport, "GET", f"{self.base_url}{endpoint}", None,
+                              rate / len(endpoints), duration, on_result)
+                    for endpoint in endpoints))
+            finally:
+                sampler_task.cancel()
+        if window["latency"].count or window["errors"]:
+            close_window()
+        
+        stats = {
+            "duration_min": duration_minutes,
+            "rate_rps": rate,
+            "endpoints": endpoints,
+            "target_pid": target_pid if target is not None else None,
+            "window_s": window_seconds,
+            "windows": windows,
+            "trends": {},
+            "alerts": [],
+            "client": monitor.verdict(max((w["p99_ms"] for w in windows), default=None)),
+        }
+        
+        # A primeira janela é aquecimento (pools, caches, JIT de import)
+        steady = windows[1:]
+        if len(steady) < 3:
+            print(f"\n  {Colors.WARNING}⚠️ Janelas insuficientes para tendência (mínimo 4){Colors.ENDC}")
+        else:
+            minutes = [w["minute"] for w in steady]
+            p99 = linear_trend(minutes, [w["p99_ms"] for w in steady])
+            stats["trends"]["p99_ms_per_hour"] = round(p99["slope"] * 60, 3)
+            stats["trends"]["p99_r2"] = round(p99["r2"], 3)
+            baseline = max(steady[0]["p99_ms"], 0.1)
+            if p99["slope"] * 60 > 0.2 * baseline and p99["r2"] >= 0.5:
+                stats["alerts"].append(f"Deriva de latência: p99 +{p99['slope'] * 60:.1f}ms/h "
+                                       f"(R² {p99['r2']:.2f}, base {baseline:.1f}ms)")
+            
+            if all("rss_mb" in w for w in steady):
+                rss = linear_trend(minutes, [w["rss_mb"] for w in steady])
+                fds = linear_trend(minutes, [w["fds"] for w in steady])
+                stats["trends"].update({
+                    "rss_mb_per_hour": round(rss["slope"] * 60, 2), "rss_r2": round(rss["r2"], 3),
+                    "fds_per_hour": round(fds["slope"] * 60, 2), "fds_r2": round(fds["r2"], 3),
+                })
+                median_rss = statistics.median(w["rss_mb"] for w in steady)
+                if rss["slope"] * 60 > max(5.0, 0.02 * median_rss) and rss["r2"] >= 0.6:
+                    stats["alerts"].append(f"Possível vazamento de memória: +{rss['slope'] * 60:.1f}MB/h "
+                                           f"(R² {rss['r2']:.2f})")
+                if fds["slope"] * 60 > 10 and fds["r2"] >= 0.6:
+                    stats["alerts"].append(f"Possível vazamento de descritores: +{fds['slope'] * 60:.0f} fds/h "
+                                           f"(R² {fds['r2']:.2f})")
+        
+        print()
+        for alert in stats["alerts"]:
+            print(f"  {Colors.FAIL}❌ {alert}{Colors.ENDC}")
+        if len(steady) >= 3 and not stats["alerts"]:
+            print(f"  {Colors.OKGREEN}✅ Sem vazamentos ou deriva detectados{Colors.ENDC}")
+        for name, value in stats["trends"].items():
+            print(f"  • {name}: {value}")
+        print_client_health(stats["client"])
+        
+        self.results["soak_tests"] = [stats]
+        return stats
+    
+    async def replay_access_log(self, log_path: str, speed: float = 1.0, limit: Optional[int] = None,
+                                all_methods: bool = False, max_paths: int = 500,
+                                max_in_flight: int = 10000) -> Dict:
+        """Reproduzir um access log com os intervalos originais (÷ speed) e comparar latências"""
+        print_section(f"🎬 REPLAY DE ACCESS LOG ({speed:g}×)")
+        print(f"Log: {log_path} → {self.base_url}")
+        
+        replayable = None if all_methods else {"GET", "HEAD"}
+        counters = {"unparsed": 0, "skipped_method": 0, "dropped": 0}
+        per_path: Dict[str, Dict] = {}
+        schedule_lag = LatencyHistogram()
+        in_flight = set()
+        
+        def path_stats(path: str) -> Dict:
+            key = normalize_path(path)
+            if key not in per_path and len(per_path) >= max_paths:
+                key = "(outros)"
+            if key not in per_path:
+                per_path[key] = {"replay": LatencyHistogram(), "original": LatencyHistogram(),
+                                 "count": 0, "errors": 0, "status_mismatch": 0}
+            return per_path[key]
+        
+        async def fire(entry: Dict, intended: float, stats: Dict):
+            result = await transport.request(entry["method"], f"{self.base_url}{entry['path']}",
+                                             start=intended, allow_redirects=False)
+            if not result.status:
+                stats["errors"] += 1
+                return
+            stats["replay"].record(result.latency_ms)
+            if result.status // 100 != entry["status"] // 100:
+                stats["status_mismatch"] += 1
+        
+        start = time.perf_counter()
+        first_ts = None
+        last_offset = 0.0
+        replayed = 0
+        async with AsyncTransport(timeout=30, trace_phases=False) as transport, LoopMonitor() as monitor:
+            for entry in iter_access_log(Path(log_path), counters):
+                if replayable and entry["method"] not in replayable:
+                    counters["skipped_method"] += 1
+                    continue
+                if limit and replayed >= limit:
+                    break
+                if first_ts is None:
+                    first_ts = entry["ts"]
+                
+                # Logs gravados no fim da requisição saem levemente fora de ordem: dispara na hora
+                offset = max(0.0, (entry["ts"] - first_ts) / speed)
+                now = time.perf_counter() - start
+                if offset > now:
+                    await asyncio.sleep(offset - now)
+                elif replayed % 100 == 0:
+                    await asyncio.sleep(0)  # deixar as respostas andarem em rajadas
+                if offset >= last_offset:
+                    schedule_lag.record(max(0.0, time.perf_counter() - start - offset) * 1000)
+                    last_offset = offset
+                
+                stats = path_stats(entry["path"])
+                stats["count"] += 1
+                if entry["latency_ms"] is not None:
+                    stats["original"].record(entry["latency_ms"])
+                replayed += 1
+                if len(in_flight) >= max_in_flight:
+                    counters["dropped"] += 1
+                    stats["errors"] += 1
+                    continue
+                task = asyncio.ensure_future(fire(entry, start + offset, stats))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+                
+                if replayed % 1000 == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"\r  Replay: {replayed:,} req | {elapsed:.0f}s | {replayed / elapsed:.0f} RPS | "
+                          f"em voo {len(in_flight)}", end="")
+            
+            if in_flight:
+                await asyncio.gather(*in_flight)
+        print()
+        
+        duration = time.perf_counter() - start
+        overall = LatencyHistogram()
+        for stats in per_path.values():
+            overall.merge(stats["replay"])
+        paths = []
+        for path, stats in sorted(per_path.items(), key=lambda item: item[1]["count"], reverse=True):
+            replay, original = stats["replay"], stats["original"]
+            row = {
+                "path": path,
+                "count": stats["count"],
+                "errors": stats["errors"],
+                "status_mismatch": stats["status_mismatch"],
+                "replay_p50_ms": round(replay.percentile(50), 2),
+                "replay_p99_ms": round(replay.percentile(99), 2),
+            }
+            if original.count:
+                row.update({
+                    "original_p50_ms": round(original.percentile(50), 2),
+                    "original_p99_ms": round(original.percentile(99), 2),
+                    "delta_p99_ms": round(replay.percentile(99) - original.percentile(99), 2),
+                })
+            paths.append(row)
+        
+        stats = {
+            "log": str(log_path),
+            "speed": speed,
+            "requests": replayed,
+            "duration_s": round(duration, 2),
+            "avg_rps": round(replayed / duration, 2) if duration > 0 else 0,
+            "unparsed_lines": counters["unparsed"],
+            "skipped_methods": counters["skipped_method"],
+            "dropped": counters["dropped"],
+            "schedule_lag_p99_ms": round(schedule_lag.percentile(99), 2),
+            "client": monitor.verdict(overall.percentile(99) if overall.count else None),
+            "paths": paths,
+        }
+        
+        print(f"  {replayed:,} requisições em {duration:.1f}s ({stats['avg_rps']} RPS) | "
+              f"ignoradas: {counters['unparsed']} linhas, {counters['skipped_method']} métodos não idempotentes")
+        print(f"\n  {'Rota':<40}{'Req':>8}{'Erros':>7}{'Status≠':>9}{'P99 replay':>12}{'P99 orig':>10}{'Δ P99':>9}")
+        for row in paths[:15]:
+            original = f"{row['original_p99_ms']:.1f}" if "original_p99_ms" in row else "-"
+            delta = f"{row['delta_p99_ms']:+.1f}" if "delta_p99_ms" in row else "-"
+            color = Colors.FAIL if row.get("delta_p99_ms", 0) > max(10.0, row.get("original_p99_ms", 0) * 0.5) else ""
+            print(f"  {color}{row['path'][:39]:<40}{row['count']:>8}{row['errors']:>7}{row['status_mismatch']:>9}"
+                  f"{row['replay_p99_ms']:>12.1f}{original:>10}{delta:>9}{Colors.ENDC if color else ''}")
+        if stats["schedule_lag_p99_ms"] > 50:
+            print(f"\n  {Colors.WARNING}⚠️ Gerador atrasou até {stats['schedule_lag_p99_ms']}ms (P99): "
+                  f"intervalos originais não foram respeitados{Colors.ENDC}")
+        print()
+        print_client_health(stats["client"])
+        
+        self.results["replay_tests"] = [stats]
+        return stats
     
     def generate_report(self) -> str:
         """Gerar relatório completo de performance"""
-        self.print_section("📊 RELATÓRIO FINAL DE PERFORMANCE")
+        print_section("📊 RELATÓRIO FINAL DE PERFORMANCE")
         
         total_time = time.time() - self.start_time
         
         # Calculate summary statistics
         api_avg = statistics.mean([t["avg_ms"] for t in self.results["api_tests"]]) if self.results["api_tests"] else 0
+        ws = self.results["websocket_tests"][-1] if self.results["websocket_tests"] else None
+        ws_line = (f"{ws['connections_open']:,} conexões, fan-out P99 {ws.get('fanout_p99_ms', 'n/a')}ms"
+                   if ws else "não executado (use --websocket)")
+        client_line = self._format_client_health()
+        stress = self.results["stress_tests"][-1] if self.results["stress_tests"] else None
+        stress_line = (self._format_steady_state(stress["throughput"])
+                       if stress and stress["throughput"]["buckets"] else "não executado")
         
         # Performance grades
         grades = {
@@ -483,10 +929,10 @@ class UltraPerformanceTest:
                         PERFORMANCE GRADES
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{Colors.ENDC}
 
-  • API Performance:      {self._get_grade_color(grades['API Performance'])}{grades['API Performance']}{Colors.ENDC}
-  • Load Capacity:        {self._get_grade_color(grades['Load Capacity'])}{grades['Load Capacity']}{Colors.ENDC}
-  • Cache Performance:    {self._get_grade_color(grades['Cache Performance'])}{grades['Cache Performance']}{Colors.ENDC}
-  • Database Performance: {self._get_grade_color(grades['Database Performance'])}{grades['Database Performance']}{Colors.ENDC}
+  • API Performance:      {grade_color(grades['API Performance'])}{grades['API Performance']}{Colors.ENDC}
+  • Load Capacity:        {grade_color(grades['Load Capacity'])}{grades['Load Capacity']}{Colors.ENDC}
+  • Cache Performance:    {grade_color(grades['Cache Performance'])}{grades['Cache Performance']}{Colors.ENDC}
+  • Database Performance: {grade_color(grades['Database Performance'])}{grades['Database Performance']}{Colors.ENDC}
 
 {Colors.OKCYAN}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
                       KEY METRICS ACHIEVED
@@ -495,14 +941,23 @@ class UltraPerformanceTest:
   ⚡ Average API Response:  {api_avg:.2f}ms
   📊 Peak Throughput:       {self.results['load_tests'][-1]['rps'] if self.results['load_tests'] else 0:.0f} RPS
   💾 Cache Response:        < 1ms
+  🔥 Stress:                {stress_line}
+  🔌 WebSocket:             {ws_line}
   🗄️ Database Queries:      < 10ms
   ✅ Success Rate:          > 99%
+  🖥️ Load Generator:        {client_line}
 
-{Colors.WARNING}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+{Colors.OKCYAN}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+                 LATENCY BREAKDOWN (P50 / P99 ms)
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{Colors.ENDC}
+
+{self._format_phase_table()}
+
+{self._format_capacity()}{self._format_allocations()}{Colors.WARNING}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
                        RECOMMENDATIONS
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{Colors.ENDC}
 """
-        
+
         # Add recommendations based on results
         if api_avg > 50:
             report += f"  • {Colors.WARNING}Consider implementing response caching{Colors.ENDC}\n"
@@ -520,60 +975,124 @@ class UltraPerformanceTest:
 
 ═════════════════════════════════════════════════════════════
 """
-        
+
         return report
     
-    def _get_grade_color(self, grade: str) -> str:
-        """Get color for grade"""
-        if grade in ["A+", "A"]:
-            return Colors.OKGREEN
-        elif grade == "B":
-            return Colors.WARNING
-        else:
-            return Colors.FAIL
+    def _format_client_health(self) -> str:
+        """Resumo do veredito do gerador de carga em todas as baterias que o mediram"""
+        verdicts = [(name, test["client"]) for name, tests in self.results.items() if isinstance(tests, list)
+                    for test in tests if isinstance(test, dict) and "client" in test]
+        for test in self.results["capacity_tests"]:
+            verdicts += [("capacity_tests", level["client"]) for level in test["levels"] if "client" in level]
+        if not verdicts:
+            return "não medido"
+        invalid = sorted({name for name, client in verdicts if not client["valid"]})
+        worst_lag = max(client["loop_lag_p99_ms"] for _, client in verdicts)
+        worst_cpu = max(client["cpu_peak_percent"] for _, client in verdicts)
+        detail = f"lag do loop P99 até {worst_lag}ms, CPU pico {worst_cpu}% ({verdicts[0][1]['event_loop']})"
+        if invalid:
+            return f"{Colors.FAIL}SATURADO em {', '.join(invalid)} - resultados inválidos; {detail}{Colors.ENDC}"
+        return f"OK, {detail}"
+    
+    @staticmethod
+    def _format_steady_state(throughput: Dict) -> str:
+        """Aquecimento e regime estável de uma análise de vazão (RunStats.throughput)"""
+        origin = "detectado" if throughput["warmup_detected"] else "informado"
+        steady = ("estável" if throughput["steady"]
+                  else f"{Colors.WARNING}INSTÁVEL{Colors.ENDC}")
+        p99 = f", P99 {throughput['steady_p99_ms']}ms" if throughput["steady_p99_ms"] is not None else ""
+        return (f"Aquecimento {throughput['warmup_s']:g}s ({origin}) | regime {steady}: "
+                f"{throughput['steady_rps']:,.0f} RPS, CV {throughput['steady_cv']:.0%}{p99}")
+    
+    def _format_capacity(self) -> str:
+        """Seção de capacidade (joelho por endpoint) quando --find-capacity foi executado"""
+        if not self.results["capacity_tests"]:
+            return ""
+        first = self.results["capacity_tests"][0]
+        lines = [f"{Colors.OKCYAN}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━",
+                 f"          CAPACITY (SLO {first['slo']}, erros ≤ {first['max_error_rate']:.1%})",
+                 f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{Colors.ENDC}", ""]
+        for test in self.results["capacity_tests"]:
+            suffix = "+" if test["limited_by_max_rps"] else ""
+            lines.append(f"  • {test['name']:<18} {test['knee_rps']:>9.0f}{suffix} RPS "
+                         f"({len(test['levels'])} patamares)")
+        return "\n".join(lines) + "\n\n"
+    
+    def _format_allocations(self) -> str:
+        """Seção de alocações por bateria quando --trace-alloc foi usado"""
+        if not self.alloc_tracker or not self.alloc_tracker.checkpoints:
+            return ""
+        lines = [f"{Colors.OKCYAN}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━",
+                 "          ALLOCATIONS (tracemalloc, saldo retido no cliente)",
+                 f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{Colors.ENDC}", ""]
+        for entry in self.alloc_tracker.checkpoints:
+            per_request = (f"{entry['bytes_per_request']:+8.0f} B/req {entry['blocks_per_request']:+7.2f} blocos/req"
+                           if entry["requests"] else f"{'sem requisições':>33}")
+            top = entry["top"][0]["site"].rsplit("/", 1)[-1] if entry["top"] else "-"
+            lines.append(f"  • {entry['label']:<12} {entry['retained_kb']:>+9.1f}KB {per_request} | "
+                         f"pico +{entry['window_peak_kb']:.0f}KB | {top}")
+        return "\n".join(lines) + "\n\n"
+    
+    def _format_phase_table(self) -> str:
+        """Tabela de fases (DNS, connect, TLS, TTFB, body) ao lado do total"""
+        lines = [f"  {'':<8}" + "".join(f"{phase:>16}" for phase in PHASES)]
+        for name, label in (("api", "API"), ("load", "Carga"), ("stress", "Stress")):
+            histograms = self.phases[name].histograms
+            if not histograms["total"].count:
+                continue
+            cells = [f"{h.percentile(50):.2f}/{h.percentile(99):.2f}" if h.count else "-"
+                     for h in (histograms[phase] for phase in PHASES)]
+            lines.append(f"  {label:<8}" + "".join(f"{cell:>16}" for cell in cells))
+        return "\n".join(lines) if len(lines) > 1 else "  Nenhuma requisição medida"
     
     def save_results(self):
         """Save test results to file"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        
-        # Save JSON results
-        results_file = Path(f"performance_test_results_{timestamp}.json")
-        results_file.write_text(json.dumps(self.results, indent=2))
-        
-        # Save report
-        report = self.generate_report()
-        report_file = Path(f"performance_test_report_{timestamp}.txt")
-        report_file.write_text(report)
+        if self.alloc_tracker:
+            self.results["allocations"] = self.alloc_tracker.summary()
+        self.results["meta"] = {
+            "tool": "TEST_ULTRA_PERFORMANCE",
+            "base_url": self.base_url,
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "duration_s": round(time.time() - self.start_time, 2),
+        }
+        results_file = save_json(self.results, "performance_test_results")
+        report_file = save_text(self.generate_report(), "performance_test_report")
+        # Gráficos; para comparar execuções: python -m ultra_loadtest.htmlreport a.json b.json
+        html_file = write_html_report([results_file], prefix="performance_test_report")
         
         print(f"\n{Colors.OKGREEN}Results saved to:{Colors.ENDC}")
         print(f"  • {results_file}")
         print(f"  • {report_file}")
+        print(f"  • {html_file}")
     
     async def run_all_tests(self):
         """Execute all performance tests"""
         self.print_header()
         
-        try:
-            # Check if server is running
-            print(f"{Colors.OKCYAN}Checking server connectivity...{Colors.ENDC}")
-            response = requests.get(f"{self.base_url}/health", timeout=5)
-            if response.status_code == 200:
-                print(f"{Colors.OKGREEN}✅ Server is online!{Colors.ENDC}\n")
-            else:
-                print(f"{Colors.WARNING}⚠️ Server returned status {response.status_code}{Colors.ENDC}\n")
-        except Exception as e:
+        # Check if server is running
+        print(f"{Colors.OKCYAN}Checking server connectivity...{Colors.ENDC}")
+        response = SyncTransport(timeout=5).request("GET", f"{self.base_url}/health")
+        if response.status == 200:
+            print(f"{Colors.OKGREEN}✅ Server is online!{Colors.ENDC}\n")
+        elif response.status:
+            print(f"{Colors.WARNING}⚠️ Server returned status {response.status}{Colors.ENDC}\n")
+        else:
             print(f"{Colors.FAIL}❌ Cannot connect to server at {self.base_url}")
-            print(f"Error: {e}{Colors.ENDC}")
+            print(f"Error: {response.error}{Colors.ENDC}")
             print("\nPlease ensure the server is running:")
             print("  python AUTO_DEPLOY_SUPREMO.py --type local")
             return
         
         # Run all test suites
-        await self.test_api_endpoints()
-        self.test_concurrent_load()
-        await self.test_database_performance()
-        await self.test_cache_performance()
-        await self.stress_test(duration_seconds=10)  # Short stress test
+        await self.measured("api", self.test_api_endpoints)
+        await self.measured("load", self.test_concurrent_load)
+        await self.measured("database", self.test_database_performance)
+        await self.measured("cache", self.test_cache_performance)
+        await self.measured("stress", self.stress_test, **self.stress_options)
+        if self.run_websocket:
+            await self.measured("websocket", self.test_websocket, **self.websocket_options)
+        else:
+            print(f"{Colors.OKBLUE}ℹ️ WebSocket test skipped (enable with --websocket){Colors.ENDC}\n")
         self.test_system_resources()
         
         # Generate and display report
@@ -583,8 +1102,8 @@ class UltraPerformanceTest:
         # Save results
         self.save_results()
 
-async def main():
-    """Main execution"""
+def parse_args():
+    """Opções de linha de comando"""
     import argparse
     
     parser = argparse.ArgumentParser(description="Ultra Performance Test Suite")
@@ -592,15 +1111,112 @@ async def main():
                        help="Base URL of the API server")
     parser.add_argument("--stress-duration", type=int, default=10,
                        help="Duration of stress test in seconds")
+    parser.add_argument("--stress-window", type=float, default=1.0,
+                       help="Time-series bucket size in seconds for the stress test")
+    parser.add_argument("--stress-warmup", type=float, default=None,
+                       help="Seconds excluded as warm-up from the stress analysis (default: detected)")
+    parser.add_argument("--ws-url", default=None,
+                       help="WebSocket URL (default: <url>/ws)")
+    parser.add_argument("--ws-connections", type=int, default=10000,
+                       help="Concurrent WebSocket connections")
+    parser.add_argument("--ws-broadcasts", type=int, default=20,
+                       help="Broadcast messages published during the WebSocket test")
+    parser.add_argument("--ws-standin", action="store_true",
+                       help="Run the WebSocket test against a local echo/broadcast stand-in server")
+    parser.add_argument("--websocket", action="store_true",
+                       help="Include the WebSocket test (--ws-connections connections) in the full run")
+    parser.add_argument("--websocket-only", action="store_true",
+                       help="Run only the WebSocket test (works offline with --ws-standin)")
+    parser.add_argument("--find-capacity", action="store_true",
+                       help="Search the highest open-loop RPS per endpoint that meets --slo")
+    parser.add_argument("--slo", default="p99<50ms",
+                       help="Latency SLO for --find-capacity (e.g. p99<50ms, p95<0.2s)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01,
+                       help="Maximum error rate accepted at a capacity level")
+    parser.add_argument("--capacity-max-rps", type=float, default=20000,
+                       help="Upper bound for the capacity search")
+    parser.add_argument("--capacity-level-seconds", type=float, default=10,
+                       help="Minimum time each arrival rate is held")
+    parser.add_argument("--capacity-endpoints", default=None,
+                       help="Comma-separated endpoint paths to search (default: all API endpoints)")
+    parser.add_argument("--replay", default=None, metavar="ACCESS_LOG",
+                       help="Replay an access log (CLF/Combined, JSON lines or master server format; .gz ok)")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                       help="Replay speed factor (2 = twice as fast as the original traffic)")
+    parser.add_argument("--replay-limit", type=int, default=None,
+                       help="Replay at most this many requests")
+    parser.add_argument("--replay-all-methods", action="store_true",
+                       help="Also replay non-idempotent methods (sent without body)")
+    parser.add_argument("--soak-minutes", type=float, default=None,
+                       help="Run only a soak test of this many minutes")
+    parser.add_argument("--soak-rate", type=float, default=100,
+                       help="Open-loop arrival rate (RPS) during the soak test")
+    parser.add_argument("--soak-pid", type=int, default=None,
+                       help="Server PID to sample (default: process listening on the --url port)")
+    parser.add_argument("--soak-window", type=float, default=60,
+                       help="Seconds per soak sample window")
+    parser.add_argument("--soak-endpoints", default="/health",
+                       help="Comma-separated endpoint paths hit during the soak test")
+    parser.add_argument("--trace-alloc", action="store_true",
+                       help="Track client allocations per battery with tracemalloc (slower; diagnostics only)")
+    parser.add_argument("--loop", choices=["asyncio", "uvloop"], default="asyncio",
+                       help="Event loop used by the load generator (uvloop must be installed)")
     
-    args = parser.parse_args()
-    
+    return parser.parse_args()
+
+async def main(args):
+    """Main execution"""
     tester = UltraPerformanceTest(base_url=args.url)
+    tester.stress_options = {
+        "duration_seconds": args.stress_duration,
+        "window": args.stress_window,
+        "warmup": args.stress_warmup,
+    }
+    tester.websocket_options = {
+        "url": args.ws_url,
+        "connections": args.ws_connections,
+        "broadcasts": args.ws_broadcasts,
+        "standin": args.ws_standin,
+    }
+    tester.run_websocket = args.websocket
+    if args.trace_alloc:
+        tester.alloc_tracker = AllocationTracker().start()
+    if args.replay:
+        tester.print_header()
+        await tester.measured("replay", tester.replay_access_log, args.replay, speed=args.replay_speed,
+                              limit=args.replay_limit, all_methods=args.replay_all_methods)
+        tester.save_results()
+        return
+    if args.soak_minutes:
+        tester.print_header()
+        await tester.measured("soak", tester.soak_test, duration_minutes=args.soak_minutes, rate=args.soak_rate,
+                              target_pid=args.soak_pid, endpoints=args.soak_endpoints.split(","),
+                              window_seconds=args.soak_window)
+        tester.save_results()
+        return
+    if args.find_capacity:
+        parse_slo(args.slo)  # valida antes de iniciar
+        tester.print_header()
+        await tester.measured(
+            "capacity", tester.find_capacity,
+            slo=args.slo, max_error_rate=args.max_error_rate, max_rps=args.capacity_max_rps,
+            level_seconds=args.capacity_level_seconds,
+            endpoints=args.capacity_endpoints.split(",") if args.capacity_endpoints else None)
+        tester.save_results()
+        return
+    if args.websocket_only:
+        tester.print_header()
+        await tester.measured("websocket", tester.test_websocket, **tester.websocket_options)
+        tester.save_results()
+        return
     await tester.run_all_tests()
 
 if __name__ == "__main__":
+    args = parse_args()
+    if install_event_loop(args.loop) != args.loop:
+        print(f"{Colors.WARNING}⚠️ uvloop não instalado (pip install uvloop); usando asyncio{Colors.ENDC}")
     try:
-        asyncio.run(main())
+        asyncio.run(main(args))
     except KeyboardInterrupt:
         print(f"\n{Colors.WARNING}Test interrupted by user{Colors.ENDC}")
     except Exception as e:
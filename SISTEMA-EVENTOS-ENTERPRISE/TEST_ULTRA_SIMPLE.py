@@ -1,15 +1,12 @@
 #!/usr/bin/env python3
 """
 TESTE ULTRA PERFORMANCE SIMPLIFICADO - Sistema de Eventos
+Somente biblioteca padrao (transporte sincrono do ultra_loadtest)
 """
 
-import time
-import json
-import statistics
-import concurrent.futures
 from datetime import datetime
-import requests
-from pathlib import Path
+
+from ultra_loadtest import SyncTransport, closed_loop, rating, save_text
 
 class UltraPerformanceTestSimple:
     """Teste de performance simplificado"""
@@ -17,12 +14,17 @@ class UltraPerformanceTestSimple:
     def __init__(self, base_url="http://localhost:8000"):
         self.base_url = base_url
         self.results = {}
-        
-    def test_api_response_time(self):
-        """Testar tempo de resposta da API"""
+        # Conexoes keep-alive reaproveitadas por thread
+        self.transport = SyncTransport(timeout=5)
+    
+    def print_section(self, title):
         print("\n" + "="*60)
-        print("  TESTE DE TEMPO DE RESPOSTA DA API")
+        print(f"  {title}")
         print("="*60 + "\n")
+    
+    def test_api_response_time(self):
+        """Testar tempo de resposta da API"""
+        self.print_section("TESTE DE TEMPO DE RESPOSTA DA API")
         
         endpoints = [
             ("/health", "Health Check"),
@@ -30,145 +32,90 @@ class UltraPerformanceTestSimple:
             ("/metrics", "Metrics"),
         ]
         
+        results = []
         for endpoint, name in endpoints:
-            url = f"{self.base_url}{endpoint}"
-            times = []
-            
             print(f"Testando {name} ({endpoint})...")
             
-            for i in range(10):
-                try:
-                    start = time.perf_counter()
-                    response = requests.get(url, timeout=5)
-                    elapsed = (time.perf_counter() - start) * 1000
-                    times.append(elapsed)
-                    
-                    if i == 0:  # First request
-                        status = "OK" if response.status_code < 400 else f"ERROR ({response.status_code})"
-                        print(f"  Status: {status}")
-                except Exception as e:
-                    print(f"  ERRO: {str(e)}")
-                    times.append(5000)  # Timeout penalty
+            run = closed_loop(self.transport, "GET", f"{self.base_url}{endpoint}", concurrency=1, requests=10)
+            stats = run.summary()
+            results.append(dict(stats, endpoint=endpoint))
             
-            if times:
-                avg_time = statistics.mean(times)
-                min_time = min(times)
-                max_time = max(times)
-                
-                print(f"  Tempo medio: {avg_time:.2f}ms")
-                print(f"  Min: {min_time:.2f}ms | Max: {max_time:.2f}ms")
-                
-                if avg_time < 50:
-                    print("  Resultado: EXCELENTE (<50ms)")
-                elif avg_time < 100:
-                    print("  Resultado: BOM (<100ms)")
-                elif avg_time < 500:
-                    print("  Resultado: ACEITAVEL (<500ms)")
-                else:
-                    print("  Resultado: LENTO (>500ms)")
-                
-                print()
+            if not run.latency.count:
+                print(f"  ERRO: nenhuma resposta ({run.errors} falhas)\n")
+                continue
+            print(f"  Status: {'OK' if not run.errors else f'ERROS ({run.errors}/{run.requests})'}")
+            print(f"  Tempo medio: {stats['avg_ms']:.2f}ms")
+            print(f"  Min: {stats['min_ms']:.2f}ms | Max: {stats['max_ms']:.2f}ms")
+            
+            _, label = rating(stats["avg_ms"], [(50, "", "EXCELENTE (<50ms)"), (100, "", "BOM (<100ms)"),
+                                                (500, "", "ACEITAVEL (<500ms)")], ("", "LENTO (>500ms)"))
+            print(f"  Resultado: {label}\n")
+        
+        self.results["api_tests"] = results
     
     def test_concurrent_requests(self):
         """Testar requisicoes concorrentes"""
-        print("\n" + "="*60)
-        print("  TESTE DE CARGA CONCORRENTE")
-        print("="*60 + "\n")
+        self.print_section("TESTE DE CARGA CONCORRENTE")
         
         url = f"{self.base_url}/health"
+        results = []
         
-        def make_request():
-            try:
-                start = time.perf_counter()
-                response = requests.get(url, timeout=5)
-                elapsed = time.perf_counter() - start
-                return {"success": response.status_code < 400, "time": elapsed}
-            except:
-                return {"success": False, "time": 5.0}
-        
-        concurrent_levels = [10, 50, 100]
-        
-        for concurrent in concurrent_levels:
-            print(f"Testando com {concurrent} usuarios simultaneos...")
-            
-            with concurrent.futures.ThreadPoolExecutor(max_workers=concurrent) as executor:
-                start = time.time()
-                futures = [executor.submit(make_request) for _ in range(concurrent)]
-                responses = [f.result() for f in concurrent.futures.as_completed(futures)]
-                total_time = time.time() - start
+        for users in [10, 50, 100]:
+            print(f"Testando com {users} usuarios simultaneos...")
             
-            successes = sum(1 for r in responses if r["success"])
-            avg_time = statistics.mean([r["time"] for r in responses]) * 1000
-            rps = concurrent / total_time
+            run = closed_loop(self.transport, "GET", url, concurrency=users, requests=users)
+            stats = run.summary()
+            results.append(dict(stats, concurrent_users=users))
             
-            print(f"  Taxa de sucesso: {(successes/concurrent)*100:.1f}%")
-            print(f"  Tempo medio: {avg_time:.2f}ms")
-            print(f"  Requisicoes por segundo: {rps:.2f}")
+            print(f"  Taxa de sucesso: {stats['success_rate']}")
+            print(f"  Tempo medio: {stats['avg_ms']:.2f}ms")
+            print(f"  Requisicoes por segundo: {stats['rps']:.2f}")
             
-            if rps > 100:
-                print("  Resultado: EXCELENTE (>100 RPS)")
-            elif rps > 50:
-                print("  Resultado: BOM (>50 RPS)")
-            else:
-                print("  Resultado: PRECISA OTIMIZACAO (<50 RPS)")
-            
-            print()
+            _, label = rating(stats["rps"], [(100, "", "EXCELENTE (>100 RPS)"), (50, "", "BOM (>50 RPS)")],
+                              ("", "PRECISA OTIMIZACAO (<50 RPS)"), higher_is_better=True)
+            print(f"  Resultado: {label}\n")
+        
+        self.results["load_tests"] = results
     
-    def test_stress(self, duration=10):
+    def test_stress(self, duration=10, workers=10):
         """Teste de stress basico"""
-        print("\n" + "="*60)
-        print(f"  TESTE DE STRESS ({duration} segundos)")
-        print("="*60 + "\n")
+        self.print_section(f"TESTE DE STRESS ({duration} segundos)")
         
         url = f"{self.base_url}/health"
-        start_time = time.time()
-        end_time = start_time + duration
-        
-        total_requests = 0
-        successful_requests = 0
-        
-        print(f"Bombardeando servidor por {duration} segundos...")
-        
-        while time.time() < end_time:
-            try:
-                response = requests.get(url, timeout=1)
-                total_requests += 1
-                if response.status_code < 400:
-                    successful_requests += 1
-            except:
-                total_requests += 1
-            
-            # Progress update
-            if total_requests % 100 == 0:
-                elapsed = time.time() - start_time
-                rps = total_requests / elapsed
-                print(f"  Progresso: {elapsed:.1f}s | RPS: {rps:.0f} | Total: {total_requests}", end="\r")
-        
-        print()
+        print(f"Bombardeando servidor por {duration} segundos ({workers} usuarios)...")
         
-        total_time = time.time() - start_time
-        final_rps = total_requests / total_time
-        success_rate = (successful_requests / total_requests) * 100 if total_requests > 0 else 0
+        def progress(run, elapsed):
+            print(f"  Progresso: {elapsed:.1f}s | RPS: {run.requests / elapsed:.0f} | Total: {run.requests}", end="\r")
         
-        print(f"\n  Total de requisicoes: {total_requests}")
-        print(f"  Requisicoes bem-sucedidas: {successful_requests}")
-        print(f"  Taxa de sucesso: {success_rate:.1f}%")
-        print(f"  RPS medio: {final_rps:.2f}")
+        run = closed_loop(self.transport, "GET", url, concurrency=workers, duration=duration, progress=progress)
+        stats = run.summary()
+        self.results["stress_test"] = stats
         
-        if final_rps > 500:
-            print("  Resultado: ULTRA PERFORMANCE (>500 RPS)")
-        elif final_rps > 100:
-            print("  Resultado: HIGH PERFORMANCE (>100 RPS)")
-        else:
-            print("  Resultado: PERFORMANCE PADRAO (<100 RPS)")
+        print()
+        print(f"\n  Total de requisicoes: {run.requests}")
+        print(f"  Requisicoes bem-sucedidas: {run.requests - run.errors}")
+        print(f"  Taxa de sucesso: {stats['success_rate']}")
+        print(f"  RPS medio: {stats['rps']:.2f}")
+        print(f"  P95: {stats['p95_ms']:.2f}ms | P99: {stats['p99_ms']:.2f}ms")
+        
+        _, label = rating(stats["rps"], [(500, "", "ULTRA PERFORMANCE (>500 RPS)"),
+                                         (100, "", "HIGH PERFORMANCE (>100 RPS)")],
+                          ("", "PERFORMANCE PADRAO (<100 RPS)"), higher_is_better=True)
+        print(f"  Resultado: {label}")
     
     def generate_report(self):
         """Gerar relatorio final"""
-        print("\n" + "="*60)
-        print("  RELATORIO FINAL DE PERFORMANCE")
-        print("="*60 + "\n")
+        self.print_section("RELATORIO FINAL DE PERFORMANCE")
         
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        api = self.results.get("api_tests", [])
+        load = self.results.get("load_tests", [])
+        stress = self.results.get("stress_test", {})
+        
+        api_lines = "\n".join(f"   {t['endpoint']:<10} media {t['avg_ms']:.2f}ms | P99 {t['p99_ms']:.2f}ms | "
+                              f"sucesso {t['success_rate']}" for t in api)
+        load_lines = "\n".join(f"   {t['concurrent_users']:>4} usuarios: {t['rps']:.2f} RPS | "
+                               f"media {t['avg_ms']:.2f}ms" for t in load)
         
         report = f"""
 RELATORIO DE TESTE ULTRA PERFORMANCE
@@ -178,14 +125,11 @@ URL Base: {self.base_url}
 
 RESUMO DOS TESTES:
 ------------------
-1. Tempo de Resposta da API: TESTADO
-2. Carga Concorrente: TESTADO
-3. Teste de Stress: TESTADO
-
-CONCLUSAO:
-----------
-Sistema testado com sucesso.
-Verifique os resultados acima para detalhes de performance.
+1. Tempo de Resposta da API:
+{api_lines or '   nao executado'}
+2. Carga Concorrente:
+{load_lines or '   nao executado'}
+3. Teste de Stress: {f"{stress['rps']:.2f} RPS medio, P99 {stress['p99_ms']:.2f}ms, sucesso {stress['success_rate']}" if stress else 'nao executado'}
 
 RECOMENDACOES:
 --------------
@@ -194,16 +138,15 @@ RECOMENDACOES:
 - Configure connection pooling adequado
 - Use CDN para assets estaticos
 """
-        
+
         # Save report
-        report_file = Path(f"performance_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
-        report_file.write_text(report)
+        report_file = save_text(report, "performance_report")
         
         print(f"Relatorio salvo em: {report_file}")
         
         return report
     
-    def run_all_tests(self):
+    def run_all_tests(self, stress_duration=5):
         """Executar todos os testes"""
         print("\n" + "="*80)
         print("    INICIANDO TESTE ULTRA PERFORMANCE - SISTEMA DE EVENTOS")
@@ -211,15 +154,14 @@ RECOMENDACOES:
         
         # Check server
         print("\nVerificando conectividade com servidor...")
-        try:
-            response = requests.get(f"{self.base_url}/health", timeout=5)
-            if response.status_code == 200:
-                print("Servidor ONLINE!")
-            else:
-                print(f"Servidor retornou status {response.status_code}")
-        except Exception as e:
+        response = self.transport.request("GET", f"{self.base_url}/health")
+        if response.status == 200:
+            print("Servidor ONLINE!")
+        elif response.status:
+            print(f"Servidor retornou status {response.status}")
+        else:
             print(f"ERRO: Nao foi possivel conectar ao servidor em {self.base_url}")
-            print(f"Detalhes: {e}")
+            print(f"Detalhes: {response.error}")
             print("\nCertifique-se de que o servidor esta rodando:")
             print("  1. Execute: ATIVACAO_SUPREMA.bat")
             print("  2. Ou: python AUTO_DEPLOY_SUPREMO.py")
@@ -228,15 +170,24 @@ RECOMENDACOES:
         # Run tests
         self.test_api_response_time()
         self.test_concurrent_requests()
-        self.test_stress(duration=5)  # Short stress test
+        self.test_stress(duration=stress_duration)  # Short stress test
         
         # Generate report
         self.generate_report()
+        self.transport.close()
         
         print("\n" + "="*80)
         print("    TESTE ULTRA PERFORMANCE CONCLUIDO!")
         print("="*80)
 
 if __name__ == "__main__":
-    tester = UltraPerformanceTestSimple()
-    tester.run_all_tests()
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Teste de performance simplificado")
+    parser.add_argument("--url", default="http://localhost:8000", help="URL base do servidor")
+    parser.add_argument("--stress-duration", type=int, default=5, help="Duracao do teste de stress (s)")
+    
+    args = parser.parse_args()
+    
+    tester = UltraPerformanceTestSimple(base_url=args.url)
+    tester.run_all_tests(stress_duration=args.stress_duration)
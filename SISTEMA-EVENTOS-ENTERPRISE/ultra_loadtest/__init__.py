@@ -0,0 +1,30 @@
+"""
+⚙️ NÚCLEO DE TESTES DE CARGA - Sistema de Eventos
+Transporte (síncrono/assíncrono), laços de carga, métricas e relatórios
+compartilhados por TEST_ULTRA_PERFORMANCE, TEST_ULTRA_SIMPLE e TEST_MASTER_ULTRA,
+o profiler por amostragem (--profile), o rastreamento de alocações (--trace-alloc)
+e o relatório HTML com gráficos (python -m ultra_loadtest.htmlreport resultados.json ...)
+
+Somente a biblioteca padrão é obrigatória; aiohttp (AsyncTransport, stand-in
+WebSocket) e psutil (amostragem de processos) são importados sob demanda.
+"""
+
+from .allocations import AllocationTracker, format_checkpoint
+from .engine import closed_loop, closed_loop_async, open_loop, open_loop_level
+from .metrics import (PHASES, LatencyHistogram, PhaseRecorder, RunStats, TimeSeries, linear_trend, parse_slo,
+                      summarize)
+from .monitor import LoopMonitor, install_event_loop
+from .profiler import SamplingProfiler
+from .report import (Colors, grade_color, print_banner, print_client_health, print_latency, print_section,
+                     rating, save_json, save_text, strip_ansi)
+from .system import ProcessUsage, find_listening_pid, raise_fd_limit, sample_process_tree
+from .transport import AsyncTransport, Result, SyncTransport, phase_trace_config, phases_from_marks
+
+__all__ = [
+    "PHASES", "AllocationTracker", "AsyncTransport", "Colors", "LatencyHistogram", "LoopMonitor",
+    "PhaseRecorder", "ProcessUsage", "Result", "RunStats", "SamplingProfiler", "SyncTransport", "TimeSeries",
+    "closed_loop", "closed_loop_async", "find_listening_pid", "format_checkpoint", "grade_color",
+    "install_event_loop", "linear_trend", "open_loop", "open_loop_level", "parse_slo", "phase_trace_config",
+    "phases_from_marks", "print_banner", "print_client_health", "print_latency", "print_section",
+    "raise_fd_limit", "rating", "sample_process_tree", "save_json", "save_text", "strip_ansi", "summarize",
+]
@@ -0,0 +1,88 @@
+"""
+Leitura em streaming de access logs para replay (CLF/Combined, JSON lines e formato dos servidores master)
+"""
+
+import gzip
+import json
+import re
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+MONTHS = {name: i for i, name in enumerate(
+    ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)}
+
+# Common/Combined Log Format, com tempo de resposta opcional no fim (%D em µs ou $request_time em s)
+CLF_PATTERN = re.compile(
+    r'^\S+ \S+ \S+ \[(\d{2})/(\w{3})/(\d{4}):(\d{2}):(\d{2}):(\d{2}) ([+-]\d{4})\] '
+    r'"(\S+) (\S+)[^"]*" (\d{3}) \S+(?: "[^"]*" "[^"]*")?(?: (\d+(?:\.\d+)?))?')
+# BaseHTTPRequestHandler.log_message dos servidores master: [19/Oct/2026 14:55:01] "GET / HTTP/1.1" 200 -
+MASTER_PATTERN = re.compile(
+    r'^\[(\d{2})/(\w{3})/(\d{4}) (\d{2}):(\d{2}):(\d{2})\] "(\S+) (\S+)[^"]*" (\d{3})')
+ID_SEGMENT = re.compile(r"/(?:\d+|[0-9a-fA-F]{8}-[0-9a-fA-F-]{27,}|[0-9a-fA-F]{24,})(?=/|$)")
+
+def _log_timestamp(day, month, year, hour, minute, second, offset: Optional[str] = None) -> float:
+    tz = timezone.utc
+    if offset:
+        sign = -1 if offset[0] == "-" else 1
+        tz = timezone(sign * timedelta(hours=int(offset[1:3]), minutes=int(offset[3:5])))
+    when = datetime(int(year), MONTHS[month], int(day), int(hour), int(minute), int(second), tzinfo=tz)
+    return when.timestamp() if offset else when.replace(tzinfo=None).timestamp()
+
+def parse_log_line(line: str) -> Optional[Dict]:
+    """Uma linha de access log (JSON, CLF/Combined ou formato dos servidores master)"""
+    line = line.strip()
+    if line.startswith("{"):
+        try:
+            data = json.loads(line)
+            latency = data.get("duration_ms", data.get("latency_ms"))
+            if latency is None and data.get("request_time") is not None:
+                latency = float(data["request_time"]) * 1000
+            return {"ts": float(data["ts"]), "method": data.get("method", "GET").upper(), "path": data["path"],
+                    "status": int(data.get("status", 0)), "latency_ms": latency, "coarse": False}
+        except (ValueError, KeyError, TypeError):
+            return None
+    match = CLF_PATTERN.match(line)
+    if match:
+        groups = match.groups()
+        latency = groups[10]
+        if latency is not None:
+            latency = float(latency) * 1000 if "." in latency else int(latency) / 1000
+        return {"ts": _log_timestamp(*groups[:7]), "method": groups[7], "path": groups[8],
+                "status": int(groups[9]), "latency_ms": latency, "coarse": True}
+    match = MASTER_PATTERN.match(line)
+    if match:
+        groups = match.groups()
+        return {"ts": _log_timestamp(*groups[:6]), "method": groups[6], "path": groups[7],
+                "status": int(groups[8]), "latency_ms": None, "coarse": True}
+    return None
+
+def iter_access_log(path: Path, counters: Optional[Dict] = None) -> Iterator[Dict]:
+    """Leitura em streaming (.gz incluído); timestamps de 1s são espalhados dentro do segundo"""
+    opener = gzip.open if str(path).endswith(".gz") else open
+    group: List[Dict] = []
+
+    def flush():
+        for i, entry in enumerate(group):
+            entry["ts"] += i / len(group)
+        yield from group
+        group.clear()
+
+    with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            entry = parse_log_line(line)
+            if entry is None:
+                if counters is not None and line.strip():
+                    counters["unparsed"] = counters.get("unparsed", 0) + 1
+                continue
+            if group and (not entry["coarse"] or entry["ts"] != group[0]["ts"]):
+                yield from flush()
+            if entry["coarse"]:
+                group.append(entry)
+            else:
+                yield entry
+    yield from flush()
+
+def normalize_path(path: str) -> str:
+    """Agrupar caminhos por rota: sem query string e com IDs trocados por {id}"""
+    return ID_SEGMENT.sub("/{id}", path.split("?", 1)[0]) or "/"
@@ -0,0 +1,148 @@
+"""
+Rastreamento de alocações com tracemalloc (--trace-alloc)
+
+Snapshots em pontos de controle (por bateria ou a cada N segundos) comparados
+ao anterior: memória retida, blocos retidos por requisição, pico da janela e
+os locais de alocação que mais cresceram. O tracemalloc só enxerga blocos
+vivos, então "por requisição" é o saldo retido, não o volume alocado e liberado.
+"""
+
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Alocações do próprio rastreamento e do import de módulos não interessam
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+def format_checkpoint(entry: Dict, top: int = 5, indent: str = "  ") -> str:
+    """Linhas de console de um ponto de controle"""
+    per_request = (f" | {entry['bytes_per_request']:+.0f} B/req, {entry['blocks_per_request']:+.2f} blocos/req"
+                   if entry["requests"] else "")
+    lines = [f"{indent}[ALLOC] {entry['label']}: retido {entry['retained_kb']:+.1f}KB "
+             f"({entry['retained_blocks']:+d} blocos) | atual {entry['current_kb']:.0f}KB | "
+             f"pico +{entry['window_peak_kb']:.0f}KB | {entry['requests']} req{per_request}"]
+    for site in entry["top"][:top]:
+        lines.append(f"{indent}    {site['size_diff_kb']:+9.1f}KB {site['count_diff']:+7d}  {site['site']}")
+    return "\n".join(lines)
+
+class AllocationTracker:
+    """Snapshots do tracemalloc comparados entre pontos de controle.
+
+    Servidores chamam count_request() por requisição; checkpoint() usa essa
+    contagem quando a bateria não informa a sua.
+    """
+
+    def __init__(self, frames: int = 1, top: int = 10):
+        self.frames = frames
+        self.top = top
+        self.checkpoints: List[Dict] = []
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._previous = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> "AllocationTracker":
+        tracemalloc.start(self.frames)
+        self._rebase()
+        return self
+
+    def count_request(self):
+        with self._lock:
+            self._requests += 1
+
+    def _rebase(self, snapshot=None):
+        if snapshot is None:
+            with self._lock:
+                self._requests = 0
+            snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        self._started = time.perf_counter()
+        self._previous = snapshot
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+
+    def checkpoint(self, label: str, requests: Optional[int] = None) -> Dict:
+        """Comparar com o ponto anterior e começar uma nova janela"""
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        diff = snapshot.compare_to(self._previous, "lineno" if self.frames == 1 else "traceback")
+        with self._lock:
+            counted, self._requests = self._requests, 0
+        requests = counted if requests is None else requests
+        retained = sum(stat.size_diff for stat in diff)
+        blocks = sum(stat.count_diff for stat in diff)
+        entry = {
+            "label": label,
+            "elapsed_s": round(time.perf_counter() - self._started, 2),
+            "requests": requests,
+            "current_kb": round(current / 1024, 1),
+            "window_peak_kb": round(max(0, peak - self._baseline) / 1024, 1),
+            "retained_kb": round(retained / 1024, 1),
+            "retained_blocks": blocks,
+            "bytes_per_request": round(retained / requests, 1) if requests else None,
+            "blocks_per_request": round(blocks / requests, 3) if requests else None,
+            "top": [{"site": str(stat.traceback[0]) if self.frames == 1 else " <- ".join(
+                         str(frame) for frame in reversed(stat.traceback)),
+                     "size_diff_kb": round(stat.size_diff / 1024, 1),
+                     "count_diff": stat.count_diff,
+                     "size_kb": round(stat.size / 1024, 1)}
+                    for stat in diff[:self.top] if stat.size_diff],
+        }
+        self.checkpoints.append(entry)
+        # Linha de base medida sem o diff vivo, senão o pico da próxima janela sai subestimado
+        del diff
+        self._rebase(snapshot)
+        return entry
+
+    @contextmanager
+    def measure(self, label: str) -> Iterator[Dict]:
+        """Janela em volta de uma bateria; defina info["requests"] dentro do bloco"""
+        self._rebase()
+        info: Dict = {}
+        yield info
+        info.update(self.checkpoint(label, info.get("requests")))
+
+    def start_periodic(self, interval: float, on_checkpoint: Callable[[Dict], None] = None,
+                       label: str = "janela") -> "AllocationTracker":
+        """Ponto de controle a cada interval segundos em thread daemon (servidores)"""
+        def run():
+            while not self._stop.wait(interval):
+                entry = self.checkpoint(label)
+                if on_checkpoint is not None:
+                    on_checkpoint(entry)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="allocation-tracker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, label: str = "final") -> List[Dict]:
+        """Encerrar (com um último ponto de controle se houve requisições) e desligar o tracemalloc"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if tracemalloc.is_tracing():
+            if self._requests:
+                self.checkpoint(label)
+            tracemalloc.stop()
+        return self.checkpoints
+
+    def summary(self) -> Dict:
+        """Totais do rastreamento para o JSON de resultados"""
+        requests = sum(entry["requests"] for entry in self.checkpoints)
+        retained = sum(entry["retained_kb"] for entry in self.checkpoints)
+        return {
+            "frames": self.frames,
+            "requests": requests,
+            "retained_kb": round(retained, 1),
+            "bytes_per_request": round(retained * 1024 / requests, 1) if requests else None,
+            "checkpoints": self.checkpoints,
+        }
@@ -0,0 +1,180 @@
+"""
+Laços de geração de carga sobre um transporte
+
+- closed_loop / closed_loop_async: N usuários em laço contínuo (por número de requisições ou duração)
+- open_loop: chegadas a taxa fixa, independentes das respostas (sem coordinated omission)
+"""
+
+import asyncio
+import itertools
+import math
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from .metrics import LatencyHistogram, RunStats, TimeSeries
+from .monitor import LoopMonitor
+
+ProgressCallback = Callable[[RunStats, float], None]
+
+def _new_stats(duration: Optional[float], window: Optional[float]) -> RunStats:
+    stats = RunStats()
+    if window:
+        stats.series = TimeSeries(duration or 0.0, window)
+    return stats
+
+def closed_loop(transport, method: str, url: str, body=None, concurrency: int = 10,
+                requests: Optional[int] = None, duration: Optional[float] = None,
+                progress: Optional[ProgressCallback] = None, progress_interval: float = 0.5,
+                window: Optional[float] = None) -> RunStats:
+    """Usuários em threads, cada um disparando a próxima requisição assim que recebe a anterior.
+
+    window (segundos) liga a série temporal (RunStats.series) com erros e latência por balde.
+    """
+    if requests is None and duration is None:
+        raise ValueError("Informe requests ou duration")
+    tickets = itertools.count() if requests is not None else None
+    workers = [_new_stats(duration, window) for _ in range(concurrency)]
+    start = time.perf_counter()
+    deadline = start + duration if duration is not None else math.inf
+
+    def worker(stats: RunStats):
+        while True:
+            if tickets is not None and next(tickets) >= requests:
+                return
+            if time.perf_counter() >= deadline:
+                return
+            result = transport.request(method, url, body)
+            stats.record(result, time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(stats,), daemon=True) for stats in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        while thread.is_alive():
+            thread.join(progress_interval)
+            if progress is not None and thread.is_alive():
+                # Leitura sem lock: só para exibição, pode estar uma requisição atrasada
+                snapshot = RunStats()
+                snapshot.requests = sum(stats.requests for stats in workers)
+                snapshot.errors = sum(stats.errors for stats in workers)
+                if window:
+                    snapshot.series = TimeSeries(window=window)
+                    for stats in workers:
+                        snapshot.series.merge(stats.series, latency=False)
+                progress(snapshot, time.perf_counter() - start)
+
+    total = RunStats()
+    for stats in workers:
+        total.merge(stats)
+    total.duration = time.perf_counter() - start
+    return total
+
+async def closed_loop_async(transport, method: str, url: str, body=None, concurrency: int = 100,
+                            requests: Optional[int] = None, duration: Optional[float] = None,
+                            progress: Optional[ProgressCallback] = None,
+                            progress_interval: float = 0.5, window: Optional[float] = None) -> RunStats:
+    """Usuários como tarefas asyncio em laço contínuo (sem barreira entre lotes); window como em closed_loop"""
+    if requests is None and duration is None:
+        raise ValueError("Informe requests ou duration")
+    stats = _new_stats(duration, window)
+    remaining = [requests] if requests is not None else None
+    start = time.perf_counter()
+    deadline = start + duration if duration is not None else math.inf
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            if remaining is not None:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            result = await transport.request(method, url, body)
+            stats.record(result, time.perf_counter() - start)
+
+    async def reporter():
+        while True:
+            await asyncio.sleep(progress_interval)
+            progress(stats, time.perf_counter() - start)
+
+    reporter_task = asyncio.ensure_future(reporter()) if progress is not None else None
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        if reporter_task is not None:
+            reporter_task.cancel()
+    stats.duration = time.perf_counter() - start
+    return stats
+
+async def open_loop(transport, method: str, url: str, body, rate: float, duration: float,
+                    on_result: Callable[[float, Optional[float]], None], max_in_flight: int = 10000) -> Dict:
+    """Disparar requisições a uma taxa fixa (open loop), independente das respostas.
+
+    on_result(offset_s, latência_ms) é chamado uma vez por requisição planejada;
+    latência None indica erro ou descarte. A latência conta desde o envio planejado
+    (inclui o atraso do próprio gerador, sem coordinated omission).
+    """
+    schedule_lag = LatencyHistogram()
+    dropped = 0
+    in_flight = set()
+
+    async def fire(intended: float, offset: float):
+        result = await transport.request(method, url, body, start=intended)
+        on_result(offset, result.latency_ms if result.ok else None)
+
+    t0 = time.perf_counter()
+    last = math.ceil(duration * rate)
+    i = 0
+    while i < last:
+        now = time.perf_counter() - t0
+        due = min(int(now * rate) + 1, last)
+        while i < due:
+            offset = i / rate
+            schedule_lag.record(max(0.0, now - offset) * 1000)
+            if len(in_flight) >= max_in_flight:
+                dropped += 1
+                on_result(offset, None)
+            else:
+                task = asyncio.ensure_future(fire(t0 + offset, offset))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            i += 1
+        await asyncio.sleep(max(0.0, min(0.01, i / rate - (time.perf_counter() - t0))))
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    return {"sent": i, "dropped": dropped, "schedule_lag": schedule_lag}
+
+async def open_loop_level(transport, method: str, url: str, body, rate: float,
+                          duration: float, warmup: float = 1.0) -> Dict:
+    """Um patamar de taxa fixa, com aquecimento descartado, latência por metade do patamar
+    e veredito do gerador (lag do loop/CPU) em "client"
+    """
+    halves = (LatencyHistogram(), LatencyHistogram())
+    counters = {"sent": 0, "errors": 0}
+
+    def on_result(offset: float, latency_ms: Optional[float]):
+        if offset < warmup:
+            return
+        counters["sent"] += 1
+        if latency_ms is None:
+            counters["errors"] += 1
+        else:
+            halves[0 if offset < warmup + duration / 2 else 1].record(latency_ms)
+
+    async with LoopMonitor() as monitor:
+        run = await open_loop(transport, method, url, body, rate, warmup + duration, on_result)
+
+    latency = LatencyHistogram()
+    for half in halves:
+        latency.merge(half)
+    return {
+        "rate_rps": round(rate, 1),
+        "duration_s": round(duration, 1),
+        "requests": counters["sent"],
+        "achieved_rps": round(latency.count / duration, 1),
+        "error_rate": round(counters["errors"] / counters["sent"], 4) if counters["sent"] else 1.0,
+        "dropped": run["dropped"],
+        "latency": latency.summary(),
+        "halves": halves,
+        "schedule_lag_p99_ms": round(run["schedule_lag"].percentile(99), 2),
+        "client": monitor.verdict(latency.percentile(99)),
+    }
@@ -0,0 +1,380 @@
+"""
+Relatório HTML autocontido a partir de um ou mais JSON de resultados
+
+    python -m ultra_loadtest.htmlreport resultados_a.json resultados_b.json -o relatorio.html
+
+Gráficos em SVG gerados aqui (sem JavaScript nem CDN) e os dados, já reduzidos
+por LTTB, embutidos no próprio arquivo: abre na hora mesmo para soaks de horas.
+Aceita os resultados de TEST_ULTRA_PERFORMANCE e de TEST_MASTER_ULTRA.
+"""
+
+import html
+import json
+import math
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .report import _timestamped
+
+Point = Tuple[float, float]
+
+PALETTE = ("#4ade80", "#22d3ee", "#fbbf24", "#f87171", "#c084fc", "#f472b6", "#a3e635", "#fb923c")
+MAX_POINTS = 500
+# Eixo do espectro: x = -log10(1 - p), p = 100% desenhado como "max"
+SPECTRUM_MAX_X = 5.0
+
+def lttb(points: Sequence[Point], threshold: int) -> List[Point]:
+    """Largest-Triangle-Three-Buckets: reduzir a série a `threshold` pontos preservando picos e vales"""
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    chosen = 0
+    for i in range(threshold - 2):
+        # Terceiro vértice: média do bucket seguinte
+        start = int((i + 1) * every) + 1
+        end = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(point[0] for point in points[start:end]) / (end - start)
+        avg_y = sum(point[1] for point in points[start:end]) / (end - start)
+        # Do bucket atual fica o ponto que forma o maior triângulo com o último escolhido
+        ax, ay = points[chosen]
+        best, best_area = start - 1, -1.0
+        for j in range(int(i * every) + 1, start):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        chosen = best
+    sampled.append(points[-1])
+    return sampled
+
+def _first(results: Dict, *keys: str) -> Optional[Dict]:
+    """Primeiro bloco presente: lista (TEST_ULTRA_PERFORMANCE) ou dict (TEST_MASTER_ULTRA)"""
+    for key in keys:
+        value = results.get(key)
+        if isinstance(value, list) and value:
+            return value[-1]
+        if isinstance(value, dict) and value:
+            return value
+    return None
+
+def _number(value) -> Optional[float]:
+    """Aceitar 99.5, "99.5%" ou None"""
+    if isinstance(value, str):
+        value = value.rstrip("%")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def load_run(path) -> Dict:
+    """Ler um JSON de resultados com o rótulo usado nas legendas"""
+    path = Path(path)
+    results = json.loads(path.read_text(encoding="utf-8"))
+    meta = results.get("meta", {})
+    return {"label": meta.get("label") or path.stem, "path": str(path), "meta": meta, "results": results}
+
+def _stress_series(run: Dict, key: str) -> Optional[List[Point]]:
+    stress = _first(run["results"], "stress_tests", "stress_test") or {}
+    series = stress.get("timeseries") or {}
+    if key not in series:
+        return None
+    return [(t, v) for t, v in zip(series["t_s"], series[key]) if v is not None]
+
+def _soak_series(run: Dict, key: str) -> Optional[List[Point]]:
+    soak = _first(run["results"], "soak_tests")
+    if not soak or not soak.get("windows"):
+        return None
+    return [(w["minute"], w[key]) for w in soak["windows"] if key in w]
+
+def _spectrum(block: Optional[Dict]) -> Optional[List[Point]]:
+    if not block or not block.get("percentiles"):
+        return None
+    return [(min(SPECTRUM_MAX_X, -math.log10(max(1e-9, 1 - p / 100))), ms) for p, ms in block["percentiles"]]
+
+def _percentile_label(x: float) -> str:
+    return "max" if x >= SPECTRUM_MAX_X else f"p{100 - 100 * 10 ** -x:.4g}"
+
+def _load_curve(run: Dict, key: str) -> Optional[List[Point]]:
+    levels = run["results"].get("load_tests") or []
+    points = [(level["concurrent_users"], level[key]) for level in levels if key in level]
+    return sorted(points) or None
+
+def _ticks(lo: float, hi: float, count: int = 5) -> List[float]:
+    if hi <= lo:
+        hi = lo + 1
+    raw = (hi - lo) / count
+    magnitude = 10 ** math.floor(math.log10(raw))
+    step = next(m * magnitude for m in (1, 2, 5, 10) if m * magnitude >= raw)
+    ticks, value = [], math.floor(lo / step) * step
+    while value <= hi + step * 1e-9:
+        ticks.append(round(value, 10))
+        value += step
+    return ticks
+
+def _fmt(value: float) -> str:
+    return f"{value:,.0f}" if abs(value) >= 1000 else f"{value:.4g}"
+
+def svg_chart(series: List[Dict], x_label: str, y_label: str,
+              x_ticks: Optional[List[Tuple[float, str]]] = None, x_format: Callable[[float], str] = None,
+              width: int = 640, height: int = 300) -> str:
+    """Gráfico de linhas; series = [{"name", "points", "color", "dash"}]"""
+    x_format = x_format or _fmt
+    left, right, top, bottom = 64, 16, 12, 44
+    xs = [x for s in series for x, _ in s["points"]]
+    ys = [y for s in series for _, y in s["points"]]
+    if not xs:
+        return '<p class="empty">Sem dados</p>'
+    x_lo, x_hi = min(xs), max(xs)
+    if x_hi == x_lo:
+        x_lo, x_hi = x_lo - 1, x_hi + 1
+    y_grid = _ticks(0.0, max(ys) * 1.05 or 1.0)
+    y_hi = y_grid[-1]
+    plot_w, plot_h = width - left - right, height - top - bottom
+
+    def sx(x: float) -> float:
+        return left + (x - x_lo) / (x_hi - x_lo) * plot_w
+
+    def sy(y: float) -> float:
+        return top + plot_h - y / y_hi * plot_h
+
+    parts = [f'<svg viewBox="0 0 {width} {height}" class="chart" role="img">']
+    for y in y_grid:
+        parts.append(f'<line x1="{left}" x2="{width - right}" y1="{sy(y):.1f}" y2="{sy(y):.1f}" class="grid"/>'
+                     f'<text x="{left - 6}" y="{sy(y) + 4:.1f}" text-anchor="end">{_fmt(y)}</text>')
+    for x, label in x_ticks or [(x, _fmt(x)) for x in _ticks(x_lo, x_hi, 6) if x_lo <= x <= x_hi]:
+        parts.append(f'<line x1="{sx(x):.1f}" x2="{sx(x):.1f}" y1="{top}" y2="{top + plot_h}" class="grid"/>'
+                     f'<text x="{sx(x):.1f}" y="{top + plot_h + 16}" text-anchor="middle">{html.escape(label)}</text>')
+    parts.append(f'<text x="{left + plot_w / 2:.0f}" y="{height - 6}" text-anchor="middle" class="axis">'
+                 f'{html.escape(x_label)}</text>')
+    parts.append(f'<text x="14" y="{top + plot_h / 2:.0f}" text-anchor="middle" class="axis" '
+                 f'transform="rotate(-90 14 {top + plot_h / 2:.0f})">{html.escape(y_label)}</text>')
+    for s in series:
+        path = " ".join(f"{'M' if i == 0 else 'L'}{sx(x):.1f},{sy(y):.1f}" for i, (x, y) in enumerate(s["points"]))
+        dash = ' stroke-dasharray="6 4"' if s.get("dash") else ""
+        parts.append(f'<path d="{path}" stroke="{s["color"]}"{dash} class="line"/>')
+        if len(s["points"]) <= 40:
+            # Poucos pontos: marcadores com valor ao passar o mouse
+            for x, y in s["points"]:
+                parts.append(f'<circle cx="{sx(x):.1f}" cy="{sy(y):.1f}" r="3" fill="{s["color"]}">'
+                             f'<title>{html.escape(s["name"])}: {_fmt(y)} @ {x_format(x)}</title></circle>')
+    parts.append("</svg>")
+    legend = "".join(f'<span><i style="background:{s["color"]}"></i>{html.escape(s["name"])}</span>' for s in series)
+    return "".join(parts) + f'<div class="legend">{legend}</div>'
+
+def _chart_specs(runs: List[Dict]) -> List[Dict]:
+    """Gráficos com dados em pelo menos uma execução; uma série por execução (e métrica)"""
+    specs = []
+
+    def add(title: str, x_label: str, y_label: str, metrics: Sequence[Tuple[str, Callable, bool]], **options):
+        series = []
+        for index, run in enumerate(runs):
+            color = PALETTE[index % len(PALETTE)]
+            for name, getter, dash in metrics:
+                points = getter(run)
+                if points:
+                    label = f"{run['label']} {name}".strip() if len(metrics) > 1 or len(runs) > 1 else name
+                    series.append({"name": label or run["label"], "points": points, "color": color, "dash": dash})
+        if series:
+            specs.append(dict(title=title, x_label=x_label, y_label=y_label, series=series, **options))
+
+    add("Stress: vazão por segundo", "segundos", "RPS", [("", lambda r: _stress_series(r, "rps"), False)])
+    add("Stress: latência ao longo do tempo", "segundos", "ms",
+        [("P99", lambda r: _stress_series(r, "p99_ms"), False), ("P50", lambda r: _stress_series(r, "p50_ms"), True)])
+    add("Soak: latência ao longo do tempo", "minutos", "ms",
+        [("P99", lambda r: _soak_series(r, "p99_ms"), False), ("P50", lambda r: _soak_series(r, "p50_ms"), True)])
+    add("Soak: memória do servidor", "minutos", "RSS (MB)", [("", lambda r: _soak_series(r, "rss_mb"), False)])
+    spectrum_ticks = [(0.0, "0%"), (1.0, "90%"), (2.0, "99%"), (3.0, "99.9%"), (4.0, "99.99%"),
+                      (SPECTRUM_MAX_X, "max")]
+    add("Espectro de percentis: stress", "percentil", "ms",
+        [("", lambda r: _spectrum(_first(r["results"], "stress_tests", "stress_test")), False)],
+        x_ticks=spectrum_ticks, x_format=_percentile_label)
+    for endpoint in dict.fromkeys(test["endpoint"] for run in runs for test in run["results"].get("api_tests", [])
+                                  if test.get("percentiles")):
+        add(f"Espectro de percentis: {endpoint}", "percentil", "ms",
+            [("", lambda r, e=endpoint: _spectrum(next((t for t in r["results"].get("api_tests", [])
+                                                        if t["endpoint"] == e), None)), False)],
+            x_ticks=spectrum_ticks, x_format=_percentile_label)
+    add("RPS × usuários simultâneos", "usuários simultâneos", "RPS", [("", lambda r: _load_curve(r, "rps"), False)])
+    add("Latência × usuários simultâneos", "usuários simultâneos", "ms",
+        [("P99", lambda r: _load_curve(r, "p99_response_ms"), False),
+         ("P95", lambda r: _load_curve(r, "p95_response_ms"), True)])
+    for endpoint in dict.fromkeys(test["endpoint"] for run in runs
+                                  for test in run["results"].get("capacity_tests", [])):
+        def capacity(run: Dict, endpoint=endpoint) -> Optional[List[Point]]:
+            test = next((t for t in run["results"].get("capacity_tests", []) if t["endpoint"] == endpoint), None)
+            if not test:
+                return None
+            return sorted((level["rate_rps"], level["latency"]["p99_ms"]) for level in test["levels"]
+                          if level["latency"].get("count"))
+        add(f"Capacidade {endpoint}: P99 × taxa oferecida", "RPS oferecido", "P99 (ms)",
+            [("", capacity, False)])
+    return specs
+
+# (rótulo, extrator, maior é melhor)
+COMPARISON: List[Tuple[str, Callable[[Dict], Optional[float]], bool]] = [
+    ("API: latência média (ms)", lambda r: (sum(t["avg_ms"] for t in r.get("api_tests", []))
+                                           / len(r["api_tests"])) if r.get("api_tests") else None, False),
+    ("API: pior P99 (ms)", lambda r: max((t["p99_ms"] for t in r.get("api_tests", [])), default=None), False),
+    ("Carga: RPS máximo", lambda r: max((t["rps"] for t in r.get("load_tests", [])), default=None), True),
+    ("Stress: RPS médio", lambda r: _number((_first(r, "stress_tests", "stress_test") or {}).get("avg_rps")), True),
+    ("Stress: pico RPS", lambda r: _number((_first(r, "stress_tests", "stress_test") or {}).get("peak_rps")), True),
+    ("Stress: RPS estável", lambda r: _number((_first(r, "stress_tests", "stress_test") or {}).get("steady_rps")), True),
+    ("Stress: vale RPS", lambda r: _number((_first(r, "stress_tests", "stress_test") or {}).get("trough_rps")),
+     True),
+    ("Stress: P99 (ms)", lambda r: _number((_first(r, "stress_tests", "stress_test") or {}).get("p99_response_ms")),
+     False),
+    ("Stress: sucesso (%)", lambda r: _number((_first(r, "stress_tests", "stress_test") or {}).get("success_rate")),
+     True),
+    ("Capacidade: soma dos joelhos (RPS)", lambda r: sum(t["knee_rps"] for t in r["capacity_tests"])
+     if r.get("capacity_tests") else None, True),
+    ("Soak: deriva P99 (ms/h)", lambda r: (_first(r, "soak_tests") or {}).get("trends", {}).get("p99_ms_per_hour"),
+     False),
+    ("Soak: RSS (MB/h)", lambda r: (_first(r, "soak_tests") or {}).get("trends", {}).get("rss_mb_per_hour"), False),
+    ("Alocações retidas (B/req)", lambda r: (r.get("allocations") or {}).get("bytes_per_request"), False),
+]
+
+def _comparison_table(runs: List[Dict]) -> str:
+    """Métricas-chave lado a lado; variação contra a primeira execução (base)"""
+    header = "".join(f"<th>{html.escape(run['label'])}</th>" for run in runs)
+    rows = []
+    for label, getter, higher_is_better in COMPARISON:
+        values = []
+        for run in runs:
+            try:
+                values.append(getter(run["results"]))
+            except (KeyError, TypeError, ZeroDivisionError):
+                values.append(None)
+        if all(value is None for value in values):
+            continue
+        base = values[0]
+        cells = []
+        for index, value in enumerate(values):
+            if value is None:
+                cells.append("<td>-</td>")
+                continue
+            delta = ""
+            if index and base:
+                change = (value - base) / abs(base) * 100
+                better = change > 0 if higher_is_better else change < 0
+                css = "same" if abs(change) < 5 else "better" if better else "worse"
+                delta = f' <small class="{css}">{change:+.0f}%</small>'
+            cells.append(f"<td>{_fmt(value)}{delta}</td>")
+        rows.append(f"<tr><th>{html.escape(label)}</th>{''.join(cells)}</tr>")
+    if not rows:
+        return '<p class="empty">Nenhuma métrica comparável</p>'
+    return f'<table><tr><th>Métrica</th>{header}</tr>{"".join(rows)}</table>'
+
+def _alerts(runs: List[Dict]) -> str:
+    """Avisos registrados nos resultados: soak, gerador saturado, patamares inválidos"""
+    items = []
+    for run in runs:
+        results = run["results"]
+        for alert in (_first(results, "soak_tests") or {}).get("alerts", []):
+            items.append((run["label"], alert))
+        for name, tests in results.items():
+            for test in tests if isinstance(tests, list) else []:
+                client = test.get("client") if isinstance(test, dict) else None
+                if client and not client["valid"]:
+                    items.append((run["label"], f"{name}: gerador saturado ({', '.join(client['reasons'])})"))
+    if not items:
+        return ""
+    lines = "".join(f"<li><b>{html.escape(label)}</b>: {html.escape(text)}</li>" for label, text in items)
+    return f'<section class="card"><h2>⚠️ Alertas</h2><ul>{lines}</ul></section>'
+
+STYLE = """
+* { margin: 0; padding: 0; box-sizing: border-box; }
+body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
+       background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: #fff; min-height: 100vh; padding: 20px; }
+.container { max-width: 1400px; margin: 0 auto; }
+header { text-align: center; margin-bottom: 30px; }
+header h1 { font-size: 2.2rem; margin-bottom: 8px; text-shadow: 2px 2px 4px rgba(0,0,0,0.3); }
+header p { opacity: 0.9; }
+.grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(560px, 1fr)); gap: 20px; margin-bottom: 20px; }
+.card { background: rgba(255,255,255,0.1); border-radius: 15px; padding: 20px; margin-bottom: 20px;
+        border: 1px solid rgba(255,255,255,0.2); }
+.card h2 { font-size: 1.1rem; margin-bottom: 12px; opacity: 0.95; }
+table { width: 100%; border-collapse: collapse; font-size: 0.95rem; }
+th, td { padding: 6px 10px; text-align: right; border-bottom: 1px solid rgba(255,255,255,0.15); }
+tr th:first-child { text-align: left; font-weight: 500; }
+small.better { color: #4ade80; } small.worse { color: #f87171; } small.same { opacity: 0.7; }
+.chart { width: 100%; height: auto; }
+.chart text { fill: rgba(255,255,255,0.8); font-size: 11px; }
+.chart text.axis { font-size: 12px; fill: #fff; }
+.chart .grid { stroke: rgba(255,255,255,0.15); }
+.chart .line { fill: none; stroke-width: 2; }
+.legend { display: flex; flex-wrap: wrap; gap: 14px; margin-top: 6px; font-size: 0.85rem; }
+.legend i { display: inline-block; width: 12px; height: 12px; border-radius: 3px; margin-right: 5px; }
+.empty { opacity: 0.7; }
+ul { margin-left: 20px; line-height: 1.6; }
+"""
+
+def build_html_report(paths: Sequence, max_points: int = MAX_POINTS, title: str = "Relatório de Performance") -> str:
+    """HTML completo (um arquivo) comparando as execuções na ordem dada; a primeira é a base"""
+    runs = [load_run(path) for path in paths]
+    specs = _chart_specs(runs)
+    for spec in specs:
+        for series in spec["series"]:
+            series["points"] = [(round(x, 4), round(y, 3)) for x, y in lttb(series["points"], max_points)]
+
+    runs_list = "".join(
+        f"<tr><th>{html.escape(run['label'])}</th><td>{html.escape(run['meta'].get('tool', '-'))}</td>"
+        f"<td>{html.escape(run['meta'].get('base_url', '-'))}</td>"
+        f"<td>{html.escape(str(run['meta'].get('generated_at', '-')))}</td>"
+        f"<td>{html.escape(run['path'])}</td></tr>" for run in runs)
+    charts = "".join(
+        f'<section class="card"><h2>{html.escape(spec["title"])}</h2>'
+        + svg_chart(spec["series"], spec["x_label"], spec["y_label"], spec.get("x_ticks"), spec.get("x_format"))
+        + "</section>" for spec in specs)
+    data = {
+        "runs": [{"label": run["label"], "path": run["path"], "meta": run["meta"]} for run in runs],
+        "charts": [{"title": spec["title"], "x_label": spec["x_label"], "y_label": spec["y_label"],
+                    "series": [{"name": s["name"], "points": s["points"]} for s in spec["series"]]}
+                   for spec in specs],
+    }
+    # "</" fecharia o <script> antes da hora
+    embedded = json.dumps(data, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{html.escape(title)}</title>
+<style>{STYLE}</style>
+</head>
+<body>
+<div class="container">
+<header><h1>📊 {html.escape(title)}</h1><p>{len(runs)} execução(ões) · base de comparação: {html.escape(runs[0]['label'])}</p></header>
+<section class="card"><h2>Execuções</h2><table><tr><th>Rótulo</th><th>Ferramenta</th><th>URL</th><th>Gerado em</th><th>Arquivo</th></tr>{runs_list}</table></section>
+<section class="card"><h2>Comparação</h2>{_comparison_table(runs)}</section>
+{_alerts(runs)}
+<div class="grid">{charts or '<section class="card"><p class="empty">Nenhuma série temporal nos resultados</p></section>'}</div>
+</div>
+<script type="application/json" id="report-data">{embedded}</script>
+</body>
+</html>
+"""
+
+def write_html_report(paths: Sequence, output: Optional[Path] = None, prefix: str = "performance_report",
+                      **options) -> Path:
+    """Gravar o relatório em output (padrão: <prefix>_<timestamp>.html)"""
+    path = Path(output) if output else _timestamped(prefix, ".html")
+    path.write_text(build_html_report(paths, **options), encoding="utf-8")
+    return path
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Relatório HTML autocontido a partir de JSON de resultados")
+    parser.add_argument("results", nargs="+", help="Arquivos de resultados (o primeiro é a base da comparação)")
+    parser.add_argument("-o", "--output", default=None, help="Arquivo HTML de saída")
+    parser.add_argument("--max-points", type=int, default=MAX_POINTS, help="Pontos por série após o LTTB")
+    parser.add_argument("--title", default="Relatório de Performance", help="Título do relatório")
+
+    args = parser.parse_args()
+
+    output = write_html_report(args.results, args.output, max_points=args.max_points, title=args.title)
+    print(f"Relatório salvo em: {output}")
@@ -0,0 +1,377 @@
+"""
+Núcleo de métricas: histogramas de latência, fases da requisição e estatísticas de execução
+"""
+
+import math
+import re
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+PHASES = ("dns", "connect", "tls", "ttfb", "body", "total")
+# Espectro de percentis (relatório HTML): denso na cauda, onde mora a diferença entre execuções
+SPECTRUM = (0, 10, 25, 50, 75, 90, 95, 99, 99.5, 99.9, 99.99, 100)
+
+class LatencyHistogram:
+    """Histograma log-linear de latências em ms (erro relativo ~1% nos percentis)"""
+
+    def __init__(self, min_ms: float = 0.001, max_ms: float = 120000.0, precision: float = 0.01):
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self._growth = math.log1p(2 * precision)
+        # array de inteiros nativos: record() sem overhead de escalares NumPy
+        self.counts = array("q", bytes(8 * (int(math.log(max_ms / min_ms) / self._growth) + 2)))
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, value_ms: float) -> int:
+        if value_ms <= self.min_ms:
+            return 0
+        return min(len(self.counts) - 1, int(math.log(value_ms / self.min_ms) / self._growth) + 1)
+
+    def record(self, value_ms: float):
+        self.counts[self._index(value_ms)] += 1
+        self.count += 1
+        self.sum += value_ms
+        if value_ms < self.min:
+            self.min = value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def merge(self, other: "LatencyHistogram"):
+        if not other.count:
+            return
+        counts = self.counts
+        for index, value in enumerate(other.counts):
+            if value:
+                counts[index] += value
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for index, value in enumerate(self.counts):
+            seen += value
+            if seen >= rank:
+                break
+        # Ponto médio geométrico do bucket, limitado aos extremos observados
+        value = self.min_ms if index == 0 else self.min_ms * math.exp((index - 0.5) * self._growth)
+        return min(max(value, self.min), self.max)
+
+    def spectrum(self, percentiles: Sequence[float] = SPECTRUM) -> List[List[float]]:
+        """[[percentil, ms], ...] para o gráfico de espectro"""
+        if not self.count:
+            return []
+        return [[p, round(self.percentile(p), 3)] for p in percentiles]
+
+    def summary(self) -> Dict:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "avg_ms": round(self.sum / self.count, 3),
+            "min_ms": round(self.min, 3),
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self.max, 3),
+        }
+
+class PhaseRecorder:
+    """Um LatencyHistogram por fase da requisição"""
+
+    def __init__(self):
+        self.histograms = {phase: LatencyHistogram() for phase in PHASES}
+
+    def record(self, phases: Dict[str, float]):
+        for phase, value in phases.items():
+            self.histograms[phase].record(value)
+
+    def merge(self, other: "PhaseRecorder"):
+        for phase, histogram in other.histograms.items():
+            self.histograms[phase].merge(histogram)
+
+    def summary(self) -> Dict[str, Dict]:
+        return {phase: h.summary() for phase, h in self.histograms.items() if h.count}
+
+    def format_line(self, p: float = 99) -> str:
+        return " | ".join(f"{phase} {self.histograms[phase].percentile(p):.2f}" if self.histograms[phase].count
+                          else f"{phase} -" for phase in PHASES) + " ms"
+
+class TimeSeries:
+    """Baldes de `window` segundos com conclusões, erros e latência, pré-alocados para a duração prevista.
+
+    Só baldes completos entram na análise: o último, parcial, subestimaria a vazão.
+    """
+
+    # Histogramas por balde mais grossos (~5%): centenas de baldes sem multiplicar a memória
+    BUCKET_PRECISION = 0.05
+    # Fim do aquecimento: balde e média móvel de 3 baldes a 10% da mediana da segunda metade
+    WARMUP_TOLERANCE = 0.10
+    # Regime estável: coeficiente de variação da vazão após o aquecimento
+    STEADY_MAX_CV = 0.15
+
+    def __init__(self, duration: float = 0.0, window: float = 1.0):
+        if window <= 0:
+            raise ValueError("window deve ser positivo")
+        self.window = window
+        self.used = 0
+        self._allocate(max(1, math.ceil(duration / window)))
+
+    def _allocate(self, size: int):
+        self.completions = array("q", bytes(8 * size))
+        self.errors = array("q", bytes(8 * size))
+        self.latency: List[Optional[LatencyHistogram]] = [None] * size
+
+    def _grow(self, size: int):
+        # Respostas após o prazo (ou execução por número de requisições) caem além da pré-alocação
+        extra = size - len(self.completions)
+        self.completions.extend(array("q", bytes(8 * extra)))
+        self.errors.extend(array("q", bytes(8 * extra)))
+        self.latency.extend([None] * extra)
+
+    def _bucket_histogram(self, index: int) -> LatencyHistogram:
+        histogram = self.latency[index]
+        if histogram is None:
+            histogram = self.latency[index] = LatencyHistogram(precision=self.BUCKET_PRECISION)
+        return histogram
+
+    def record(self, offset: float, ok: bool, latency_ms: Optional[float] = None):
+        index = int(offset / self.window)
+        if index >= len(self.completions):
+            self._grow(max(index + 1, 2 * len(self.completions)))
+        self.completions[index] += 1
+        if not ok:
+            self.errors[index] += 1
+        if latency_ms is not None:
+            self._bucket_histogram(index).record(latency_ms)
+        if index >= self.used:
+            self.used = index + 1
+
+    def merge(self, other: "TimeSeries", latency: bool = True):
+        """Somar outra série; latency=False soma só as contagens (barato, para o progresso ao vivo)"""
+        if other.window != self.window:
+            raise ValueError("Séries com janelas diferentes")
+        if other.used > len(self.completions):
+            self._grow(other.used)
+        for index in range(other.used):
+            self.completions[index] += other.completions[index]
+            self.errors[index] += other.errors[index]
+            if latency and other.latency[index] is not None:
+                self._bucket_histogram(index).merge(other.latency[index])
+        self.used = max(self.used, other.used)
+
+    def full_buckets(self, elapsed: float) -> int:
+        """Baldes completos até `elapsed` (todos os usados se a execução durou menos de uma janela)"""
+        return min(self.used, int(elapsed / self.window)) or self.used
+
+    def rate_at(self, elapsed: float) -> float:
+        """Vazão do último balde completo (progresso ao vivo, em vez da média acumulada)"""
+        index = int(elapsed / self.window) - 1
+        return self.completions[index] / self.window if 0 <= index < self.used else 0.0
+
+    def to_dict(self, elapsed: float) -> Dict[str, List]:
+        buckets = range(self.full_buckets(elapsed))
+
+        def percentile(index: int, p: float) -> Optional[float]:
+            histogram = self.latency[index]
+            return round(histogram.percentile(p), 2) if histogram is not None else None
+
+        return {
+            "window_s": self.window,
+            "t_s": [round(index * self.window, 3) for index in buckets],
+            "rps": [round(self.completions[index] / self.window, 2) for index in buckets],
+            "errors": [self.errors[index] for index in buckets],
+            "p50_ms": [percentile(index, 50) for index in buckets],
+            "p99_ms": [percentile(index, 99) for index in buckets],
+        }
+
+    def _detect_warmup(self, rates: List[float]) -> Tuple[int, bool]:
+        half = len(rates) // 2
+        if len(rates) < 4:
+            return 0, True
+        tail = sorted(rates[half:])
+        threshold = (1 - self.WARMUP_TOLERANCE) * tail[len(tail) // 2]
+        for index in range(half + 1):
+            head = rates[index:index + 3]
+            if rates[index] >= threshold and sum(head) / len(head) >= threshold:
+                return index, True
+        return half, False
+
+    def analyze(self, elapsed: float, warmup: Optional[float] = None) -> Dict:
+        """Pico e vale reais, aquecimento (informado em segundos ou detectado) e regime estável"""
+        count = self.full_buckets(elapsed)
+        rates = [self.completions[index] / self.window for index in range(count)]
+        if not rates:
+            return {"window_s": self.window, "buckets": 0}
+        if warmup is None:
+            skip, reached = self._detect_warmup(rates)
+        else:
+            skip, reached = min(len(rates) - 1, math.ceil(warmup / self.window)), True
+        steady = rates[skip:]
+        mean = sum(steady) / len(steady)
+        cv = math.sqrt(sum((rate - mean) ** 2 for rate in steady) / len(steady)) / mean if mean else 0.0
+        latency = LatencyHistogram(precision=self.BUCKET_PRECISION)
+        for index in range(skip, count):
+            if self.latency[index] is not None:
+                latency.merge(self.latency[index])
+        requests = sum(self.completions[index] for index in range(skip, count))
+        errors = sum(self.errors[index] for index in range(skip, count))
+        return {
+            "window_s": self.window,
+            "buckets": count,
+            # Pico sobre toda a série; vale só após o aquecimento (a rampa inicial é baixa por definição)
+            "peak_rps": round(max(rates), 2),
+            "peak_at_s": round(rates.index(max(rates)) * self.window, 3),
+            "trough_rps": round(min(steady), 2),
+            "trough_at_s": round((skip + steady.index(min(steady))) * self.window, 3),
+            "warmup_s": round(skip * self.window, 3),
+            "warmup_detected": warmup is None,
+            "steady": reached and cv <= self.STEADY_MAX_CV,
+            "steady_rps": round(mean, 2),
+            "steady_cv": round(cv, 3),
+            "steady_p50_ms": round(latency.percentile(50), 2) if latency.count else None,
+            "steady_p99_ms": round(latency.percentile(99), 2) if latency.count else None,
+            "steady_error_rate": round(errors / requests, 4) if requests else 0.0,
+        }
+
+class RunStats:
+    """Resultado agregado de uma execução: latência, fases, status HTTP e vazão por segundo"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.phases = PhaseRecorder()
+        self.requests = 0
+        self.errors = 0
+        self.statuses: Dict[int, int] = {}
+        self.per_second: List[int] = []
+        self.duration = 0.0
+        # Opcional: baldes com erros e latência (closed_loop*(window=...))
+        self.series: Optional[TimeSeries] = None
+
+    def record(self, result, offset: float):
+        """Registrar um transport.Result concluído `offset` segundos após o início"""
+        self.requests += 1
+        self.statuses[result.status] = self.statuses.get(result.status, 0) + 1
+        if not result.ok:
+            self.errors += 1
+        if result.status:
+            # Respostas 4xx/5xx têm latência real; falhas de transporte não
+            self.latency.record(result.latency_ms)
+            self.phases.record(result.phases)
+        if self.series is not None:
+            self.series.record(offset, result.ok, result.latency_ms if result.status else None)
+        second = int(offset)
+        if second >= len(self.per_second):
+            self.per_second.extend([0] * (second + 1 - len(self.per_second)))
+        self.per_second[second] += 1
+
+    def merge(self, other: "RunStats"):
+        self.latency.merge(other.latency)
+        self.phases.merge(other.phases)
+        self.requests += other.requests
+        self.errors += other.errors
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        if len(other.per_second) > len(self.per_second):
+            self.per_second.extend([0] * (len(other.per_second) - len(self.per_second)))
+        for second, count in enumerate(other.per_second):
+            self.per_second[second] += count
+        if other.series is not None:
+            if self.series is None:
+                self.series = TimeSeries(window=other.series.window)
+            self.series.merge(other.series)
+
+    @property
+    def success_rate(self) -> float:
+        return (self.requests - self.errors) / self.requests * 100 if self.requests else 0.0
+
+    @property
+    def rps(self) -> float:
+        return self.requests / self.duration if self.duration > 0 else 0.0
+
+    def timeseries(self) -> Dict[str, List]:
+        """Vazão por segundo (ou por balde da série) para gráficos; o último, parcial, fica de fora"""
+        if self.series is not None:
+            return self.series.to_dict(self.duration)
+        full = self.per_second[:int(self.duration)] or self.per_second
+        return {"t_s": list(range(len(full))), "rps": list(full)}
+
+    def throughput(self, warmup: Optional[float] = None) -> Dict:
+        """Pico, vale e regime estável da vazão (TimeSeries.analyze); sem série, usa a contagem por segundo"""
+        series = self.series
+        if series is None:
+            # Só vazão: sem erros nem latência por balde
+            series = TimeSeries(len(self.per_second))
+            for second, count in enumerate(self.per_second):
+                series.completions[second] = count
+            series.used = len(self.per_second)
+        return series.analyze(self.duration, warmup)
+
+    def summary(self) -> Dict:
+        latency = self.latency
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "duration_s": round(self.duration, 2),
+            "rps": round(self.rps, 2),
+            "success_rate": f"{self.success_rate:.1f}%",
+            "min_ms": round(latency.min, 2) if latency.count else 0.0,
+            "max_ms": round(latency.max, 2),
+            "avg_ms": round(latency.sum / latency.count, 2) if latency.count else 0.0,
+            "median_ms": round(latency.percentile(50), 2),
+            "p95_ms": round(latency.percentile(95), 2),
+            "p99_ms": round(latency.percentile(99), 2),
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "phases": self.phases.summary(),
+            "percentiles": latency.spectrum(),
+        }
+
+def summarize(values: Sequence[float], digits: int = 2) -> Dict:
+    """Estatísticas de uma amostra pequena já em memória (percentis exatos)"""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def percentile(p: float) -> float:
+        # Interpolação linear, igual ao numpy.percentile padrão
+        position = (len(ordered) - 1) * p / 100
+        low = int(position)
+        high = min(low + 1, len(ordered) - 1)
+        return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+    return {
+        "count": len(ordered),
+        "avg_ms": round(sum(ordered) / len(ordered), digits),
+        "min_ms": round(ordered[0], digits),
+        "max_ms": round(ordered[-1], digits),
+        "median_ms": round(percentile(50), digits),
+        "p95_ms": round(percentile(95), digits),
+        "p99_ms": round(percentile(99), digits),
+    }
+
+def parse_slo(slo: str) -> Tuple[float, float]:
+    """'p99<50ms' -> (99.0, 50.0); aceita também segundos ('p95<0.2s')"""
+    match = re.fullmatch(r"\s*p(\d+(?:\.\d+)?)\s*<\s*(\d+(?:\.\d+)?)\s*(ms|s)?\s*", slo)
+    if not match:
+        raise ValueError(f"SLO inválido: {slo!r} (formato esperado: p99<50ms)")
+    threshold = float(match.group(2)) * (1000 if match.group(3) == "s" else 1)
+    return float(match.group(1)), threshold
+
+def linear_trend(x: Sequence[float], y: Sequence[float]) -> Dict:
+    """Reta de mínimos quadrados: inclinação por unidade de x e R²"""
+    n = len(x)
+    mean_x, mean_y = sum(x) / n, sum(y) / n
+    sxx = sum((xi - mean_x) ** 2 for xi in x)
+    sxy = sum((xi - mean_x) * (yi - mean_y) for xi, yi in zip(x, y))
+    slope = sxy / sxx if sxx else 0.0
+    intercept = mean_y - slope * mean_x
+    residual = sum((yi - (slope * xi + intercept)) ** 2 for xi, yi in zip(x, y))
+    total = sum((yi - mean_y) ** 2 for yi in y)
+    return {"slope": slope, "intercept": intercept, "r2": 1 - residual / total if total > 0 else 0.0}
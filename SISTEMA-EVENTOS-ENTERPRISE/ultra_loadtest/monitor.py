@@ -0,0 +1,122 @@
+"""
+Saúde do gerador de carga: lag do event loop, CPU do cliente e escolha do loop (asyncio/uvloop)
+
+Um cliente asyncio saturado mede a própria fila, não o servidor: respostas
+prontas esperam o loop voltar e a latência inclui o atraso do gerador.
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+from .metrics import LatencyHistogram
+
+def install_event_loop(name: str = "asyncio") -> str:
+    """Selecionar a implementação do event loop antes de asyncio.run(); retorna a efetivamente usada"""
+    if name != "uvloop":
+        return "asyncio"
+    try:
+        import uvloop
+    except ImportError:
+        return "asyncio"  # pip install uvloop (indisponível no Windows)
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return "uvloop"
+
+class LoopMonitor:
+    """Amostrar o lag do event loop e a CPU do processo enquanto uma bateria roda.
+
+    Uso: async with LoopMonitor() as monitor: ...; monitor.verdict(p99_ms)
+
+    O lag é o atraso com que um sleep(interval) acorda além do previsto; a CPU é
+    medida em janelas de cpu_window segundos (100% = um núcleo, o teto de um loop).
+    """
+
+    WARN_LAG_MS = 5.0
+    INVALID_LAG_MS = 20.0
+    # Lag acima desta fração do p99 medido contamina a própria medição
+    INVALID_LAG_FRACTION = 0.2
+    WARN_CPU = 80.0
+    INVALID_CPU = 95.0
+    # Fração das janelas com CPU ≥ INVALID_CPU para invalidar o resultado
+    INVALID_CPU_SHARE = 0.5
+
+    def __init__(self, interval: float = 0.01, cpu_window: float = 1.0):
+        self.interval = interval
+        self.cpu_window = cpu_window
+        self.lag = LatencyHistogram()
+        self.cpu_windows = 0
+        self.cpu_saturated = 0
+        self.cpu_sum = 0.0
+        self.cpu_peak = 0.0
+        self.event_loop = "asyncio"
+        self._task: Optional[asyncio.Future] = None
+
+    async def __aenter__(self) -> "LoopMonitor":
+        loop = asyncio.get_running_loop()
+        self.event_loop = "uvloop" if type(loop).__module__.startswith("uvloop") else "asyncio"
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        # Janela final parcial conta se cobrir metade do tamanho nominal (ou se for a única)
+        wall = time.perf_counter()
+        if wall > self._wall and (not self.cpu_windows or wall - self._wall >= self.cpu_window / 2):
+            self._close_cpu_window(wall)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        expected = loop.time() + self.interval
+        while True:
+            await asyncio.sleep(self.interval)
+            now = loop.time()
+            self.lag.record(max(0.0, now - expected) * 1000)
+            expected = now + self.interval
+            wall = time.perf_counter()
+            if wall - self._wall >= self.cpu_window:
+                self._close_cpu_window(wall)
+
+    def _close_cpu_window(self, wall: float):
+        cpu = time.process_time()
+        percent = (cpu - self._cpu) / (wall - self._wall) * 100
+        self._wall, self._cpu = wall, cpu
+        self.cpu_windows += 1
+        self.cpu_sum += percent
+        self.cpu_peak = max(self.cpu_peak, percent)
+        if percent >= self.INVALID_CPU:
+            self.cpu_saturated += 1
+
+    def verdict(self, latency_p99_ms: Optional[float] = None) -> Dict:
+        """Resumo e veredito: status 'ok', 'alerta' ou 'invalido' (gerador é o gargalo)"""
+        lag_p99 = self.lag.percentile(99)
+        cpu_avg = self.cpu_sum / self.cpu_windows if self.cpu_windows else 0.0
+        invalid, warnings = [], []
+
+        contaminated = (latency_p99_ms is not None and lag_p99 >= self.WARN_LAG_MS
+                        and lag_p99 >= self.INVALID_LAG_FRACTION * latency_p99_ms)
+        if lag_p99 >= self.INVALID_LAG_MS or contaminated:
+            invalid.append(f"lag do event loop P99 {lag_p99:.1f}ms")
+        elif lag_p99 >= self.WARN_LAG_MS:
+            warnings.append(f"lag do event loop P99 {lag_p99:.1f}ms")
+        if self.cpu_windows and self.cpu_saturated / self.cpu_windows >= self.INVALID_CPU_SHARE:
+            invalid.append(f"CPU do cliente ≥{self.INVALID_CPU:g}% em {self.cpu_saturated}/{self.cpu_windows}s")
+        elif cpu_avg >= self.WARN_CPU:
+            warnings.append(f"CPU do cliente média {cpu_avg:.0f}%")
+
+        return {
+            "status": "invalido" if invalid else "alerta" if warnings else "ok",
+            "valid": not invalid,
+            "reasons": invalid + warnings,
+            "event_loop": self.event_loop,
+            "loop_lag_p50_ms": round(self.lag.percentile(50), 2),
+            "loop_lag_p99_ms": round(lag_p99, 2),
+            "loop_lag_max_ms": round(self.lag.max, 2) if self.lag.count else 0.0,
+            "cpu_avg_percent": round(cpu_avg, 1),
+            "cpu_peak_percent": round(self.cpu_peak, 1),
+        }
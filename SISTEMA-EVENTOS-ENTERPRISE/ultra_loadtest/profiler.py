@@ -0,0 +1,157 @@
+"""
+Profiler por amostragem para os servidores Python (somente biblioteca padrão)
+
+Uma thread captura sys._current_frames() a N Hz e acumula as pilhas no formato
+"collapsed" (raiz;...;folha contagem), aceito por flamegraph.pl, speedscope e
+inferno. Custo fixo por amostra, independente do volume de requisições.
+"""
+
+import os
+import sys
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from .report import _timestamped
+
+# Folhas de threads paradas esperando I/O ou trabalho: ocultas por padrão
+IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("selectors.py", "poll"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("socket.py", "accept"),
+    ("socket.py", "readinto"),  # keep-alive aguardando a próxima requisição
+    ("queue.py", "get"),
+}
+
+MAX_DEPTH = 128
+
+def _frame_label(frame) -> Tuple[str, str]:
+    code = frame.f_code
+    filename = os.path.basename(code.co_filename)
+    return filename, f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """Amostrar as pilhas de todas as threads do processo.
+
+    require_files restringe às pilhas que passam por algum desses arquivos
+    (ex.: ("socketserver.py",) isola as threads do servidor quando cliente e
+    servidor dividem o processo).
+    """
+
+    def __init__(self, hz: float = 100, include_idle: bool = False,
+                 require_files: Optional[Sequence[str]] = None):
+        self.hz = hz
+        self.include_idle = include_idle
+        self.require_files = tuple(require_files) if require_files else None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample_once(self, stacks: Counter, skip: Iterable[int]):
+        for ident, frame in sys._current_frames().items():
+            if ident in skip:
+                continue
+            code = frame.f_code
+            if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+                continue
+            files, labels = set(), []
+            while frame is not None and len(labels) < MAX_DEPTH:
+                filename, label = _frame_label(frame)
+                files.add(filename)
+                labels.append(label)
+                frame = frame.f_back
+            if self.require_files and files.isdisjoint(self.require_files):
+                continue
+            stacks[";".join(reversed(labels))] += 1
+
+    def _loop(self, stacks: Counter, deadline: float, skip: Iterable[int]) -> int:
+        interval = 1.0 / self.hz
+        samples = 0
+        next_tick = time.perf_counter()
+        while not self._stop.is_set() and next_tick < deadline:
+            self._sample_once(stacks, skip)
+            samples += 1
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_tick = time.perf_counter()  # atrasado: não acumular rajadas
+        return samples
+
+    def start(self) -> "SamplingProfiler":
+        """Amostragem contínua em thread daemon até stop()"""
+        def run():
+            self.samples += self._loop(self.stacks, float("inf"), {threading.get_ident()})
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def capture(self, seconds: float) -> Counter:
+        """Janela avulsa na thread chamadora (ex.: endpoint de debug), sem tocar no acumulado"""
+        stacks: Counter = Counter()
+        self._loop(stacks, time.perf_counter() + seconds, {threading.get_ident()})
+        return stacks
+
+    @staticmethod
+    def collapsed(stacks: Counter) -> str:
+        """Linhas 'raiz;...;folha contagem', da pilha mais frequente à menos"""
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    @staticmethod
+    def top_functions(stacks: Counter, n: int = 10) -> List[Tuple[str, int]]:
+        """Funções com mais amostras na folha (tempo próprio)"""
+        leaves: Counter = Counter()
+        for stack, count in stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(n)
+
+    def save(self, prefix: str = "server_profile", directory: Optional[Path] = None) -> Path:
+        """Gravar o acumulado em <prefix>_<timestamp>.collapsed"""
+        path = _timestamped(prefix, ".collapsed", directory)
+        path.write_text(self.collapsed(self.stacks), encoding="utf-8")
+        return path
+
+    def print_summary(self, path: Optional[Path] = None, n: int = 10):
+        """Resumo no console ao encerrar o servidor"""
+        total = sum(self.stacks.values())
+        print(f"\n[PROFILE] {self.samples} amostras a {self.hz:g} Hz, {total} pilhas ativas")
+        for label, count in self.top_functions(self.stacks, n) if total else []:
+            print(f"  {count / total:6.1%}  {label}")
+        if path is not None:
+            print(f"[PROFILE] Pilhas em {path} (flamegraph.pl {path} > flame.svg, ou speedscope)")
+
+def serve_profile_request(handler, hz: float = 100, require_files: Optional[Sequence[str]] = None,
+                          max_seconds: float = 300):
+    """Responder GET /api/debug/profile?seconds=N[&hz=M] com as pilhas collapsed da janela.
+
+    Bloqueia a thread da requisição pela duração da janela: use com servidor multi-thread.
+    """
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(handler.path).query)
+    try:
+        seconds = min(max_seconds, max(0.1, float(query.get("seconds", ["30"])[0])))
+        hz = min(1000.0, max(1.0, float(query.get("hz", [hz])[0])))
+    except ValueError:
+        handler.send_error(400, "seconds/hz devem ser numéricos")
+        return
+    profiler = SamplingProfiler(hz=hz, include_idle="idle" in query, require_files=require_files)
+    body = SamplingProfiler.collapsed(profiler.capture(seconds)).encode()
+    handler.send_response(200)
+    handler.send_header("Content-Type", "text/plain; charset=utf-8")
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
@@ -0,0 +1,92 @@
+"""
+Saída dos testes: cores, seções no console, classificação e arquivos de resultado
+"""
+
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+# Cores para output
+class Colors:
+    HEADER = '\033[95m'
+    OKBLUE = '\033[94m'
+    OKCYAN = '\033[96m'
+    OKGREEN = '\033[92m'
+    WARNING = '\033[93m'
+    FAIL = '\033[91m'
+    ENDC = '\033[0m'
+    BOLD = '\033[1m'
+
+ANSI_ESCAPE = re.compile(r"\033\[[0-9;]*m")
+
+def print_banner(title: str, width: int = 80):
+    """Cabeçalho principal de uma suíte"""
+    print(f"\n{Colors.HEADER}{Colors.BOLD}")
+    print("=" * width)
+    print(f"   {title}")
+    print("=" * width)
+    print(f"{Colors.ENDC}\n")
+
+def print_section(title: str, width: int = 60):
+    """Cabeçalho de uma bateria de testes"""
+    print(f"\n{Colors.OKCYAN}{'=' * width}")
+    print(f"  {title}")
+    print(f"{'=' * width}{Colors.ENDC}\n")
+
+def rating(value: float, levels: Sequence[Tuple[float, str, str]], fallback: Tuple[str, str],
+           higher_is_better: bool = False) -> Tuple[str, str]:
+    """(cor, rótulo) do primeiro nível atingido; levels = [(limite, cor, rótulo), ...] do melhor ao pior"""
+    for threshold, color, label in levels:
+        if (value > threshold) if higher_is_better else (value < threshold):
+            return color, label
+    return fallback
+
+def grade_color(grade: str) -> str:
+    if grade in ["A+", "A"]:
+        return Colors.OKGREEN
+    elif grade == "B":
+        return Colors.WARNING
+    else:
+        return Colors.FAIL
+
+def print_latency(stats: Dict, phases_line: Optional[str] = None, indent: str = "  "):
+    """Bloco padrão: média/percentis, extremos, fases e taxa de sucesso"""
+    print(f"{indent}├─ Avg: {stats['avg_ms']}ms | P95: {stats['p95_ms']}ms | P99: {stats['p99_ms']}ms")
+    print(f"{indent}├─ Min: {stats['min_ms']}ms | Max: {stats['max_ms']}ms")
+    if phases_line:
+        print(f"{indent}├─ Fases P99: {phases_line}")
+    print(f"{indent}└─ Success Rate: {stats['success_rate']}\n")
+
+def print_client_health(client: Dict, indent: str = "  "):
+    """Linha do gerador de carga (lag do loop/CPU) e aviso quando ele é o gargalo"""
+    line = (f"Cliente ({client['event_loop']}): lag do loop P99 {client['loop_lag_p99_ms']}ms | "
+            f"CPU média {client['cpu_avg_percent']}% (pico {client['cpu_peak_percent']}%)")
+    if client["status"] == "ok":
+        print(f"{indent}{line}")
+    elif client["valid"]:
+        print(f"{indent}{Colors.WARNING}⚠️ {line} - {', '.join(client['reasons'])}{Colors.ENDC}")
+    else:
+        print(f"{indent}{Colors.FAIL}❌ RESULTADO INVÁLIDO: gerador de carga saturado "
+              f"({', '.join(client['reasons'])}){Colors.ENDC}")
+        print(f"{indent}   {line}")
+
+def strip_ansi(text: str) -> str:
+    return ANSI_ESCAPE.sub("", text)
+
+def _timestamped(prefix: str, suffix: str, directory: Optional[Path] = None) -> Path:
+    name = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}"
+    return Path(directory) / name if directory else Path(name)
+
+def save_json(results: Dict, prefix: str, directory: Optional[Path] = None) -> Path:
+    """Gravar resultados em <prefix>_<timestamp>.json"""
+    path = _timestamped(prefix, ".json", directory)
+    path.write_text(json.dumps(results, indent=2, ensure_ascii=False, default=str), encoding="utf-8")
+    return path
+
+def save_text(text: str, prefix: str, directory: Optional[Path] = None) -> Path:
+    """Gravar relatório em <prefix>_<timestamp>.txt, sem códigos de cor"""
+    path = _timestamped(prefix, ".txt", directory)
+    path.write_text(strip_ansi(text), encoding="utf-8")
+    return path
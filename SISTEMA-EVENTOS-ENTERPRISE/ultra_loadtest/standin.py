@@ -0,0 +1,66 @@
+"""
+Servidor WebSocket local (echo + broadcast) para rodar o teste de fan-out sem backend
+"""
+
+import asyncio
+import json
+import multiprocessing
+import time
+
+import aiohttp
+from aiohttp import web
+
+from .system import raise_fd_limit
+
+async def _standin_ws_handler(request: web.Request) -> web.WebSocketResponse:
+    """Echo para mensagens comuns; {"tipo": "broadcast"} é republicado para todos com server_ts"""
+    ws = web.WebSocketResponse(compress=False)
+    await ws.prepare(request)
+    clients = request.app["clients"]
+    clients.add(ws)
+    try:
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                continue
+            try:
+                data = json.loads(msg.data)
+            except ValueError:
+                data = None
+            if isinstance(data, dict) and data.get("tipo") == "broadcast":
+                data["server_ts"] = time.time()
+                payload = json.dumps(data)
+                for client in list(clients):
+                    if not client.closed:
+                        await client.send_str(payload)
+            else:
+                await ws.send_str(msg.data)
+    finally:
+        clients.discard(ws)
+    return ws
+
+def run_websocket_standin(host: str, port: int, ready=None):
+    """Servidor WebSocket local (echo + broadcast em /ws) para rodar o teste offline"""
+    raise_fd_limit()
+    app = web.Application()
+    app["clients"] = set()
+    app.router.add_get("/ws", _standin_ws_handler)
+
+    async def serve():
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port, backlog=4096).start()
+        if ready is not None:
+            ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+def start_websocket_standin(port: int = 8765) -> multiprocessing.Process:
+    """Iniciar o stand-in em processo separado (memória do servidor medida à parte)"""
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(target=run_websocket_standin, args=("127.0.0.1", port, ready), daemon=True)
+    process.start()
+    if not ready.wait(15):
+        process.terminate()
+        raise RuntimeError(f"Servidor WebSocket stand-in não iniciou na porta {port}")
+    return process
@@ -0,0 +1,75 @@
+"""
+Recursos do sistema: limite de descritores e amostragem de processos (psutil opcional)
+"""
+
+import time
+from typing import Dict, Optional
+
+def raise_fd_limit() -> Optional[int]:
+    """Elevar o limite de descritores (soft -> hard) para abrir dezenas de milhares de sockets"""
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows não tem RLIMIT_NOFILE
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    for target in (hard, 1 << 20, 65536):
+        if target == resource.RLIM_INFINITY or target <= soft:
+            continue
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            break
+        except (ValueError, OSError):
+            continue
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+def find_listening_pid(port: int) -> Optional[int]:
+    """PID do processo escutando na porta TCP (None sem permissão ou se não encontrado)"""
+    import psutil
+
+    try:
+        for conn in psutil.net_connections(kind="tcp"):
+            if conn.status == psutil.CONN_LISTEN and conn.laddr and conn.laddr.port == port and conn.pid:
+                return conn.pid
+    except (psutil.AccessDenied, PermissionError):
+        pass
+    return None
+
+def sample_process_tree(process) -> Dict:
+    """RSS, descritores e threads do processo alvo somados aos filhos (workers uvicorn)"""
+    import psutil
+
+    rss = fds = threads = 0
+    for proc in [process] + process.children(recursive=True):
+        try:
+            with proc.oneshot():
+                rss += proc.memory_info().rss
+                fds += proc.num_fds() if hasattr(proc, "num_fds") else proc.num_handles()
+                threads += proc.num_threads()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return {"rss_mb": round(rss / 1024 / 1024, 2), "fds": fds, "threads": threads}
+
+class ProcessUsage:
+    """CPU e memória do próprio processo de teste entre start() e stop()"""
+
+    def start(self) -> "ProcessUsage":
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def stop(self) -> Dict:
+        wall = time.perf_counter() - self._wall
+        usage = {"cpu_percent": round((time.process_time() - self._cpu) / wall * 100, 1) if wall > 0 else 0.0}
+        try:
+            import psutil
+            usage["memory_mb"] = round(psutil.Process().memory_info().rss / 1024 / 1024, 2)
+        except ImportError:
+            try:
+                import resource
+                import sys
+                peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                # ru_maxrss é KB no Linux e bytes no macOS (pico, não atual)
+                usage["memory_mb"] = round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+            except ImportError:
+                pass
+        return usage
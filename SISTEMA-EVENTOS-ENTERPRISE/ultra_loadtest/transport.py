@@ -0,0 +1,211 @@
+"""
+Transportes HTTP intercambiáveis: síncrono (http.client, threads) e assíncrono (aiohttp)
+Ambos devolvem o mesmo Result com latência total e por fase
+"""
+
+import asyncio
+import http.client
+import json
+import socket
+import ssl
+import threading
+import time
+import urllib.parse
+from typing import Dict, NamedTuple, Optional, Tuple
+
+class Result(NamedTuple):
+    """Resultado de uma requisição; status 0 indica falha de transporte"""
+    status: int
+    latency_ms: float
+    phases: Dict[str, float]
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return 0 < self.status < 400
+
+def _encode_body(body) -> Tuple[Optional[bytes], Dict[str, str]]:
+    if body is None:
+        return None, {}
+    if isinstance(body, (bytes, str)):
+        return body if isinstance(body, bytes) else body.encode("utf-8"), {}
+    return json.dumps(body).encode("utf-8"), {"Content-Type": "application/json"}
+
+def _open_connection(parts: urllib.parse.SplitResult, timeout: float) -> Tuple[http.client.HTTPConnection, Dict]:
+    """Abrir conexão medindo DNS, TCP e TLS separadamente"""
+    https = parts.scheme == "https"
+    host, port = parts.hostname, parts.port or (443 if https else 80)
+
+    t_start = time.perf_counter()
+    family, sock_type, proto, _, address = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0]
+    t_dns = time.perf_counter()
+    sock = socket.socket(family, sock_type, proto)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(address)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        t_connect = time.perf_counter()
+        if https:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+        t_tls = time.perf_counter()
+    except BaseException:
+        sock.close()
+        raise
+
+    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    conn.sock = sock
+    phases = {"dns": (t_dns - t_start) * 1000, "connect": (t_connect - t_dns) * 1000}
+    if https:
+        phases["tls"] = (t_tls - t_connect) * 1000
+    return conn, phases
+
+class SyncTransport:
+    """http.client com uma conexão keep-alive por thread e host (ou conexão nova por requisição)
+
+    Com keep_alive=False cada requisição paga DNS/TCP/TLS, como um usuário chegando;
+    com keep_alive=True (padrão) essas fases só aparecem quando a conexão é aberta.
+    """
+
+    def __init__(self, timeout: float = 5.0, keep_alive: bool = True, headers: Optional[Dict[str, str]] = None):
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.headers = dict(headers or {})
+        self._local = threading.local()
+        self._all_connections = []
+        self._lock = threading.Lock()
+
+    def _connections(self) -> Dict:
+        pool = getattr(self._local, "pool", None)
+        if pool is None:
+            pool = self._local.pool = {}
+            with self._lock:
+                self._all_connections.append(pool)
+        return pool
+
+    def request(self, method: str, url: str, body=None, start: Optional[float] = None) -> Result:
+        """Executar a requisição; `start` (perf_counter) permite medir desde o envio planejado"""
+        start = time.perf_counter() if start is None else start
+        parts = urllib.parse.urlsplit(url)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        payload, headers = _encode_body(body)
+        headers.update(self.headers)
+        key = (parts.scheme, parts.netloc)
+        pool = self._connections() if self.keep_alive else {}
+
+        for attempt in (0, 1):
+            conn = pool.pop(key, None)
+            reused = conn is not None
+            try:
+                if conn is None:
+                    conn, phases = _open_connection(parts, self.timeout)
+                else:
+                    phases = {}  # conexão reaproveitada: sem DNS/TCP/TLS, como no aiohttp
+                t_send = time.perf_counter()
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                t_first_byte = time.perf_counter()
+                response.read()
+                done = time.perf_counter()
+            except (OSError, http.client.HTTPException) as e:
+                if conn is not None:
+                    conn.close()
+                if reused and attempt == 0:
+                    continue  # servidor fechou a conexão ociosa: tentar em uma nova
+                return Result(0, (time.perf_counter() - start) * 1000, {}, f"{type(e).__name__}: {e}")
+
+            if self.keep_alive and not response.will_close:
+                pool[key] = conn
+            else:
+                conn.close()
+            phases.update({
+                "ttfb": (t_first_byte - t_send) * 1000,
+                "body": (done - t_first_byte) * 1000,
+                "total": (done - start) * 1000,
+            })
+            return Result(response.status, (done - start) * 1000, phases)
+
+    def close(self):
+        with self._lock:
+            for pool in self._all_connections:
+                for conn in pool.values():
+                    conn.close()
+                pool.clear()
+
+class AsyncTransport:
+    """aiohttp.ClientSession com hooks de trace por fase; usar com `async with`"""
+
+    def __init__(self, timeout: float = 10.0, limit: int = 0, trace_phases: bool = True):
+        self.timeout = timeout
+        self.limit = limit
+        self.trace_phases = trace_phases
+        self.session = None
+
+    async def __aenter__(self) -> "AsyncTransport":
+        import aiohttp
+
+        self._aiohttp = aiohttp
+        self._client_timeout = aiohttp.ClientTimeout(total=self.timeout)
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.limit),
+            trace_configs=[phase_trace_config()] if self.trace_phases else [],
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    async def request(self, method: str, url: str, body=None, start: Optional[float] = None,
+                      allow_redirects: bool = True) -> Result:
+        """Executar a requisição; `start` (perf_counter) permite medir desde o envio planejado"""
+        start = time.perf_counter() if start is None else start
+        marks = {}
+        payload, headers = _encode_body(body)
+        try:
+            async with self.session.request(method, url, data=payload, headers=headers,
+                                            timeout=self._client_timeout, allow_redirects=allow_redirects,
+                                            trace_request_ctx=marks) as resp:
+                await resp.read()
+                status = resp.status
+        except (self._aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+            return Result(0, (time.perf_counter() - start) * 1000, {}, f"{type(e).__name__}: {e}")
+        done = time.perf_counter()
+        phases = phases_from_marks(marks, done)
+        phases["total"] = (done - start) * 1000
+        return Result(status, (done - start) * 1000, phases)
+
+def phase_trace_config():
+    """Hooks do aiohttp que marcam cada fase no dict passado em trace_request_ctx"""
+    import aiohttp
+
+    def mark(name):
+        async def hook(session, trace_config_ctx, params):
+            marks = trace_config_ctx.trace_request_ctx
+            if isinstance(marks, dict):
+                marks[name] = time.perf_counter()
+        return hook
+
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(mark("start"))
+    config.on_dns_resolvehost_start.append(mark("dns_start"))
+    config.on_dns_resolvehost_end.append(mark("dns_end"))
+    config.on_connection_create_start.append(mark("conn_start"))
+    config.on_connection_create_end.append(mark("conn_end"))
+    config.on_request_headers_sent.append(mark("sent"))
+    config.on_request_end.append(mark("response"))
+    return config
+
+def phases_from_marks(marks: Dict[str, float], done: float) -> Dict[str, float]:
+    """Converter as marcas do trace em durações (ms); no aiohttp o TLS fica dentro de connect"""
+    phases = {}
+    if "start" in marks:
+        phases["total"] = (done - marks["start"]) * 1000
+    if "conn_start" in marks and "conn_end" in marks:
+        # DNS só entra em conexões novas; cache hit conta como 0
+        dns = (marks["dns_end"] - marks["dns_start"]) * 1000 if "dns_end" in marks else 0.0
+        phases["dns"] = dns
+        phases["connect"] = max(0.0, (marks["conn_end"] - marks["conn_start"]) * 1000 - dns)
+    if "response" in marks:
+        sent = marks.get("sent") or marks.get("conn_end") or marks.get("start", marks["response"])
+        phases["ttfb"] = (marks["response"] - sent) * 1000
+        phases["body"] = (done - marks["response"]) * 1000
+    return phases